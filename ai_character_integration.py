@@ -7,26 +7,14 @@ Integrates character sheets into AI context for coherent narration
 import sqlite3
 import json
 import os
+import uuid
+
+from character_cache import character_cache
 
 def get_active_character(user_id):
     """Get the currently active character for a user"""
-    db_path = os.path.join(os.path.dirname(__file__), 'vtm_storyteller.db')
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    
-    # Get most recently played character
-    cursor.execute('''
-    SELECT id FROM characters 
-    WHERE user_id = ? 
-    ORDER BY last_played DESC, updated_at DESC 
-    LIMIT 1
-    ''', (user_id,))
-    
-    result = cursor.fetchone()
-    conn.close()
-    
-    return result['id'] if result else None
+    # Most recently played character, served from the in-process cache
+    return character_cache.get_active_id(user_id)
 
 def build_character_context_for_ai(character_id):
     """
@@ -233,7 +221,114 @@ def get_dice_pool_for_action(character_id, attribute, skill):
     
     return (dice_pool, hunger)
 
-def update_character_state(character_id, updates):
+# Mutable state fields -> (lowest, highest) as SQL expressions over the
+# row before the update; None means unbounded
+STATE_LIMITS = {
+    'health_damage': ('0', 'COALESCE(health, 10)'),
+    'willpower_damage': ('0', 'COALESCE(willpower, 5)'),
+    'hunger': ('0', '5'),
+    'humanity': ('0', '10'),
+    'humanity_stains': ('0', '10 - COALESCE(humanity, 7)'),
+    'blood_potency': ('0', '10'),
+    'experience': ('0', None),
+}
+
+def _clamped_set(field):
+    low, high = STATE_LIMITS[field]
+    value = f'COALESCE({field}, 0) + ?'
+    if high is not None:
+        value = f'MIN({high}, {value})'
+    return f'{field} = MAX({low}, {value})'
+
+def _validate_state_changes(changes):
+    """Reject unknown fields and non-integer deltas before touching the DB"""
+    for character_id, updates in changes.items():
+        unknown = sorted(set(updates) - STATE_LIMITS.keys())
+        if unknown:
+            raise ValueError(f"Cannot update state field(s): {', '.join(unknown)}")
+        for field, change in updates.items():
+            if isinstance(change, bool) or not isinstance(change, int):
+                raise ValueError(f"Change for {field} must be an integer, got {change!r}")
+
+def apply_state_changes(changes, reason=None):
+    """
+    Apply state deltas to one or more characters in a single transaction.
+    
+    Each character gets one UPDATE that adds every delta, clamps the
+    results to STATE_LIMITS and touches last_played. Every changed field is
+    recorded in character_state_events so the batch can be undone.
+    
+    Args:
+        changes: {character_id: {field: delta}}
+        reason: optional note stored with the events (e.g. "combat round 2")
+    
+    Returns:
+        dict: success, batch_id and {character_id: {field: new value}};
+        characters that don't exist are left out of 'characters'
+    """
+    _validate_state_changes(changes)
+    batch_id = uuid.uuid4().hex
+    results = {}
+    
+    db_path = os.path.join(os.path.dirname(__file__), 'vtm_storyteller.db')
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('BEGIN IMMEDIATE')
+        events = []
+        for character_id, updates in changes.items():
+            updates = {field: change for field, change in updates.items() if change}
+            fields = list(updates)
+            columns = ', '.join(f'COALESCE({field}, 0)' for field in fields)
+            
+            if fields:
+                old = cursor.execute(f'SELECT {columns} FROM characters WHERE id = ?',
+                                     (character_id,)).fetchone()
+                if old is None:
+                    continue
+                assignments = ', '.join(_clamped_set(field) for field in fields)
+                new = cursor.execute(f'''
+                UPDATE characters
+                SET {assignments}, last_played = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+                RETURNING {', '.join(fields)}
+                ''', (*updates.values(), character_id)).fetchone()
+            else:
+                new = cursor.execute('''
+                UPDATE characters SET last_played = CURRENT_TIMESTAMP
+                WHERE id = ?
+                RETURNING id
+                ''', (character_id,)).fetchone()
+                if new is None:
+                    continue
+                old = new = ()
+            
+            results[character_id] = dict(zip(fields, new))
+            events.extend(
+                (batch_id, character_id, field, updates[field], old_value, new_value, reason)
+                for field, old_value, new_value in zip(fields, old, new)
+                if old_value != new_value
+            )
+        
+        cursor.executemany('''
+        INSERT INTO character_state_events
+            (batch_id, character_id, field, delta, old_value, new_value, reason)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', events)
+        cursor.execute('COMMIT')
+    except Exception:
+        cursor.execute('ROLLBACK')
+        raise
+    finally:
+        conn.close()
+    
+    for character_id in results:
+        character_cache.invalidate(character_id)
+    
+    return {'success': True, 'batch_id': batch_id, 'characters': results}
+
+def update_character_state(character_id, updates, reason=None):
     """
     Update character state after actions
     
@@ -243,30 +338,64 @@ def update_character_state(character_id, updates):
         'hunger': +1,  # Increase hunger
         'humanity_stains': +1  # Add stain
     }
+    
+    Fields must be in STATE_LIMITS; results are clamped (hunger 0-5,
+    damage up to the track size, ...). See apply_state_changes().
+    """
+    result = apply_state_changes({character_id: updates}, reason)
+    if character_id not in result['characters']:
+        return {'success': False, 'error': 'Character not found'}
+    
+    return {
+        'success': True,
+        'message': 'Character state updated',
+        'batch_id': result['batch_id'],
+        'state': result['characters'][character_id]
+    }
+
+def undo_state_changes(batch_id):
     """
+    Revert one batch from apply_state_changes().
     
+    Fields are restored to their recorded old values, which also discards
+    any later change to the same fields. Returns success False if the batch
+    doesn't exist or was already undone.
+    """
     db_path = os.path.join(os.path.dirname(__file__), 'vtm_storyteller.db')
-    conn = sqlite3.connect(db_path)
+    conn = sqlite3.connect(db_path, isolation_level=None)
     cursor = conn.cursor()
     
-    for field, change in updates.items():
-        cursor.execute(f'''
-        UPDATE characters 
-        SET {field} = {field} + ?, updated_at = CURRENT_TIMESTAMP
-        WHERE id = ?
-        ''', (change, character_id))
-    
-    # Update last_played timestamp
-    cursor.execute('''
-    UPDATE characters 
-    SET last_played = CURRENT_TIMESTAMP 
-    WHERE id = ?
-    ''', (character_id,))
+    try:
+        cursor.execute('BEGIN IMMEDIATE')
+        events = cursor.execute('''
+        SELECT character_id, field, old_value FROM character_state_events
+        WHERE batch_id = ? AND undone = 0
+        ''', (batch_id,)).fetchall()
+        
+        restored = {}
+        for character_id, field, old_value in events:
+            restored.setdefault(character_id, {})[field] = old_value
+        for character_id, fields in restored.items():
+            assignments = ', '.join(f'{field} = ?' for field in fields)
+            cursor.execute(f'''
+            UPDATE characters SET {assignments}, updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+            ''', (*fields.values(), character_id))
+        
+        cursor.execute('UPDATE character_state_events SET undone = 1 WHERE batch_id = ?', (batch_id,))
+        cursor.execute('COMMIT')
+    except Exception:
+        cursor.execute('ROLLBACK')
+        raise
+    finally:
+        conn.close()
     
-    conn.commit()
-    conn.close()
+    for character_id in restored:
+        character_cache.invalidate(character_id)
     
-    return {'success': True, 'message': 'Character state updated'}
+    if not events:
+        return {'success': False, 'error': 'Nothing to undo for this batch'}
+    return {'success': True, 'characters': restored}
 
 def get_character_summary_for_chat(user_id):
     """
@@ -274,28 +403,15 @@ def get_character_summary_for_chat(user_id):
     Shorter version for ongoing conversations
     """
     
-    character_id = get_active_character(user_id)
-    if not character_id:
-        return None
-    
-    db_path = os.path.join(os.path.dirname(__file__), 'vtm_storyteller.db')
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT * FROM characters WHERE id = ?', (character_id,))
-    char = cursor.fetchone()
-    
+    char = character_cache.get_active(user_id)
     if not char:
-        conn.close()
         return None
     
     summary = f"""
 [ACTIVE CHARACTER: {char['name']} - {char['clan']} {char['predator_type']}]
-Current State: Health {char['health'] - char['health_damage']}/{char['health']}, Willpower {char['willpower'] - char['willpower_damage']}/{char['willpower']}, Humanity {char['humanity']}, Hunger {char['hunger']}
+Current State: Health {char['health'] - char.get('health_damage', 0)}/{char['health']}, Willpower {char['willpower'] - char.get('willpower_damage', 0)}/{char['willpower']}, Humanity {char['humanity']}, Hunger {char['hunger']}
 """
     
-    conn.close()
     return summary
 
 if __name__ == '__main__':
@@ -305,5 +421,7 @@ if __name__ == '__main__':
     print("  - build_character_context_for_ai(character_id)")
     print("  - get_dice_pool_for_action(character_id, attribute, skill)")
     print("  - update_character_state(character_id, updates)")
+    print("  - apply_state_changes({character_id: updates})")
+    print("  - undo_state_changes(batch_id)")
     print("  - get_character_summary_for_chat(user_id)")
 
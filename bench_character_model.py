@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark for character serialization
+Compares the old positional row mapping with the shared character model
+
+Usage:
+    python bench_character_model.py [characters]
+"""
+
+import json
+import random
+import sqlite3
+import sys
+import time
+
+from character_model import API_FIELDS, create_table_sql, fetch_characters
+
+
+LEGACY_SELECT = '''SELECT id, name, clan, concept, chronicle_id,
+                   generation, sire, predator_type, ambition, desire,
+                   attributes, skills, disciplines, backgrounds,
+                   health, willpower, humanity, hunger, experience,
+                   created_at, updated_at
+                   FROM characters'''
+
+
+def build_database(count):
+    conn = sqlite3.connect(':memory:')
+    conn.execute(create_table_sql())
+    rng = random.Random(5)
+    attributes = ['strength', 'dexterity', 'stamina', 'charisma', 'manipulation',
+                  'composure', 'intelligence', 'wits', 'resolve']
+    skills = ['athletics', 'brawl', 'drive', 'firearms', 'melee', 'stealth', 'insight',
+              'intimidation', 'persuasion', 'streetwise', 'subterfuge', 'awareness', 'occult']
+    conn.executemany(
+        '''INSERT INTO characters (name, clan, concept, user_id, attributes, skills,
+                                   disciplines, backgrounds, health, willpower)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+        [(f"Kindred {i}", rng.choice(['Brujah', 'Toreador', 'Ventrue', 'Nosferatu']),
+          'Night courier', f"user_{i % 100}",
+          json.dumps({a: rng.randint(1, 5) for a in attributes}),
+          json.dumps({s: rng.randint(0, 5) for s in skills}),
+          json.dumps({'Celerity': 2, 'Potence': 1}),
+          json.dumps({'Resources': 2, 'Contacts': 1}),
+          rng.randint(3, 10), rng.randint(3, 10))
+         for i in range(count)])
+    conn.commit()
+    return conn
+
+
+def legacy_serialize(conn):
+    result = []
+    for char in conn.execute(LEGACY_SELECT).fetchall():
+        result.append({
+            'id': char[0], 'name': char[1], 'clan': char[2], 'concept': char[3],
+            'chronicle_id': char[4], 'generation': char[5], 'sire': char[6],
+            'predator_type': char[7], 'ambition': char[8], 'desire': char[9],
+            'attributes': json.loads(char[10]) if char[10] else {},
+            'skills': json.loads(char[11]) if char[11] else {},
+            'disciplines': json.loads(char[12]) if char[12] else {},
+            'backgrounds': json.loads(char[13]) if char[13] else {},
+            'health': char[14], 'willpower': char[15], 'humanity': char[16],
+            'hunger': char[17], 'experience': char[18],
+            'created_at': char[19], 'updated_at': char[20]
+        })
+    return json.dumps({'characters': result})
+
+
+def model_serialize(conn, fields=API_FIELDS):
+    characters = fetch_characters(conn, columns=fields)
+    return json.dumps({'characters': [char.to_dict(fields) for char in characters]})
+
+
+def model_load_only(conn):
+    """Load every row and read one scalar; JSON columns are never parsed"""
+    return sum(char.health for char in fetch_characters(conn))
+
+
+def best_of(func, repeats=5):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(argv):
+    count = int(argv[0]) if argv else 10000
+    conn = build_database(count)
+
+    cases = [
+        ('legacy positional, all fields', lambda: legacy_serialize(conn)),
+        ('model, all API fields', lambda: model_serialize(conn)),
+        ('model, fields=id,name,clan', lambda: model_serialize(conn, ('id', 'name', 'clan'))),
+        ('model, load without JSON access', lambda: model_load_only(conn)),
+    ]
+
+    print(f"Characters: {count}")
+    baseline = None
+    for label, func in cases:
+        seconds = best_of(func)
+        baseline = baseline or seconds
+        print(f"  {label:34s} {seconds * 1000:8.1f} ms  {count / seconds:10.0f} chars/s  "
+              f"{baseline / seconds:5.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Benchmark for Discord bot event-loop lag and reply latency
+Compares the old blocking, polling client with the bot's streamed Storyteller path
+
+A mock of the Assistants API runs on a background thread with a fixed
+per-request latency. While N players talk to the Storyteller at once, a
+ticker on the bot's event loop measures how late it wakes up; that delay
+is what the gateway heartbeat and every other command would see. Each
+reply also records when its first words could be shown, how many API
+requests it took and, for the streamed path, how many Discord edits the
+coalescing StreamingReply made.
+
+Usage:
+    python bench_discord_loop.py [players] [latency_ms]
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import warnings
+
+from aiohttp import web
+
+
+RUN_SECONDS = 1.5
+FIRST_TOKEN_SECONDS = 0.5
+TICK_SECONDS = 0.01
+REPLY = ("The rain hides your approach as you slip into the alley behind the Elysium. "
+         "Somewhere above, a window scrapes open and a voice you half recognise calls "
+         "a name that is not yours. The Beast stirs at the smell of fresh blood on the "
+         "wet brick. Roll Dexterity + Stealth, difficulty 3, to reach the fire escape unseen.")
+
+
+class MockAssistants:
+    """Just enough of /v1/threads for the bot: threads, messages, runs"""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.ids = itertools.count(1)
+        self.runs = {}
+        self.requests = 0
+
+    def app(self):
+        app = web.Application()
+        app.router.add_post('/v1/threads', self.create_thread)
+        app.router.add_post('/v1/threads/{thread_id}/messages', self.create_message)
+        app.router.add_get('/v1/threads/{thread_id}/messages', self.list_messages)
+        app.router.add_post('/v1/threads/{thread_id}/runs', self.create_run)
+        app.router.add_get('/v1/threads/{thread_id}/runs/{run_id}', self.retrieve_run)
+        return app
+
+    async def respond(self, body):
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        return web.json_response(body)
+
+    def message(self, thread_id, role, text):
+        return {'id': f"msg_{next(self.ids)}", 'object': 'thread.message', 'created_at': int(time.time()),
+                'thread_id': thread_id, 'role': role, 'status': 'completed', 'metadata': {},
+                'attachments': [], 'assistant_id': None, 'run_id': None,
+                'content': [{'type': 'text', 'text': {'value': text, 'annotations': []}}]}
+
+    def run(self, thread_id, run_id):
+        done = time.monotonic() - self.runs[run_id] >= RUN_SECONDS
+        return {'id': run_id, 'object': 'thread.run', 'created_at': int(time.time()), 'thread_id': thread_id,
+                'assistant_id': 'asst_mock', 'status': 'completed' if done else 'in_progress',
+                'instructions': '', 'model': 'gpt-4', 'tools': [], 'metadata': {}, 'parallel_tool_calls': True}
+
+    async def create_thread(self, request):
+        return await self.respond({'id': f"thread_{next(self.ids)}", 'object': 'thread',
+                                   'created_at': int(time.time()), 'metadata': {}})
+
+    async def create_message(self, request):
+        body = await request.json()
+        return await self.respond(self.message(request.match_info['thread_id'], 'user', body['content']))
+
+    async def list_messages(self, request):
+        data = [self.message(request.match_info['thread_id'], 'assistant', REPLY)]
+        return await self.respond({'object': 'list', 'data': data, 'first_id': data[0]['id'],
+                                   'last_id': data[0]['id'], 'has_more': False})
+
+    async def create_run(self, request):
+        body = await request.json()
+        run_id = f"run_{next(self.ids)}"
+        self.runs[run_id] = time.monotonic()
+        if body.get('stream'):
+            return await self.stream_run(request, run_id)
+        return await self.respond(self.run(request.match_info['thread_id'], run_id))
+
+    async def stream_run(self, request, run_id):
+        """Server-sent events: the reply arrives word by word over RUN_SECONDS"""
+        self.requests += 1
+        thread_id = request.match_info['thread_id']
+        response = web.StreamResponse(headers={'Content-Type': 'text/event-stream'})
+        await response.prepare(request)
+
+        async def send(event, data):
+            await response.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode())
+
+        await asyncio.sleep(self.latency)
+        await send('thread.run.created', self.run(thread_id, run_id))
+        await asyncio.sleep(FIRST_TOKEN_SECONDS)
+        words = REPLY.split(' ')
+        delay = (RUN_SECONDS - FIRST_TOKEN_SECONDS) / len(words)
+        for index, word in enumerate(words):
+            value = word if index == 0 else ' ' + word
+            await send('thread.message.delta', {
+                'id': 'msg_stream', 'object': 'thread.message.delta',
+                'delta': {'content': [{'index': 0, 'type': 'text', 'text': {'value': value, 'annotations': []}}]}})
+            await asyncio.sleep(delay)
+        await send('thread.run.completed', self.run(thread_id, run_id))
+        await response.write(b"event: done\ndata: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def retrieve_run(self, request):
+        return await self.respond(self.run(request.match_info['thread_id'], request.match_info['run_id']))
+
+
+def start_mock_server(mock):
+    """Serve the mock on its own thread and loop; returns the base URL"""
+    ready = threading.Event()
+    address = {}
+
+    def serve():
+        loop = asyncio.new_event_loop()
+        runner = web.AppRunner(mock.app(), access_log=None)
+        loop.run_until_complete(runner.setup())
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        loop.run_until_complete(site.start())
+        address['port'] = site._server.sockets[0].getsockname()[1]
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=serve, daemon=True).start()
+    ready.wait()
+    return f"http://127.0.0.1:{address['port']}/v1"
+
+
+async def legacy_storyteller(client, user_threads, user_id, message, on_text=None):
+    """The bot's original slash-command body: sync client calls inside a coroutine"""
+    if user_id not in user_threads:
+        user_threads[user_id] = client.beta.threads.create().id
+    thread_id = user_threads[user_id]
+    client.beta.threads.messages.create(thread_id=thread_id, role="user", content=message)
+    run = client.beta.threads.runs.create(thread_id=thread_id, assistant_id='asst_mock')
+    for _ in range(90):
+        run_status = client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run.id)
+        if run_status.status == "completed":
+            messages = client.beta.threads.messages.list(thread_id=thread_id)
+            return messages.data[0].content[0].text.value
+        await asyncio.sleep(1)
+
+
+class FakeInteraction:
+    """Records the edits StreamingReply would make to a Discord reply"""
+
+    class Followup:
+        def __init__(self, interaction):
+            self.interaction = interaction
+
+        async def send(self, content, wait=False):
+            self.interaction.edits += 1
+            return self
+
+        async def edit(self, content):
+            self.interaction.edits += 1
+
+    def __init__(self):
+        self.edits = 0
+        self.followup = self.Followup(self)
+
+    async def edit_original_response(self, content):
+        self.edits += 1
+
+
+async def timed(ask, user_id, message, first_text):
+    """Reply plus the delay until its first words could be shown"""
+    start = time.perf_counter()
+    reply = await ask(user_id, message,
+                      lambda text: first_text.setdefault(user_id, time.perf_counter() - start))
+    first_text.setdefault(user_id, time.perf_counter() - start)
+    return reply
+
+
+async def measure(players, ask):
+    """
+    Run one request per player while sampling loop lag.
+
+    Returns (wall, lags, first_text) with first_text in seconds per player.
+    """
+    lags = []
+    first_text = {}
+    stop = asyncio.Event()
+
+    async def ticker():
+        while not stop.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(TICK_SECONDS)
+            lags.append(time.perf_counter() - start - TICK_SECONDS)
+
+    tick = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    replies = await asyncio.gather(*(timed(ask, f"player_{i}", "I slip into the alley.", first_text)
+                                     for i in range(players)))
+    wall = time.perf_counter() - start
+    stop.set()
+    await tick
+    assert all(reply == REPLY for reply in replies), replies
+    return wall, sorted(lags), sorted(first_text.values())
+
+
+def report(label, wall, lags, first_text, requests, players):
+    p99 = lags[min(len(lags) - 1, int(len(lags) * 0.99))]
+    print(f"  {label:22s} wall {wall:6.2f} s   loop lag p99 {p99 * 1000:7.1f} ms   "
+          f"max {lags[-1] * 1000:7.1f} ms   first text p50 {first_text[len(first_text) // 2]:5.2f} s   "
+          f"{requests / players:4.1f} requests/reply")
+
+
+def main(argv):
+    players = int(argv[0]) if argv else 8
+    latency = (int(argv[1]) if len(argv) > 1 else 100) / 1000
+
+    warnings.filterwarnings('ignore', category=DeprecationWarning)
+    mock = MockAssistants(latency)
+    base_url = start_mock_server(mock)
+    os.environ['OPENAI_API_KEY'] = 'sk-mock'
+    os.environ['OPENAI_BASE_URL'] = base_url
+    os.environ.setdefault('ASSISTANT_ID', 'asst_mock')
+
+    # The bot keeps player threads and transcripts in ./vtm_storyteller.db
+    os.chdir(tempfile.mkdtemp(prefix='bench_discord_'))
+    from migrate_database import create_player_threads, create_session_transcripts
+    create_session_transcripts()
+    create_player_threads()
+
+    from openai import OpenAI
+    import discord_bot
+
+    print(f"Players: {players}, API latency: {latency * 1000:.0f} ms, run time: {RUN_SECONDS} s")
+
+    sync_client = OpenAI(api_key='sk-mock', base_url=base_url)
+    legacy_threads = {}
+    served = mock.requests
+    results = asyncio.run(measure(
+        players, lambda *args: legacy_storyteller(sync_client, legacy_threads, *args)))
+    report('legacy sync polling', *results, mock.requests - served, players)
+
+    interactions = []
+
+    async def streamed(user_id, message, on_text):
+        interaction = FakeInteraction()
+        interactions.append(interaction)
+        reply = discord_bot.StreamingReply(interaction)
+
+        def update(text):
+            on_text(text)
+            reply.update(text)
+
+        text = await discord_bot.ask_storyteller(user_id, message, on_text=update)
+        await reply.finish(text)
+        return text
+
+    async def streamed_path():
+        discord_bot._client_openai = None
+        return await measure(players, streamed)
+
+    served = mock.requests
+    results = asyncio.run(streamed_path())
+    report('async streamed', *results, mock.requests - served, players)
+    edits = sum(interaction.edits for interaction in interactions) / players
+    print(f"  Discord edits per streamed reply: {edits:.1f} for {len(REPLY.split(' '))} deltas")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
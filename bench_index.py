@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the index page
+Compares rendering the inline HTML template per request with serving the
+pre-built static page and fingerprinted assets
+
+Usage:
+    python bench_index.py [requests]
+"""
+
+import os
+import sys
+import time
+
+from flask import Flask, render_template_string
+
+from static_assets import FINGERPRINTED_ASSETS, STATIC_DIR, build_assets
+
+
+def build_inline_page():
+    """The page as it was served before: CSS and JS inlined into one template"""
+    def read(name):
+        with open(os.path.join(STATIC_DIR, name), encoding='utf-8') as f:
+            return f.read()
+
+    page = read('index.html')
+    page = page.replace('<link rel="stylesheet" href="/assets/app.css">',
+                        f"<style>\n{read('app.css')}</style>")
+    page = page.replace('<script src="/assets/app.js"></script>',
+                        f"<script>\n{read('app.js')}</script>")
+    return page
+
+
+def cpu_per_hit(client, path, count, headers=None):
+    start = time.process_time()
+    for _ in range(count):
+        client.get(path, headers=headers).close()
+    return (time.process_time() - start) / count
+
+
+def main(argv):
+    count = int(argv[0]) if argv else 500
+    manifest = build_assets()
+
+    inline_page = build_inline_page()
+    legacy = Flask('legacy')
+
+    @legacy.route('/')
+    def legacy_index():
+        return render_template_string(inline_page)
+
+    os.environ.setdefault('OPENAI_API_KEY', 'bench')
+    import app
+
+    legacy_client = legacy.test_client()
+    client = app.app.test_client()
+    accept = {'Accept-Encoding': 'gzip, br'}
+
+    legacy_bytes = len(legacy_client.get('/').data)
+
+    first = client.get('/', headers=accept)
+    asset_urls = [f"/assets/{manifest[name]}" for name in FINGERPRINTED_ASSETS]
+    first_load = len(first.data)
+    for url in asset_urls:
+        response = client.get(url, headers=accept)
+        first_load += len(response.data)
+        response.close()
+    repeat = client.get('/', headers={**accept, 'If-None-Match': first.headers['ETag']})
+
+    before_cpu = cpu_per_hit(legacy_client, '/', count)
+    after_cpu = cpu_per_hit(client, '/', count, accept)
+
+    print(f"Requests: {count}")
+    print(f"First load bytes   before: {legacy_bytes:8d}   after: {first_load:8d} "
+          f"(page + {len(asset_urls)} assets, {first.headers.get('Content-Encoding') or 'identity'})")
+    print(f"Repeat load bytes  before: {legacy_bytes:8d}   after: {len(repeat.data):8d} "
+          f"({repeat.status_code}, assets from browser cache)")
+    print(f"Server CPU per hit before: {before_cpu * 1e3:8.3f} ms  after: {after_cpu * 1e3:8.3f} ms "
+          f"({before_cpu / after_cpu:.1f}x)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Benchmark for VTM 5e character sheet parsing
+Compares the legacy per-trait field probing with the single-pass field index
+
+Usage:
+    python bench_pdf_parser.py                    # synthetic sample sheets
+    python bench_pdf_parser.py sheet1.pdf ...     # real filled-in sheets
+"""
+
+import contextlib
+import io
+import random
+import sys
+import time
+
+from pdf_character_parser import VTMCharacterParser
+
+
+class _IndirectValue:
+    """Stand-in for a PyPDF2 IndirectObject that must be resolved"""
+
+    def __init__(self, value):
+        self._value = value
+
+    def get_object(self):
+        return self._value
+
+
+def build_sample_sheet(seed):
+    """Build a form field dictionary shaped like the official VTM 5e sheet"""
+    rng = random.Random(seed)
+    fields = {}
+
+    def text(name, value):
+        fields[name] = {'/FT': '/Tx', '/V': _IndirectValue(value) if rng.random() < 0.3 else value}
+
+    def dots(prefix, filled, total):
+        for i in range(1, total + 1):
+            value = '/Yes' if i <= filled else '/Off'
+            fields[f'{prefix}-{i}'] = {'/FT': '/Btn', '/V': _IndirectValue(value) if rng.random() < 0.3 else value}
+
+    text('Name', f'Sample Kindred {seed}')
+    text('Player', 'Bench')
+    text('Chronicle', 'Benchmark Chronicle')
+    text('Clan', rng.choice(['Brujah', 'Toreador', 'Ventrue', 'Nosferatu']))
+    text('Predator type', 'Alleycat')
+    text('Ambition', 'Take the city')
+    text('Desire', 'Be seen')
+    text('Sect', 'Anarch')
+    text('Concept', 'Street preacher')
+    text('Sire', 'Unknown')
+
+    for prefix in VTMCharacterParser.ATTRIBUTE_FIELDS.values():
+        dots(prefix, rng.randint(1, 5), 5)
+    for prefix in VTMCharacterParser.SKILL_FIELDS.values():
+        dots(prefix, rng.randint(0, 5), 5)
+    for i in range(1, 10):
+        if i <= 3:
+            text(f'Disc{i}', rng.choice(['Celerity', 'Potence', 'Presence', 'Auspex']))
+            dots(f'Disc{i}', rng.randint(1, 3), 5)
+        else:
+            text(f'Disc{i}', '')
+    for i in range(1, 10):
+        text(f'Background{i}', 'Resources' if i == 1 else '')
+        dots(f'Background{i}', rng.randint(0, 3), 5)
+    for prefix in VTMCharacterParser.TRACKER_FIELDS:
+        dots(prefix, rng.randint(1, 10), 10)
+
+    # Specialties, notes and the rest of the sheet the parser ignores
+    for i in range(200):
+        text(f'Notes{i}', '')
+
+    return fields
+
+
+def legacy_extract(parser, fields):
+    """The pre-index extraction: every trait re-probes and re-resolves its fields"""
+
+    def get_field_value(field_name):
+        try:
+            field = fields.get(field_name, {})
+            if isinstance(field, dict):
+                value = field.get('/V', '')
+                if hasattr(value, 'get_object'):
+                    value = value.get_object()
+                return str(value) if value else ''
+            return ''
+        except Exception:
+            return ''
+
+    def count_filled_checkboxes(field_prefix):
+        count = 0
+        for i in range(1, 11):
+            field_name = f"{field_prefix}-{i}"
+            if field_name in fields:
+                try:
+                    field = fields[field_name]
+                    if isinstance(field, dict):
+                        value = field.get('/V', '')
+                        if hasattr(value, 'get_object'):
+                            value = value.get_object()
+                        if value in ['/Yes', '/On', 'Yes', 'On', True, '1', 1]:
+                            count += 1
+                except Exception:
+                    continue
+        return count
+
+    data = parser.data
+    data['name'] = get_field_value('Name') or get_field_value('Character Name')
+    for key, field_name in (('player', 'Player'), ('chronicle', 'Chronicle'), ('clan', 'Clan'),
+                            ('predator_type', 'Predator type'), ('ambition', 'Ambition'),
+                            ('desire', 'Desire'), ('sect', 'Sect'), ('concept', 'Concept'),
+                            ('sire', 'Sire')):
+        data[key] = get_field_value(field_name)
+    for attr_name, field_prefix in parser.ATTRIBUTE_FIELDS.items():
+        dots = count_filled_checkboxes(field_prefix)
+        if dots > 0:
+            data['attributes'][attr_name] = dots
+    for skill_name, field_prefix in parser.SKILL_FIELDS.items():
+        dots = count_filled_checkboxes(field_prefix)
+        if dots > 0:
+            data['skills'][skill_name] = dots
+    for i in range(1, 10):
+        disc_name = get_field_value(f'Disc{i}')
+        if disc_name:
+            data['disciplines'][disc_name] = count_filled_checkboxes(f'Disc{i}')
+    for i in range(1, 10):
+        bg_name = get_field_value(f'Background{i}')
+        if bg_name:
+            data['backgrounds'][bg_name] = count_filled_checkboxes(f'Background{i}')
+    for field_prefix, key in parser.TRACKER_FIELDS.items():
+        dots = count_filled_checkboxes(field_prefix)
+        if dots > 0:
+            data[key] = dots
+
+
+def indexed_extract(parser, fields):
+    parser._extract_from_fields(fields)
+
+
+def time_extract(extract, sheets, repeats):
+    """Return (seconds per sheet, last parsed data per sheet)"""
+    results = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            results = []
+            for fields in sheets:
+                parser = VTMCharacterParser(None)
+                extract(parser, fields)
+                results.append(parser.data)
+        elapsed = time.perf_counter() - start
+    return elapsed / (repeats * len(sheets)), results
+
+
+def load_pdf_fields(paths):
+    import PyPDF2
+
+    sheets = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            fields = PyPDF2.PdfReader(f).get_fields() or {}
+        print(f"✓ {path}: {len(fields)} form fields")
+        sheets.append(fields)
+    return sheets
+
+
+def main(argv):
+    if argv:
+        sheets = load_pdf_fields(argv)
+        repeats = 200
+    else:
+        sheets = [build_sample_sheet(seed) for seed in range(20)]
+        repeats = 50
+
+    before, legacy_data = time_extract(legacy_extract, sheets, repeats)
+    after, indexed_data = time_extract(indexed_extract, sheets, repeats)
+
+    for old, new in zip(legacy_data, indexed_data):
+        old.pop('extraction_date', None)
+        new.pop('extraction_date', None)
+        if old != new:
+            print(f"✗ Parsed data differs for {old['name']!r}")
+            return 1
+
+    print(f"Sheets: {len(sheets)} x {repeats} repeats")
+    print(f"Before (per-trait probing): {before * 1e6:9.1f} µs/sheet")
+    print(f"After  (single-pass index): {after * 1e6:9.1f} µs/sheet")
+    print(f"Speedup: {before / after:.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
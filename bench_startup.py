@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for VTM Storyteller
+Measures what a gunicorn worker pays to import app.py, using python -X importtime
+
+Usage:
+    python bench_startup.py                  # report
+    python bench_startup.py --max-ms 400     # also fail if import takes longer
+    python bench_startup.py --module discord_bot
+
+Exits non-zero if the import is over budget or if a heavy library that
+should be imported on first use is loaded at import time.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+
+# Libraries that must not be loaded just by importing the web app
+DEFERRED_MODULES = ('openai', 'reportlab', 'PIL', 'PyPDF2', 'pdfplumber', 'requests')
+
+
+def run_import(module):
+    """
+    Import a module in a fresh interpreter.
+
+    Returns:
+        tuple: ({module: (self_us, cumulative_us)}, list of deferred modules loaded)
+    """
+    code = (
+        f"import sys, {module}\n"
+        f"print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    )
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+
+    timings = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+
+    loaded = [m for m in proc.stdout.strip().split(',') if m]
+    return timings, loaded
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--module', default='app')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--max-ms', type=float, default=None,
+                        help='fail if the median import time exceeds this')
+    args = parser.parse_args(argv)
+
+    totals = []
+    timings = {}
+    loaded = []
+    for _ in range(args.runs):
+        timings, loaded = run_import(args.module)
+        totals.append(timings[args.module][1] / 1000)
+
+    median_ms = statistics.median(totals)
+    print(f"import {args.module}: median {median_ms:.1f} ms over {args.runs} runs "
+          f"(min {min(totals):.1f}, max {max(totals):.1f})")
+
+    print(f"\nSlowest {args.top} modules by cumulative time (last run):")
+    slowest = sorted(timings.items(), key=lambda item: item[1][1], reverse=True)
+    for name, (self_us, cumulative_us) in slowest[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {self_us / 1000:7.1f} ms self  {name}")
+
+    status = 0
+    if loaded:
+        print(f"\n✗ Loaded at import time, should be deferred: {', '.join(loaded)}")
+        status = 1
+    else:
+        print(f"\n✓ None of {', '.join(DEFERRED_MODULES)} loaded at import")
+
+    if args.max_ms is not None and median_ms > args.max_ms:
+        print(f"✗ Import time {median_ms:.1f} ms is over the {args.max_ms:g} ms budget")
+        status = 1
+
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
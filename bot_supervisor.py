@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Discord Bot Supervisor for VTM Storyteller
+Runs the Discord bot as one or more shard processes (the Procfile bot: line)
+
+The shard count comes from BOT_SHARD_COUNT or, if unset, from Discord's
+recommendation for the token. Shards are split round-robin across
+BOT_PROCESSES processes (default 1). Each process runs discord_bot.py as
+an AutoShardedBot over its shards. Player threads, transcripts and shard
+metrics live in the shared SQLite database, so any process can serve any
+player. Processes are started IDENTIFY_INTERVAL apart per shard to stay
+inside Discord's identify limit. A process that crashes is restarted
+with backoff. SIGTERM stops them all.
+
+Usage:
+    python bot_supervisor.py
+"""
+
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+from migrate_database import create_bot_shards, create_player_threads, create_session_transcripts
+
+
+DISCORD_API = 'https://discord.com/api/v10'
+# Discord allows max_concurrency identifies per 5 seconds
+IDENTIFY_INTERVAL = 5.0
+# A process that ran this long before exiting starts over at the shortest backoff
+HEALTHY_RUNTIME = 60
+MAX_BACKOFF = 60
+
+
+def recommended_shards(token):
+    """
+    Discord's recommended shard count and identify concurrency for a token.
+
+    Returns:
+        (shards, max_concurrency)
+    """
+    request = urllib.request.Request(f'{DISCORD_API}/gateway/bot', headers={
+        'Authorization': f'Bot {token}',
+        'User-Agent': 'DiscordBot (vtm-storyteller, 1.0)'
+    })
+    with urllib.request.urlopen(request, timeout=10) as response:
+        data = json.load(response)
+    return data['shards'], data.get('session_start_limit', {}).get('max_concurrency', 1)
+
+
+def plan_processes(shard_count, processes):
+    """Shard ids for each process, round-robin; never more processes than shards"""
+    processes = max(1, min(processes, shard_count))
+    return [list(range(index, shard_count, processes)) for index in range(processes)]
+
+
+class BotProcess:
+    """One discord_bot.py child running a fixed set of shards"""
+
+    def __init__(self, shard_ids, shard_count):
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.process = None
+        self.started_at = 0.0
+        self.failures = 0
+        self.restart_at = None
+
+    def start(self):
+        env = dict(os.environ,
+                   BOT_SHARD_COUNT=str(self.shard_count),
+                   BOT_SHARD_IDS=','.join(str(shard_id) for shard_id in self.shard_ids))
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'discord_bot.py')
+        self.process = subprocess.Popen([sys.executable, script], env=env)
+        self.started_at = time.monotonic()
+        self.restart_at = None
+        print(f"✓ Started bot process {self.process.pid} for shards {self.shard_ids}")
+
+    def check(self):
+        """
+        Handle an exited child. Returns False once it has stopped for good
+        (a clean exit), True while it's running or waiting to restart.
+        """
+        if self.restart_at is not None:
+            if time.monotonic() >= self.restart_at:
+                self.start()
+            return True
+        code = self.process.poll()
+        if code is None:
+            return True
+        if code == 0:
+            print(f"✓ Bot process for shards {self.shard_ids} exited")
+            return False
+
+        if time.monotonic() - self.started_at >= HEALTHY_RUNTIME:
+            self.failures = 0
+        self.failures += 1
+        delay = min(MAX_BACKOFF, 2 ** self.failures)
+        print(f"⚠️ Bot process for shards {self.shard_ids} exited with {code}; restarting in {delay}s")
+        self.restart_at = time.monotonic() + delay
+        return True
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+
+
+def main():
+    token = os.getenv('DISCORD_BOT_TOKEN')
+    if not token:
+        print("ERROR: DISCORD_BOT_TOKEN not set!")
+        return 1
+
+    # Shared tables, created once before any shard process starts
+    create_session_transcripts()
+    create_player_threads()
+    create_bot_shards()
+
+    max_concurrency = 1
+    if os.getenv('BOT_SHARD_COUNT'):
+        shard_count = int(os.environ['BOT_SHARD_COUNT'])
+    else:
+        shard_count, max_concurrency = recommended_shards(token)
+    plan = plan_processes(shard_count, int(os.getenv('BOT_PROCESSES', '1')))
+    print(f"✓ Running {shard_count} shard(s) in {len(plan)} process(es)")
+
+    children = [BotProcess(shard_ids, shard_count) for shard_ids in plan]
+    stopping = []
+
+    def stop(signum, frame):
+        stopping.append(signum)
+        for child in children:
+            child.stop()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for child in children:
+        if stopping:
+            break
+        child.start()
+        time.sleep(IDENTIFY_INTERVAL * len(child.shard_ids) / max_concurrency)
+
+    while not stopping and children:
+        children = [child for child in children if child.check()]
+        time.sleep(1)
+
+    for child in children:
+        if child.process:
+            child.process.wait()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
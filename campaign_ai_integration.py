@@ -30,6 +30,22 @@ class CampaignAIIntegration:
             'saved_count': len(saved_items)
         }
     
+    def process_generated(self, records: list, campaign_id: int = None) -> dict:
+        """
+        Save NPCs, locations and items the AI returned as structured
+        (kind, data) records instead of scanning the response text
+        """
+        saved_items = []
+        for kind, data in records:
+            saved = self.auto_save.save_generated(kind, data, campaign_id)
+            if saved:
+                saved_items.append(saved)
+        
+        return {
+            'saved_items': saved_items,
+            'saved_count': len(saved_items)
+        }
+    
     def detect_mentions(self, user_message: str) -> dict:
         """
         Detect mentions of NPCs, Locations, or Items in user message
@@ -211,7 +227,8 @@ def integrate_with_chat_endpoint(user_message: str, campaign_id: int = None,
                                  db_path: str = 'campaign_data.db') -> dict:
     """
     Main integration function to be called from chat endpoint
-    Returns dict with context to add to AI prompt and callback for processing response
+    Returns dict with context to add to AI prompt and callbacks for processing the
+    response text or its structured records
     """
     integration = CampaignAIIntegration(db_path)
     
@@ -221,7 +238,8 @@ def integrate_with_chat_endpoint(user_message: str, campaign_id: int = None,
     # Return context and a callback function
     return {
         'additional_context': additional_context,
-        'process_response': lambda ai_response: integration.process_ai_response(ai_response, campaign_id)
+        'process_response': lambda ai_response: integration.process_ai_response(ai_response, campaign_id),
+        'save_generated': lambda records: integration.process_generated(records, campaign_id)
     }
 
 if __name__ == "__main__":
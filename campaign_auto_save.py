@@ -455,6 +455,41 @@ class CampaignAutoSave:
         print(f"✅ Item '{item_data['name']}' saved to database (ID: {item_id})")
         return item_id
     
+    def save_generated(self, kind, data, campaign_id=None):
+        """
+        Save an NPC, location or item the AI returned as a structured record
+        (the arguments of a create_npc/create_location/create_item call).
+        Returns (type label, name, id), or None if the record has no name.
+        """
+        name = (data.get('name') or '').strip()
+        if not name:
+            return None
+        record = dict(data, name=name, origin_campaign_id=campaign_id, created_by='AI')
+        record['tags'] = list(data.get('tags') or [])
+
+        if kind == 'npc':
+            record['attributes'] = {attr.lower(): int(value) for attr, value in (data.get('attributes') or {}).items()}
+            for tag in (record.get('clan'), record.get('faction'), record.get('primary_location')):
+                if tag and tag not in record['tags']:
+                    record['tags'].append(tag)
+            return ('NPC', name, self.save_npc(record))
+
+        if kind == 'location':
+            # Stored as lists of descriptions, like the text parser produces
+            for field in ('security_measures', 'supernatural_elements'):
+                record[field] = [{'description': data[field]}] if data.get(field) else []
+            for tag in (record.get('city'), record.get('type'), record.get('controlled_by')):
+                if tag and tag not in record['tags']:
+                    record['tags'].append(tag)
+            return ('Location', name, self.save_location(record))
+
+        if kind == 'item':
+            if record.get('type') and record['type'] not in record['tags']:
+                record['tags'].append(record['type'])
+            return ('Item', name, self.save_item(record))
+
+        raise ValueError(f"Unknown campaign record kind: {kind}")
+
     def auto_detect_and_save(self, ai_response_text, campaign_id=None):
         """Automatically detect type of content and save to database"""
         saved_items = []
@@ -8,6 +8,8 @@ import json
 from datetime import datetime
 from flask import jsonify, request, session
 
+from session_transcript import get_latest_summary
+
 # Database connection helper
 def get_db_connection():
     conn = sqlite3.connect('vtm_storyteller.db')
@@ -199,8 +201,104 @@ def end_session():
     
     return jsonify(dict(updated_session))
 
+# Tables scanned for a session summary: (response key, table)
+SESSION_ACTIVITY_SOURCES = (
+    ('events', 'campaign_events'),
+    ('npcs_created', 'campaign_npcs'),
+    ('locations_created', 'campaign_locations'),
+    ('items_created', 'campaign_items'),
+)
+
+SESSION_SUMMARY_PAGE_SIZE = 100
+SESSION_SUMMARY_MAX_PAGE_SIZE = 500
+
+# UNION ALL query built from the live table columns, once per process
+_session_activity_sql = None
+
+def _build_session_activity_sql(conn):
+    """
+    One query over every SESSION_ACTIVITY_SOURCES table. Each branch is a
+    range scan on its (campaign_id, created_at) index and packs the row into
+    JSON, so tables with different columns can share one result set. The
+    page comes first (part 0), then one row per kind with its total over
+    the whole session (part 1), so the totals don't depend on which kinds
+    the page happens to contain.
+    """
+    branches = []
+    for key, table in SESSION_ACTIVITY_SOURCES:
+        columns = [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+        if 'campaign_id' not in columns or 'created_at' not in columns:
+            continue
+        packed = ', '.join(f"'{column}', {column}" for column in columns)
+        branches.append(f'''
+            SELECT '{key}' AS kind, created_at, rowid AS row_id, json_object({packed}) AS data
+            FROM {table}
+            WHERE campaign_id = :campaign_id AND created_at BETWEEN :start AND :end''')
+    if not branches:
+        branches.append('SELECT NULL AS kind, NULL AS created_at, NULL AS row_id, NULL AS data WHERE 0')
+
+    return f'''
+        WITH activity AS ({' UNION ALL '.join(branches)}),
+        page AS (
+            SELECT kind, created_at, row_id, data FROM activity
+            ORDER BY created_at, kind, row_id
+            LIMIT :limit OFFSET :offset
+        )
+        SELECT 0 AS part, kind, created_at, row_id, data, NULL AS total FROM page
+        UNION ALL
+        SELECT 1, kind, NULL, NULL, NULL, COUNT(*) FROM activity GROUP BY kind
+        ORDER BY part, created_at, kind, row_id
+    '''
+
+def fetch_session_activity(conn, session_data, limit=-1, offset=0):
+    """
+    Events, NPCs, locations and items created during a session.
+    
+    Args:
+        conn: sqlite3 connection
+        session_data: campaign_sessions row
+        limit: rows to return across all kinds, in creation order (-1: all)
+        offset: rows to skip
+    
+    Returns:
+        tuple: ({key: [row dicts]}, {key: total rows for the session})
+    """
+    global _session_activity_sql
+    if _session_activity_sql is None:
+        _session_activity_sql = _build_session_activity_sql(conn)
+    
+    params = {
+        'campaign_id': session_data['campaign_id'],
+        'start': session_data['start_time'],
+        'end': session_data['end_time'] or datetime.now(),
+        'limit': limit,
+        'offset': offset
+    }
+    
+    activity = {key: [] for key, _ in SESSION_ACTIVITY_SOURCES}
+    totals = dict.fromkeys(activity, 0)
+    for part, kind, _, _, data, total in conn.execute(_session_activity_sql, params):
+        if part == 0:
+            activity[kind].append(json.loads(data))
+        else:
+            totals[kind] = total
+    
+    return activity, totals
+
 def get_session_summary(session_id):
-    """Get summary of a session"""
+    """
+    Get summary of a session
+    
+    Query params:
+        limit: rows per page across all kinds (default 100, max 500)
+        offset: rows to skip
+    """
+    try:
+        limit = min(max(int(request.args.get('limit', SESSION_SUMMARY_PAGE_SIZE)), 1), SESSION_SUMMARY_MAX_PAGE_SIZE)
+        offset = max(int(request.args.get('offset', 0)), 0)
+    except ValueError:
+        return jsonify({'error': 'limit and offset must be integers'}), 400
+    
     conn = get_db_connection()
     
     # Get session info
@@ -210,39 +308,20 @@ def get_session_summary(session_id):
         conn.close()
         return jsonify({'error': 'Session not found'}), 404
     
-    # Get events from this session
-    events = conn.execute('''
-        SELECT * FROM campaign_events
-        WHERE campaign_id = ? AND created_at BETWEEN ? AND ?
-        ORDER BY created_at
-    ''', (session_data['campaign_id'], session_data['start_time'], session_data['end_time'] or datetime.now())).fetchall()
-    
-    # Get NPCs created/modified in this session
-    npcs = conn.execute('''
-        SELECT * FROM campaign_npcs
-        WHERE campaign_id = ? AND created_at BETWEEN ? AND ?
-    ''', (session_data['campaign_id'], session_data['start_time'], session_data['end_time'] or datetime.now())).fetchall()
-    
-    # Get locations created/modified in this session
-    locations = conn.execute('''
-        SELECT * FROM campaign_locations
-        WHERE campaign_id = ? AND created_at BETWEEN ? AND ?
-    ''', (session_data['campaign_id'], session_data['start_time'], session_data['end_time'] or datetime.now())).fetchall()
-    
-    # Get items created/modified in this session
-    items = conn.execute('''
-        SELECT * FROM campaign_items
-        WHERE campaign_id = ? AND created_at BETWEEN ? AND ?
-    ''', (session_data['campaign_id'], session_data['start_time'], session_data['end_time'] or datetime.now())).fetchall()
-    
+    activity, totals = fetch_session_activity(conn, session_data, limit, offset)
     conn.close()
     
+    total = sum(totals.values())
     return jsonify({
         'session': dict(session_data),
-        'events': [dict(e) for e in events],
-        'npcs_created': [dict(n) for n in npcs],
-        'locations_created': [dict(l) for l in locations],
-        'items_created': [dict(i) for i in items]
+        'story_so_far': get_latest_summary(session_id),
+        **activity,
+        'totals': totals,
+        'pagination': {
+            'limit': limit,
+            'offset': offset,
+            'next_offset': offset + limit if total > offset + limit else None
+        }
     })
 
 def get_campaign_sessions(campaign_id):
@@ -252,7 +331,7 @@ def get_campaign_sessions(campaign_id):
         SELECT * FROM campaign_sessions
         WHERE campaign_id = ?
         ORDER BY session_number DESC
-    ''').fetchall()
+    ''', (campaign_id,)).fetchall()
     conn.close()
     
     return jsonify([dict(s) for s in sessions])
@@ -378,6 +457,5 @@ def create_campaign_sessions_table():
     conn.commit()
     conn.close()
 
-# Initialize sessions table on module load
-create_campaign_sessions_table()
+# The sessions table is created by migrate_database.py (run_migrations)
 
@@ -0,0 +1,149 @@
+"""
+Active Character Cache for VTM Storyteller
+Keeps decoded character records in memory so chat turns and rolls skip SQL
+
+Entries are keyed by character id and a version that every write path
+bumps through invalidate() (write-through). Writes made by another process
+(a second gunicorn worker, the Discord bot) are picked up through the
+characters table version counter, checked at most every revalidate_after
+seconds.
+"""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from character_model import fetch_character
+
+
+class CharacterStateCache:
+    """
+    Decoded Character records and each user's active character id.
+
+    Records are shared between callers and must be treated as read-only;
+    write to the database and call invalidate() instead.
+    """
+
+    def __init__(self, db_path='vtm_storyteller.db', max_entries=512, revalidate_after=5.0):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.revalidate_after = revalidate_after
+        self._lock = threading.Lock()
+        # character_id -> [version, record, table_version, checked_at]
+        self._entries = OrderedDict()
+        # character_id -> local write counter
+        self._versions = {}
+        # user_id -> [character_id, table_version, checked_at]
+        self._active = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _table_version(conn):
+        try:
+            row = conn.execute("SELECT version FROM table_versions WHERE table_name = 'characters'").fetchone()
+        except sqlite3.OperationalError:
+            return None
+        return row[0] if row else None
+
+    def _still_valid(self, entry, table_version_index, checked_index):
+        """True if an entry may be served; may run one version query"""
+        now = time.monotonic()
+        if now - entry[checked_index] < self.revalidate_after:
+            return True
+        conn = sqlite3.connect(self.db_path)
+        try:
+            table_version = self._table_version(conn)
+        finally:
+            conn.close()
+        if table_version is not None and table_version == entry[table_version_index]:
+            entry[checked_index] = now
+            return True
+        return False
+
+    def get(self, character_id):
+        """Character record for an id, or None if it doesn't exist"""
+        with self._lock:
+            entry = self._entries.get(character_id)
+            version = self._versions.get(character_id, 0)
+            if entry and entry[0] == version and self._still_valid(entry, 2, 3):
+                self._entries.move_to_end(character_id)
+                self.hits += 1
+                return entry[1]
+
+        self.misses += 1
+        conn = sqlite3.connect(self.db_path)
+        try:
+            table_version = self._table_version(conn)
+            record = fetch_character(conn, character_id)
+        finally:
+            conn.close()
+
+        if record is not None:
+            with self._lock:
+                # Stored under the version seen before the read, so a write
+                # that lands during the read forces the next get() to reload
+                self._entries[character_id] = [version, record, table_version, time.monotonic()]
+                self._entries.move_to_end(character_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return record
+
+    def get_active_id(self, user_id):
+        """Most recently played character id for a user, or None"""
+        with self._lock:
+            entry = self._active.get(user_id)
+            if entry and self._still_valid(entry, 1, 2):
+                self.hits += 1
+                return entry[0]
+
+        self.misses += 1
+        conn = sqlite3.connect(self.db_path)
+        try:
+            table_version = self._table_version(conn)
+            row = conn.execute('''
+            SELECT id FROM characters
+            WHERE user_id = ?
+            ORDER BY last_played DESC, updated_at DESC
+            LIMIT 1
+            ''', (user_id,)).fetchone()
+        finally:
+            conn.close()
+
+        character_id = row[0] if row else None
+        with self._lock:
+            self._active[user_id] = [character_id, table_version, time.monotonic()]
+        return character_id
+
+    def get_active(self, user_id):
+        """Active Character record for a user, or None"""
+        character_id = self.get_active_id(user_id)
+        return self.get(character_id) if character_id else None
+
+    def invalidate(self, character_id=None):
+        """
+        Drop a character after a write (all characters if no id is given).
+        Active-character lookups are dropped too, since last_played may
+        have changed.
+        """
+        with self._lock:
+            if character_id is None:
+                self._entries.clear()
+                self._versions.clear()
+            else:
+                self._versions[character_id] = self._versions.get(character_id, 0) + 1
+                self._entries.pop(character_id, None)
+            self._active.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else None
+        }
+
+
+character_cache = CharacterStateCache()
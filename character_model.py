@@ -0,0 +1,257 @@
+"""
+Character Model for VTM Storyteller
+One definition of the characters table and one way to read rows from it
+
+CHARACTER_COLUMNS is the schema; init_db, migrate_database and the PDF
+upload handler create or extend the table from it. Rows become Character
+records through a column map compiled once per distinct SELECT shape, and
+JSON columns are only parsed when first read.
+"""
+
+import json
+from operator import attrgetter
+
+
+# (column, type) in table order; JSON_COLUMNS hold JSON text
+CHARACTER_COLUMNS = (
+    ('id', 'INTEGER PRIMARY KEY AUTOINCREMENT'),
+    ('user_id', 'TEXT'),
+    ('name', 'TEXT NOT NULL'),
+    ('concept', 'TEXT'),
+    ('chronicle_id', 'INTEGER'),
+    ('clan', 'TEXT'),
+    ('predator_type', 'TEXT'),
+    ('generation', 'INTEGER DEFAULT 13'),
+    ('sire', 'TEXT'),
+    ('ambition', 'TEXT'),
+    ('desire', 'TEXT'),
+    ('sect', 'TEXT'),
+    ('rank_title', 'TEXT'),
+    ('attributes', 'TEXT'),
+    ('skills', 'TEXT'),
+    ('disciplines', 'TEXT'),
+    ('backgrounds', 'TEXT'),
+    ('health', 'INTEGER DEFAULT 10'),
+    ('willpower', 'INTEGER DEFAULT 5'),
+    ('health_max', 'INTEGER DEFAULT 3'),
+    ('willpower_max', 'INTEGER DEFAULT 3'),
+    ('health_damage', 'INTEGER DEFAULT 0'),
+    ('willpower_damage', 'INTEGER DEFAULT 0'),
+    ('humanity', 'INTEGER DEFAULT 7'),
+    ('humanity_stains', 'INTEGER DEFAULT 0'),
+    ('hunger', 'INTEGER DEFAULT 1'),
+    ('resonance', 'TEXT'),
+    ('blood_potency', 'INTEGER DEFAULT 0'),
+    ('blood_surge', 'TEXT'),
+    ('power_bonus', 'TEXT'),
+    ('mend_amount', 'TEXT'),
+    ('rouse_reroll', 'TEXT'),
+    ('bane_severity', 'TEXT'),
+    ('clan_bane', 'TEXT'),
+    ('clan_compulsion', 'TEXT'),
+    ('experience', 'INTEGER DEFAULT 0'),
+    ('total_experience', 'INTEGER DEFAULT 0'),
+    ('portrait_path', 'TEXT'),
+    ('demiplane_url', 'TEXT'),
+    ('roll20_character_id', 'TEXT'),
+    ('pdf_path', 'TEXT'),
+    ('pdf_upload_date', 'TIMESTAMP'),
+    ('pdf_hash', 'TEXT'),
+    ('last_played', 'TIMESTAMP'),
+    ('created_at', 'TIMESTAMP DEFAULT CURRENT_TIMESTAMP'),
+    ('updated_at', 'TIMESTAMP DEFAULT CURRENT_TIMESTAMP')
+)
+
+COLUMN_NAMES = tuple(name for name, _ in CHARACTER_COLUMNS)
+JSON_COLUMNS = ('attributes', 'skills', 'disciplines', 'backgrounds')
+
+# Fields returned by the character API endpoints
+API_FIELDS = (
+    'id', 'name', 'clan', 'concept', 'chronicle_id', 'user_id',
+    'generation', 'sire', 'predator_type', 'ambition', 'desire',
+    'attributes', 'skills', 'disciplines', 'backgrounds',
+    'health', 'willpower', 'humanity', 'hunger', 'experience',
+    'created_at', 'updated_at'
+)
+
+
+def create_table_sql(if_not_exists=True):
+    """CREATE TABLE statement for the characters table"""
+    columns = ',\n    '.join(f"{name} {sql_type}" for name, sql_type in CHARACTER_COLUMNS)
+    guard = 'IF NOT EXISTS ' if if_not_exists else ''
+    return f"CREATE TABLE {guard}characters (\n    {columns}\n)"
+
+
+def _add_column_type(sql_type):
+    """
+    Column type usable in ALTER TABLE ADD COLUMN, which rejects NOT NULL
+    without a default and non-constant defaults such as CURRENT_TIMESTAMP.
+    """
+    sql_type = sql_type.replace(' NOT NULL', '')
+    if 'CURRENT_TIMESTAMP' in sql_type:
+        sql_type = sql_type.split(' DEFAULT ')[0]
+    return sql_type
+
+
+def ensure_character_columns(conn):
+    """
+    Add any CHARACTER_COLUMNS missing from an existing characters table.
+
+    Returns:
+        list: names of the columns added
+    """
+    existing = {row[1] for row in conn.execute('PRAGMA table_info(characters)')}
+    added = []
+    for name, sql_type in CHARACTER_COLUMNS:
+        if name not in existing:
+            conn.execute(f"ALTER TABLE characters ADD COLUMN {name} {_add_column_type(sql_type)}")
+            added.append(name)
+    conn.commit()
+    return added
+
+
+_decode = json.JSONDecoder().decode
+
+
+class JSONColumn:
+    """
+    Descriptor over a slot holding a JSON column's text. The text is parsed
+    on first read and the parsed value replaces it in the slot.
+    """
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        slot = owner.__dict__[f'_{name}']
+        self._read = slot.__get__
+        self._write = slot.__set__
+
+    def __get__(self, record, owner=None):
+        if record is None:
+            return self
+        value = self._read(record)
+        if value is None or value.__class__ is str:
+            value = _decode(value) if value else {}
+            self._write(record, value)
+        return value
+
+    def __set__(self, record, value):
+        self._write(record, value)
+
+
+class Character:
+    """
+    One characters row.
+
+    Scalar columns are plain slots. JSON columns are JSONColumn descriptors
+    over '_<column>' slots, so a record that is never asked for its skills
+    never parses them. Columns the query didn't select read as None.
+    """
+
+    __slots__ = tuple(f'_{name}' if name in JSON_COLUMNS else name for name in COLUMN_NAMES)
+
+    attributes = JSONColumn()
+    skills = JSONColumn()
+    disciplines = JSONColumn()
+    backgrounds = JSONColumn()
+
+    def get(self, name, default=None):
+        """dict-style access, for code that handles characters as mappings"""
+        if name not in _SLOT_FOR_COLUMN:
+            return default
+        value = getattr(self, name)
+        return default if value is None else value
+
+    def __getitem__(self, name):
+        if name not in _SLOT_FOR_COLUMN:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def __contains__(self, name):
+        return name in _SLOT_FOR_COLUMN
+
+    def to_dict(self, fields=API_FIELDS):
+        """Plain dict of the given fields, JSON columns decoded"""
+        if fields.__class__ is not tuple:
+            fields = tuple(fields)
+        getter = _FIELD_GETTERS.get(fields)
+        if getter is None:
+            getter = _FIELD_GETTERS[fields] = _compile_getter(fields)
+        return dict(zip(fields, getter(self)))
+
+    def __repr__(self):
+        return f"<Character {self.id} {self.name!r}>"
+
+
+# Column -> slot the raw value is stored in
+_SLOT_FOR_COLUMN = {name: (f'_{name}' if name in JSON_COLUMNS else name) for name in COLUMN_NAMES}
+
+# Compiled loaders, keyed by the column names of a query's result
+_LOADERS = {}
+
+# Compiled field readers for to_dict, keyed by the fields tuple
+_FIELD_GETTERS = {}
+
+
+def _compile_getter(fields):
+    fields = tuple(fields)
+    if len(fields) == 1:
+        getter = attrgetter(fields[0])
+        return lambda record: (getter(record),)
+    return attrgetter(*fields)
+
+
+def _compile_loader(column_names):
+    """
+    Build a row -> Character function for one result shape.
+
+    The function is generated as straight-line slot assignments: known
+    columns are copied by position, columns the query didn't select are
+    set to None, and unknown columns are ignored.
+    """
+    positions = {name: i for i, name in enumerate(column_names)}
+    lines = ['def load(row):', '    record = new(Character)']
+    for name in COLUMN_NAMES:
+        value = f'row[{positions[name]}]' if name in positions else 'None'
+        lines.append(f'    record.{_SLOT_FOR_COLUMN[name]} = {value}')
+    lines.append('    return record')
+
+    namespace = {'new': Character.__new__, 'Character': Character}
+    exec('\n'.join(lines), namespace)
+    return namespace['load']
+
+
+def loader_for(cursor):
+    """Compiled loader for the result shape of an executed cursor"""
+    column_names = tuple(column[0] for column in cursor.description)
+    load = _LOADERS.get(column_names)
+    if load is None:
+        load = _LOADERS[column_names] = _compile_loader(column_names)
+    return load
+
+
+def fetch_characters(conn, where='1', params=(), columns=None, order_by='id', limit=None):
+    """
+    Load Character records.
+
+    Args:
+        conn: sqlite3 connection (any row_factory)
+        where: SQL condition with ? placeholders
+        params: values for the placeholders
+        columns: column names to select (default: every column)
+        order_by: ORDER BY clause
+        limit: optional LIMIT
+    """
+    select = ', '.join(columns) if columns else '*'
+    sql = f'SELECT {select} FROM characters WHERE {where} ORDER BY {order_by}'
+    if limit is not None:
+        sql += ' LIMIT ?'
+        params = (*params, limit)
+    cursor = conn.execute(sql, params)
+    load = loader_for(cursor)
+    return [load(row) for row in cursor.fetchall()]
+
+
+def fetch_character(conn, character_id, columns=None):
+    """Load one Character by id, or None"""
+    characters = fetch_characters(conn, 'id = ?', (character_id,), columns, limit=1)
+    return characters[0] if characters else None
@@ -0,0 +1,287 @@
+"""
+Character Sheet PDF Renderer for VTM Storyteller
+Builds reportlab styles once and caches rendered sheets per character
+"""
+
+import io
+import os
+import time
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax.saxutils import escape
+
+from werkzeug.utils import secure_filename
+
+from portrait_variants import get_variant
+
+
+# ==================== TEMPLATES (built once) ====================
+
+# reportlab is imported and the styles built on the first render, so the
+# web app can import this module (for the cache) without loading reportlab.
+_templates = None
+
+
+def _get_templates():
+    global _templates
+    if _templates is not None:
+        return _templates
+
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.platypus import TableStyle
+
+    _templates = {
+        'title': ParagraphStyle(
+            'CustomTitle',
+            parent=getSampleStyleSheet()['Heading1'],
+            fontSize=24,
+            textColor=colors.HexColor('#8B0000'),
+            spaceAfter=30,
+            alignment=TA_CENTER
+        ),
+        # Label column on the left (basic info, stats)
+        'label_table': TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#2a0000')),
+            ('TEXTCOLOR', (0, 0), (0, -1), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]),
+        # Header row on top (attributes)
+        'header_table': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#8B0000')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ])
+    }
+    return _templates
+
+# Character fields the sheet is rendered from; also the cache key
+SHEET_FIELDS = (
+    'name', 'concept', 'clan', 'predator_type', 'generation', 'attributes',
+    'health', 'willpower', 'humanity', 'hunger', 'blood_potency',
+    'experience', 'total_experience', 'portrait_path', 'updated_at', 'chronicle_name'
+)
+
+# Longest portrait edge on the sheet, in points
+PORTRAIT_SIZE = 1.5 * 72
+
+
+def _dots(value, total):
+    value = max(0, min(int(value or 0), total))
+    return '●' * value + '○' * (total - value)
+
+
+def _portrait_element(character):
+    """Small JPEG portrait variant, or None when there is no usable portrait"""
+    portrait_path = character.get('portrait_path')
+    if not portrait_path or not os.path.exists(portrait_path):
+        return None
+    try:
+        path = get_variant(portrait_path, 'small', 'jpeg')
+    except ValueError:
+        return None
+
+    from reportlab.platypus import Image
+
+    return Image(path, width=PORTRAIT_SIZE, height=PORTRAIT_SIZE, kind='proportional')
+
+
+def build_sheet_elements(character):
+    """Build the flowables for one character sheet"""
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, Spacer, Table
+
+    templates = _get_templates()
+    elements = []
+
+    # Title
+    elements.append(Paragraph(f"🧛 {escape(character.get('name') or '')}", templates['title']))
+    elements.append(Spacer(1, 0.2*inch))
+
+    # Portrait
+    portrait = _portrait_element(character)
+    if portrait is not None:
+        elements.append(portrait)
+        elements.append(Spacer(1, 0.2*inch))
+
+    # Basic Info
+    info_data = [
+        ['Concept:', character.get('concept') or 'N/A'],
+        ['Clan:', character.get('clan') or 'N/A'],
+        ['Predator Type:', character.get('predator_type') or 'N/A'],
+        ['Generation:', str(character.get('generation'))],
+        ['Chronicle:', character.get('chronicle_name') or 'N/A'],
+    ]
+
+    info_table = Table(info_data, colWidths=[2*inch, 4*inch])
+    info_table.setStyle(templates['label_table'])
+    elements.append(info_table)
+    elements.append(Spacer(1, 0.3*inch))
+
+    # Attributes
+    attr_data = [['ATTRIBUTES', 'Value']]
+    for attr, value in (character.get('attributes') or {}).items():
+        attr_data.append([attr.capitalize(), _dots(value, 5)])
+
+    attr_table = Table(attr_data, colWidths=[3*inch, 3*inch])
+    attr_table.setStyle(templates['header_table'])
+    elements.append(attr_table)
+    elements.append(Spacer(1, 0.3*inch))
+
+    # Stats
+    stats_data = [
+        ['Health:', _dots(character.get('health'), 10)],
+        ['Willpower:', _dots(character.get('willpower'), 10)],
+        ['Humanity:', _dots(character.get('humanity'), 10)],
+        ['Hunger:', _dots(character.get('hunger'), 5)],
+        ['Blood Potency:', str(character.get('blood_potency') or 0)],
+        ['Experience:', f"{character.get('experience') or 0} / {character.get('total_experience') or 0} total"],
+    ]
+
+    stats_table = Table(stats_data, colWidths=[2*inch, 4*inch])
+    stats_table.setStyle(templates['label_table'])
+    elements.append(stats_table)
+
+    return elements
+
+
+def sheet_record(character, chronicle_name=None):
+    """The sheet's inputs for a Character, plus the name of its chronicle"""
+    record = {field: character.get(field) for field in ('id',) + SHEET_FIELDS}
+    record['chronicle_name'] = chronicle_name
+    return record
+
+
+def render_character_pdf(character):
+    """Render one character sheet and return the PDF bytes"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate
+
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    doc.build(build_sheet_elements(character))
+    return buffer.getvalue()
+
+
+def _timed_render(character):
+    start = time.perf_counter()
+    pdf_bytes = render_character_pdf(character)
+    return pdf_bytes, time.perf_counter() - start
+
+
+# ==================== CACHE ====================
+
+class CharacterPDFCache:
+    """
+    Rendered sheets per character, keyed by the sheet's inputs.
+
+    The key includes updated_at and every rendered field, so a write in
+    another worker that doesn't bump updated_at (XP, for instance) still
+    misses the cache. invalidate() drops an entry as soon as this worker
+    updates the character.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def cache_key(character):
+        return tuple(repr(character.get(field)) for field in SHEET_FIELDS)
+
+    def get(self, character):
+        entry = self._entries.get(character['id'])
+        if entry and entry[0] == self.cache_key(character):
+            self._entries.move_to_end(character['id'])
+            return entry[1]
+        return None
+
+    def put(self, character, pdf_bytes):
+        self._entries[character['id']] = (self.cache_key(character), pdf_bytes)
+        self._entries.move_to_end(character['id'])
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, character_id):
+        self._entries.pop(character_id, None)
+
+
+sheet_pdf_cache = CharacterPDFCache()
+
+
+def get_character_pdf(character):
+    """
+    Return (pdf_bytes, render_seconds) for a character, using the cache.
+    render_seconds is None on a cache hit.
+    """
+    pdf_bytes = sheet_pdf_cache.get(character)
+    if pdf_bytes is not None:
+        return pdf_bytes, None
+
+    pdf_bytes, seconds = _timed_render(character)
+    sheet_pdf_cache.put(character, pdf_bytes)
+    return pdf_bytes, seconds
+
+
+def render_chronicle_sheets(characters, max_workers=None):
+    """
+    Render every sheet in a chronicle, rendering cache misses in a process pool.
+
+    Returns:
+        list: (character, pdf_bytes, render_seconds or None if cached)
+    """
+    results = {}
+    misses = []
+    for character in characters:
+        pdf_bytes = sheet_pdf_cache.get(character)
+        if pdf_bytes is not None:
+            results[character['id']] = (pdf_bytes, None)
+        else:
+            misses.append(character)
+
+    if len(misses) == 1:
+        results[misses[0]['id']] = _timed_render(misses[0])
+    elif misses:
+        workers = min(len(misses), max_workers or os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for character, rendered in zip(misses, pool.map(_timed_render, misses)):
+                results[character['id']] = rendered
+
+    for character in misses:
+        sheet_pdf_cache.put(character, results[character['id']][0])
+
+    return [(character, *results[character['id']]) for character in characters]
+
+
+def bundle_zip(rendered):
+    """Pack rendered sheets into one zip archive"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for character, pdf_bytes, _ in rendered:
+            name = secure_filename(character.get('name') or '') or 'character'
+            archive.writestr(f"{character['id']}_{name}.pdf", pdf_bytes)
+    return buffer.getvalue()
+
+
+def bundle_pdf(rendered):
+    """Concatenate rendered sheets into one multi-page PDF"""
+    import PyPDF2
+
+    writer = PyPDF2.PdfWriter()
+    for _, pdf_bytes, _ in rendered:
+        for page in PyPDF2.PdfReader(io.BytesIO(pdf_bytes)).pages:
+            writer.add_page(page)
+
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
@@ -6,6 +6,8 @@ Handles parsing and execution of slash commands
 import re
 from campaign_session_api import *
 from campaign_recall import *
+from storyteller_service import roll_for_character
+from session_transcript import get_latest_summary
 
 class CommandSystem:
     def __init__(self, intelligent_dice=None):
@@ -309,27 +311,13 @@ class CommandSystem:
         conn = get_db_connection()
         session_data = conn.execute('SELECT * FROM campaign_sessions WHERE id = ?', (session_id,)).fetchone()
         
-        # Get events from this session
-        events = conn.execute('''
-            SELECT * FROM campaign_events
-            WHERE campaign_id = ? AND created_at BETWEEN ? AND ?
-            ORDER BY created_at
-        ''', (session_data['campaign_id'], session_data['start_time'], session_data['end_time'] or datetime.now())).fetchall()
-        
-        # Get NPCs created
-        npcs = conn.execute('''
-            SELECT name, clan FROM campaign_npcs
-            WHERE campaign_id = ? AND created_at BETWEEN ? AND ?
-        ''', (session_data['campaign_id'], session_data['start_time'], session_data['end_time'] or datetime.now())).fetchall()
-        
-        # Get locations created
-        locations = conn.execute('''
-            SELECT name, type FROM campaign_locations
-            WHERE campaign_id = ? AND created_at BETWEEN ? AND ?
-        ''', (session_data['campaign_id'], session_data['start_time'], session_data['end_time'] or datetime.now())).fetchall()
-        
+        activity, _ = fetch_session_activity(conn, session_data)
         conn.close()
         
+        npcs = activity['npcs_created']
+        locations = activity['locations_created']
+        events = activity['events']
+        
         summary = f"""
 📊 **Session {session_data['session_number']} Summary**
 
@@ -341,6 +329,10 @@ class CommandSystem:
 • Events: {len(events)}
 """
         
+        story = get_latest_summary(session_id)
+        if story:
+            summary += f"\n**Story So Far:**\n{story}\n"
+        
         return {'success': True, 'message': summary}
     
     # ==================== DATABASE COMMANDS ====================
@@ -519,61 +511,8 @@ class CommandSystem:
         # Get session ID for tracking
         session_id = get_active_session_id() or 'default'
         
-        # Parse the roll command
-        roll_params = self.intelligent_dice.parse_roll_command(f'/roll {args}')
-        
-        # Get character data
-        character_id = session.get('active_character_id')
-        if not character_id:
-            return {'error': 'No active character. Please create or link a character first.'}
-        
-        conn = get_db_connection()
-        character = conn.execute('SELECT * FROM characters WHERE id = ?', (character_id,)).fetchone()
-        conn.close()
-        
-        if not character:
-            return {'error': 'Character not found.'}
-        
-        character_data = dict(character)
-        
-        # Determine what to roll
-        if roll_params['use_last_suggested']:
-            # Use last suggested roll
-            last_roll = self.intelligent_dice.get_last_suggested_roll(session_id)
-            if not last_roll:
-                return {'error': 'No previous roll suggestion found. Please specify what to roll (e.g., /roll Intelligence + Auspex)'}
-            
-            # Merge blood surge if specified
-            if roll_params['blood_surge']:
-                last_roll['blood_surge'] = True
-            
-            roll_data = last_roll
-        else:
-            # Use specified roll
-            roll_data = roll_params
-        
-        # Calculate dice pool
-        pool_size, description = self.intelligent_dice.calculate_dice_pool(character_data, roll_data)
-        
-        if pool_size == 0:
-            return {'error': f'Cannot roll {description}. Dice pool is 0.'}
-        
-        # Get hunger from character
-        hunger = character_data.get('hunger', 0)
-        
-        # Roll the dice
-        result = self.intelligent_dice.roll_dice(pool_size, hunger, difficulty=0)
-        
-        # Format response
-        response = f"🎲 **Rolling {description}**\n"
-        response += f"Pool: {pool_size} dice | Hunger: {hunger}\n\n"
-        response += result['message']
-        
-        return {
-            'success': True,
-            'message': response,
-            'roll_result': result
-        }
+        # Pool resolution and rolling are shared with the Discord bot
+        return roll_for_character(session.get('active_character_id'), args, session_id)
     
     # ==================== HELP COMMAND ====================
     
@@ -7,6 +7,8 @@ Following official Vampire: The Masquerade 5th Edition rules
 import sqlite3
 import os
 
+from character_model import ensure_character_columns
+
 def create_complete_character_schema():
     """Create comprehensive character database schema following V5 rules"""
     
@@ -292,6 +294,10 @@ def create_complete_character_schema():
     )
     ''')
     
+    # The per-trait columns above are what the AI integration reads; the web
+    # app reads the shared character model's columns, so add those too
+    ensure_character_columns(conn)
+    
     conn.commit()
     conn.close()
     
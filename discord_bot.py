@@ -1,143 +1,421 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
 import os
 import asyncio
-from openai import OpenAI
+import weakref
+from collections import Counter
+from openai import AsyncOpenAI, NotFoundError
 import json
 
+from character_cache import character_cache
+from intelligent_dice_system import intelligent_dice
+from llm_scheduler import INTERACTIVE, llm_scheduler
+from migrate_database import create_bot_shards, create_player_threads, create_session_transcripts
+from player_threads import PlayerThreadStore
+from rate_limit import AsyncRequestCoalescer, RateLimited, RequestLimiter
+from shard_metrics import ShardMetrics
+from session_transcript import TranscriptWriter, get_player_summary, get_player_turns
+from storyteller_service import build_turn, catalog_answer, process_reply, roll_for_character
+from voice_narration import Narrator, SentenceStream
+
 # Configuration
 DISCORD_TOKEN = os.getenv("DISCORD_BOT_TOKEN")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 ASSISTANT_ID = os.getenv("ASSISTANT_ID")
+# Model the assistant runs on, for the scheduler's per-model slots
+ASSISTANT_MODEL = os.getenv("ASSISTANT_MODEL", "gpt-4")
+
+# Storyteller runs in flight across all players; each player gets one
+MAX_CONCURRENT_REQUESTS = int(os.getenv("BOT_MAX_CONCURRENT_REQUESTS", "16"))
+llm_scheduler.set_limit(ASSISTANT_MODEL, MAX_CONCURRENT_REQUESTS)
+# Longest a streamed run may take before the player is told to retry
+RUN_TIMEOUT = 90
+# Discord allows about five edits per message every five seconds
+EDIT_INTERVAL = 1.0
+DISCORD_MESSAGE_LIMIT = 2000
+STREAMING_CURSOR = " ▌"
+# Threads nobody has written to for this long are deleted
+THREAD_TTL_DAYS = int(os.getenv("BOT_THREAD_TTL_DAYS", "14"))
+
+# Sharding: BOT_SHARD_COUNT shards in total (unset: Discord's recommendation)
+# and BOT_SHARD_IDS the ones this process runs (unset: all of them).
+# bot_supervisor.py sets both when it splits shards across processes.
+SHARD_COUNT = int(os.environ["BOT_SHARD_COUNT"]) if os.getenv("BOT_SHARD_COUNT") else None
+SHARD_IDS = [int(i) for i in os.environ["BOT_SHARD_IDS"].split(",")] if os.getenv("BOT_SHARD_IDS") else None
+METRICS_INTERVAL = int(os.getenv("BOT_METRICS_INTERVAL", "60"))
 
-client_openai = OpenAI(api_key=OPENAI_API_KEY)
+# Async OpenAI client, created on first use. Every call is awaited, so a
+# slow reply never blocks the gateway heartbeat or other players' commands.
+_client_openai = None
+
+def get_openai_client():
+    global _client_openai
+    if _client_openai is None:
+        _client_openai = AsyncOpenAI(api_key=OPENAI_API_KEY)
+    return _client_openai
 
 # Discord bot setup
 intents = discord.Intents.default()
 intents.message_content = True
 intents.voice_states = True
 
-bot = commands.Bot(command_prefix='!vtm ', intents=intents)
+bot = commands.AutoShardedBot(command_prefix='!vtm ', intents=intents,
+                              shard_count=SHARD_COUNT, shard_ids=SHARD_IDS)
+
+# Per-shard latency and event rates, reported to the bot_shards table
+shard_metrics = ShardMetrics()
 
-# Thread storage (in production, use database)
-user_threads = {}
+# Player -> assistant thread, shared with other bot processes through SQLite
+thread_store = PlayerThreadStore(ttl=THREAD_TTL_DAYS * 24 * 3600)
+
+# Discord turns go into the same transcript as the web app's
+transcript_writer = TranscriptWriter(source='discord')
+
+# Guild id -> Narrator while the Storyteller is in a voice channel there
+narrators = {}
+
+# Per-player and per-guild limits on Storyteller runs, and sharing of
+# duplicate in-flight messages (a retried slash command)
+llm_limiter = RequestLimiter()
+llm_coalescer = AsyncRequestCoalescer()
 
 @bot.event
 async def on_ready():
-    print(f'{bot.user} has connected to Discord!')
+    print(f'{bot.user} has connected to Discord! Shards {sorted(bot.shards)} of {bot.shard_count}')
+    # Global commands only need syncing once, by the process running shard 0
+    if 0 in bot.shards:
+        try:
+            synced = await bot.tree.sync()
+            print(f'Synced {len(synced)} command(s)')
+        except Exception as e:
+            print(f'Failed to sync commands: {e}')
+    if not expire_threads.is_running():
+        expire_threads.start()
+    if not report_shard_metrics.is_running():
+        report_shard_metrics.start()
+
+def _shard_of(guild):
+    # Direct messages arrive on shard 0
+    return guild.shard_id if guild else 0
+
+@bot.event
+async def on_socket_event_type(event_type):
+    shard_metrics.gateway_event(event_type)
+
+@bot.listen('on_interaction')
+async def count_interaction(interaction):
+    shard_metrics.shard_event(_shard_of(interaction.guild))
+
+@bot.listen('on_message')
+async def count_message(message):
+    shard_metrics.shard_event(_shard_of(message.guild))
+
+@bot.event
+async def on_shard_disconnect(shard_id):
+    shard_metrics.disconnected(shard_id)
+
+@bot.event
+async def on_shard_resumed(shard_id):
+    shard_metrics.resumed(shard_id)
+
+@tasks.loop(seconds=METRICS_INTERVAL)
+async def report_shard_metrics():
+    """Write this process's per-shard metrics for /health and log a summary"""
+    guild_counts = Counter(guild.shard_id for guild in bot.guilds)
+    rows, top_events = shard_metrics.report(bot.shard_count, bot.latencies, guild_counts)
     try:
-        synced = await bot.tree.sync()
-        print(f'Synced {len(synced)} command(s)')
+        await asyncio.to_thread(shard_metrics.write, rows)
     except Exception as e:
-        print(f'Failed to sync commands: {e}')
+        print(f"⚠️ Could not write shard metrics: {e}")
+    shards = ', '.join(f"#{row['shard_id']} {row['latency_ms']} ms {row['events_per_minute']}/min"
+                       for row in rows)
+    events = ', '.join(f"{event_type} {rate}/min" for event_type, rate in top_events)
+    print(f"📊 Shards: {shards} | gateway: {events or 'idle'}")
+    for model, stats in llm_scheduler.stats().items():
+        wait = stats['queue_wait_ms']['interactive']
+        wait = f"{wait['avg']} ms avg, {wait['p95']} ms p95" if wait else 'n/a'
+        print(f"📊 {model}: {stats['running']['interactive']}/{stats['limit']} running, "
+              f"{stats['queued']['interactive']} queued, wait {wait}")
+
+@tasks.loop(hours=1)
+async def expire_threads():
+    """Delete the assistant threads of players who stopped playing"""
+    expired = await asyncio.to_thread(thread_store.expire)
+    for player_id, thread_id in expired:
+        try:
+            await get_openai_client().beta.threads.delete(thread_id)
+        except NotFoundError:
+            pass
+        except Exception as e:
+            print(f"⚠️ Could not delete thread {thread_id}: {e}")
+    if expired:
+        print(f"✓ Expired {len(expired)} abandoned Storyteller threads")
+
+class StorytellerBusy(Exception):
+    """The player already has a Storyteller request in flight"""
+
+_player_locks = weakref.WeakValueDictionary()
+
+_RUN_FAILED_EVENTS = ("thread.run.failed", "thread.run.cancelled", "thread.run.expired")
+
+async def _stream_run(client, thread_id, messages, on_text):
+    """Add the messages and stream the run; returns the reply text"""
+    stream = await client.beta.threads.runs.create(
+        thread_id=thread_id,
+        assistant_id=ASSISTANT_ID,
+        additional_messages=messages,
+        stream=True
+    )
+    
+    text = ""
+    async for event in stream:
+        if event.event == "thread.message.delta":
+            for part in event.data.delta.content or []:
+                if part.type == "text" and part.text and part.text.value:
+                    text += part.text.value
+                    if on_text is not None:
+                        on_text(text)
+        elif event.event in _RUN_FAILED_EVENTS:
+            raise RuntimeError(f"Run {event.event.rsplit('.', 1)[1]}")
+    
+    if not text:
+        # Nothing streamed as text (e.g. only tool output); read the stored reply
+        messages = await client.beta.threads.messages.list(thread_id=thread_id, limit=1)
+        text = messages.data[0].content[0].text.value
+    return text
+
+def _turn_messages(turns):
+    return [{"role": turn["role"], "content": turn["content"]} for turn in turns if turn["content"]]
+
+async def get_player_thread(client, user_id):
+    """
+    The player's thread and the transcript turns it hasn't seen yet.
+    
+    A new thread starts with the player's story summary and recent turns
+    from the shared transcript, so a new or expired thread picks up where
+    the web app or an earlier thread left off. An existing thread gets
+    the turns the player made on the web since its last run.
+    
+    Returns:
+        (PlayerThread, catch-up turns)
+    """
+    thread = await asyncio.to_thread(thread_store.get, user_id)
+    if thread is not None:
+        turns = await asyncio.to_thread(
+            get_player_turns, user_id, after_id=thread.synced_id, exclude_source='discord')
+        return thread, turns
+    
+    turns = await asyncio.to_thread(get_player_turns, user_id)
+    summary = await asyncio.to_thread(get_player_summary, user_id)
+    messages = _turn_messages(turns)
+    if summary:
+        messages.insert(0, {"role": "user", "content": f"[STORY SO FAR]\n{summary}"})
+    
+    created = await client.beta.threads.create(messages=messages)
+    synced_id = turns[-1]["id"] if turns else 0
+    thread = await asyncio.to_thread(thread_store.add, user_id, created.id, synced_id)
+    if thread.thread_id != created.id:
+        # Another bot process created this player's thread first
+        await client.beta.threads.delete(created.id)
+    return thread, []
+
+async def ask_storyteller(user_id, message, on_text=None, guild_id=None):
+    """
+    Send a player's message to the assistant and return the reply.
+    
+    The run is streamed: on_text(text_so_far) is called as tokens arrive,
+    so the caller can show the reply before it is finished. The message
+    gets the same character, campaign and rules context as on the web,
+    and both sides of the exchange go into the player's shared transcript.
+    
+    Raises:
+        StorytellerBusy: the player's previous message is still running
+        RateLimited: the player or guild is over its limit
+        RuntimeError: the run failed or didn't finish in time
+    """
+    lock = _player_locks.get(user_id)
+    if lock is None:
+        lock = _player_locks[user_id] = asyncio.Lock()
+    if lock.locked():
+        raise StorytellerBusy()
+    llm_limiter.acquire(user=user_id, guild=guild_id)
+    
+    async with lock:
+        # A question naming one rules entry is answered from the database
+        answer = await asyncio.to_thread(catalog_answer, message)
+        if answer:
+            transcript_writer.append(None, user_id, 'user', message)
+            transcript_writer.append(None, user_id, 'assistant', answer)
+            return answer
+        
+        client = get_openai_client()
+        enhanced_message, campaign_integration = await asyncio.to_thread(build_turn, user_id, message)
+        
+        for attempt in range(2):
+            thread, turns = await get_player_thread(client, user_id)
+            messages = _turn_messages(turns) + [{"role": "user", "content": enhanced_message}]
+            try:
+                async with llm_scheduler.async_slot(ASSISTANT_MODEL, INTERACTIVE):
+                    reply = await asyncio.wait_for(
+                        _stream_run(client, thread.thread_id, messages, on_text), RUN_TIMEOUT)
+                break
+            except asyncio.TimeoutError:
+                raise RuntimeError("Run timed out")
+            except NotFoundError:
+                # Thread deleted at OpenAI (expired elsewhere); start a new one once
+                await asyncio.to_thread(thread_store.forget, user_id, thread.thread_id)
+                if attempt:
+                    raise
+        
+        await asyncio.to_thread(thread_store.touch, user_id, turns[-1]["id"] if turns else None)
+        transcript_writer.append(None, user_id, 'user', message)
+        transcript_writer.append(None, user_id, 'assistant', reply)
+        await asyncio.to_thread(process_reply, reply, user_id, campaign_integration)
+        return reply
+
+def split_message(text, limit=DISCORD_MESSAGE_LIMIT):
+    return [text[i:i + limit] for i in range(0, len(text), limit)] or [""]
+
+class StreamingReply:
+    """
+    Discord reply edited in place while the Storyteller's text streams in.
+    
+    update() only records the latest text. One task applies it at most once
+    per EDIT_INTERVAL, so a burst of tokens becomes a single edit and the
+    message stays inside Discord's edit rate limit. Text past 2000
+    characters continues in follow-up messages.
+    """
+    
+    def __init__(self, interaction, interval=EDIT_INTERVAL):
+        self.interaction = interaction
+        self.interval = interval
+        self._text = ""
+        self._changed = asyncio.Event()
+        self._done = asyncio.Event()
+        self._task = None
+        # Text shown in each message; index 0 is the interaction's own response
+        self._shown = []
+        self._followups = []
+        self.edits = 0
+    
+    def update(self, text):
+        self._text = text
+        self._changed.set()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def finish(self, text):
+        """Show the final text now and wait until it has been sent"""
+        self._done.set()
+        self.update(text)
+        await self._task
+    
+    async def _run(self):
+        while True:
+            await self._changed.wait()
+            self._changed.clear()
+            final = self._done.is_set()
+            await self._show(self._text if final else self._text + STREAMING_CURSOR)
+            if final:
+                return
+            try:
+                # The final edit doesn't wait out the interval
+                await asyncio.wait_for(self._done.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+    
+    async def _show(self, text):
+        try:
+            for index, chunk in enumerate(split_message(text)):
+                if index < len(self._shown) and self._shown[index] == chunk:
+                    continue
+                if index == 0:
+                    await self.interaction.edit_original_response(content=chunk)
+                elif index <= len(self._followups):
+                    await self._followups[index - 1].edit(content=chunk)
+                else:
+                    self._followups.append(await self.interaction.followup.send(chunk, wait=True))
+                if index < len(self._shown):
+                    self._shown[index] = chunk
+                else:
+                    self._shown.append(chunk)
+                self.edits += 1
+        except discord.HTTPException as e:
+            # Keep streaming; the next edit carries the full text again
+            print(f"⚠️ Could not update Storyteller reply: {e}")
 
 @bot.tree.command(name="storyteller", description="Talk to the VTM Storyteller")
 @app_commands.describe(message="Your message to the Storyteller")
 async def storyteller(interaction: discord.Interaction, message: str):
     """Slash command to interact with the Storyteller"""
+    user_id = str(interaction.user.id)
+    key = (user_id, message.strip())
+    busy = user_id in _player_locks and _player_locks[user_id].locked()
+    if busy and not llm_coalescer.in_flight(key):
+        await interaction.response.send_message(
+            "⏳ The Storyteller is still answering your last message.", ephemeral=True)
+        return
+    
     await interaction.response.defer(thinking=True)
+    reply = StreamingReply(interaction)
+    on_text = reply.update
+    
+    # In a guild with narration on, sentences are spoken as they complete
+    narrator = narrators.get(interaction.guild_id)
+    sentences = SentenceStream(narrator.say) if narrator else None
+    if sentences:
+        def on_text(text):
+            reply.update(text)
+            sentences.update(text)
     
     try:
-        user_id = str(interaction.user.id)
-        
-        # Get or create thread for this user
-        if user_id not in user_threads:
-            thread = client_openai.beta.threads.create()
-            user_threads[user_id] = thread.id
-        
-        thread_id = user_threads[user_id]
-        
-        # Send message to assistant
-        client_openai.beta.threads.messages.create(
-            thread_id=thread_id,
-            role="user",
-            content=message
-        )
-        
-        # Run the assistant
-        run = client_openai.beta.threads.runs.create(
-            thread_id=thread_id,
-            assistant_id=ASSISTANT_ID
-        )
-        
-        # Wait for completion
-        for _ in range(90):
-            run_status = client_openai.beta.threads.runs.retrieve(
-                thread_id=thread_id,
-                run_id=run.id
-            )
-            
-            if run_status.status == "completed":
-                messages = client_openai.beta.threads.messages.list(thread_id=thread_id)
-                response = messages.data[0].content[0].text.value
-                
-                # Split long responses into multiple messages
-                if len(response) > 2000:
-                    chunks = [response[i:i+2000] for i in range(0, len(response), 2000)]
-                    await interaction.followup.send(chunks[0])
-                    for chunk in chunks[1:]:
-                        await interaction.channel.send(chunk)
-                else:
-                    await interaction.followup.send(response)
-                return
-            
-            elif run_status.status in ["failed", "cancelled", "expired"]:
-                await interaction.followup.send("❌ The Storyteller encountered an error. Please try again.")
-                return
-            
-            await asyncio.sleep(1)
-        
-        await interaction.followup.send("⏱️ The Storyteller is taking too long to respond. Please try again.")
-        
+        # A repeat of the message still running shares its reply
+        response = await llm_coalescer.run(
+            key, lambda: ask_storyteller(user_id, message, on_text=on_text, guild_id=interaction.guild_id))
+        if sentences:
+            sentences.finish(response)
+        await reply.finish(response)
+    
+    except StorytellerBusy:
+        await reply.finish("⏳ The Storyteller is still answering your last message.")
+    except RateLimited as e:
+        await reply.finish(f"⏳ Slow down: the Storyteller can answer again in {e.retry_after_header}s.")
+    except RuntimeError as e:
+        if str(e) == "Run timed out":
+            await reply.finish("⏱️ The Storyteller is taking too long to respond. Please try again.")
+        else:
+            await reply.finish("❌ The Storyteller encountered an error. Please try again.")
     except Exception as e:
-        await interaction.followup.send(f"❌ Error: {str(e)}")
+        await reply.finish(f"❌ Error: {str(e)}")
 
 @bot.tree.command(name="roll", description="Roll dice for VTM")
 @app_commands.describe(
-    pool="Number of dice to roll",
-    difficulty="Difficulty (default 6)",
-    hunger="Hunger dice (default 0)"
+    roll="Attribute + Skill or a Discipline (empty: the Storyteller's last suggestion)",
+    blood_surge="Add Blood Potency dice (Blood Surge)",
+    difficulty="Successes needed (default 0: just count them)",
+    pool="Roll this many dice instead of using your character",
+    hunger="Hunger dice for a plain pool roll (default 0)"
 )
-async def roll_dice(interaction: discord.Interaction, pool: int, difficulty: int = 6, hunger: int = 0):
-    """Roll dice using VTM 5e rules"""
-    import random
-    
-    # Roll normal dice
-    normal_dice = pool - hunger
-    normal_results = [random.randint(1, 10) for _ in range(normal_dice)]
-    
-    # Roll hunger dice
-    hunger_results = [random.randint(1, 10) for _ in range(hunger)]
-    
-    # Count successes
-    normal_successes = sum(1 for d in normal_results if d >= difficulty)
-    hunger_successes = sum(1 for d in hunger_results if d >= difficulty)
-    total_successes = normal_successes + hunger_successes
-    
-    # Check for criticals and bestial failures
-    normal_tens = sum(1 for d in normal_results if d == 10)
-    hunger_tens = sum(1 for d in hunger_results if d == 10)
-    hunger_ones = sum(1 for d in hunger_results if d == 1)
-    
-    # Build result message
-    result = f"🎲 **Dice Roll**\n"
-    result += f"Pool: {pool} dice (Difficulty: {difficulty})\n"
-    result += f"Normal Dice: {normal_results}\n"
-    if hunger > 0:
-        result += f"Hunger Dice: {hunger_results} 🩸\n"
-    result += f"\n**Successes: {total_successes}**\n"
-    
-    # Check for critical
-    total_tens = normal_tens + hunger_tens
-    if total_tens >= 2:
-        result += f"✨ **CRITICAL!** ({total_tens} tens)\n"
-    
-    # Check for bestial failure
-    if total_successes == 0 and hunger_ones > 0:
-        result += f"💀 **BESTIAL FAILURE!** The Beast stirs...\n"
-    
-    await interaction.response.send_message(result)
+async def roll_dice(interaction: discord.Interaction, roll: str = None, blood_surge: bool = False,
+                    difficulty: int = 0, pool: int = None, hunger: int = 0):
+    """Roll dice using VTM 5e rules, with pools from the player's active character"""
+    user_id = str(interaction.user.id)
+    
+    if pool is not None:
+        result = intelligent_dice.roll_dice(pool, hunger, difficulty=difficulty)
+        await interaction.response.send_message(
+            f"🎲 **Rolling {pool} dice**\nPool: {pool} dice | Hunger: {hunger}\n\n{result['message']}")
+        return
+    
+    args = f"{roll or ''} + blood surge" if blood_surge else (roll or '')
+    character_id = await asyncio.to_thread(character_cache.get_active_id, user_id)
+    result = await asyncio.to_thread(roll_for_character, character_id, args, user_id, difficulty)
+    
+    if 'error' in result:
+        await interaction.response.send_message(f"❌ {result['error']}", ephemeral=True)
+    else:
+        await interaction.response.send_message(result['message'])
 
 @bot.tree.command(name="character", description="Create or view your character")
 @app_commands.describe(
@@ -196,9 +474,14 @@ async def campaign(interaction: discord.Interaction, action: str, name: str = No
         await interaction.response.send_message("📋 Available campaigns:\n• Example Campaign 1\n• Example Campaign 2")
 
 # Voice channel commands
-@bot.tree.command(name="voice_storyteller", description="Enable voice interaction with the Storyteller")
-async def voice_storyteller(interaction: discord.Interaction):
-    """Enable voice interaction"""
+@bot.tree.command(name="voice_storyteller", description="Have the Storyteller narrate replies in your voice channel")
+@app_commands.describe(language="Narration voice")
+@app_commands.choices(language=[
+    app_commands.Choice(name="English", value="en"),
+    app_commands.Choice(name="Spanish", value="es")
+])
+async def voice_storyteller(interaction: discord.Interaction, language: str = "en"):
+    """Join the caller's voice channel and narrate /storyteller replies there"""
     if not interaction.user.voice:
         await interaction.response.send_message("❌ You need to be in a voice channel!")
         return
@@ -207,10 +490,19 @@ async def voice_storyteller(interaction: discord.Interaction):
     voice_channel = interaction.user.voice.channel
     
     try:
-        voice_client = await voice_channel.connect()
+        voice_client = interaction.guild.voice_client
+        if voice_client:
+            await voice_client.move_to(voice_channel)
+        else:
+            voice_client = await voice_channel.connect()
+        
+        old = narrators.pop(interaction.guild_id, None)
+        if old:
+            old.clear()
+        narrators[interaction.guild_id] = Narrator(voice_client, language)
         await interaction.response.send_message(
             f"🎙️ Storyteller joined {voice_channel.name}!\n"
-            f"Speak your questions and I will respond."
+            f"Replies to /storyteller in this server will be narrated here."
         )
     except Exception as e:
         await interaction.response.send_message(f"❌ Error joining voice: {str(e)}")
@@ -219,6 +511,9 @@ async def voice_storyteller(interaction: discord.Interaction):
 async def leave_voice(ctx):
     """Leave voice channel"""
     if ctx.voice_client:
+        narrator = narrators.pop(ctx.guild.id, None)
+        if narrator:
+            narrator.clear()
         await ctx.voice_client.disconnect()
         await ctx.send("👋 Storyteller has left the voice channel.")
     else:
@@ -238,6 +533,11 @@ def run_bot():
         print("ERROR: DISCORD_BOT_TOKEN not set!")
         return
     
+    # The bot may start before the web app has migrated the database
+    create_session_transcripts()
+    create_player_threads()
+    create_bot_shards()
+    
     bot.run(DISCORD_TOKEN)
 
 if __name__ == "__main__":
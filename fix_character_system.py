@@ -5,6 +5,8 @@ Fix Character System and Add VTM 5e Rules Database
 
 import sqlite3
 
+from migrate_database import create_table_versions
+
 def create_vtm5e_rules_database():
     """Create comprehensive VTM 5e rules database"""
     conn = sqlite3.connect('vtm_storyteller.db')
@@ -343,6 +345,9 @@ if __name__ == '__main__':
     populate_humanity_rules()
     populate_experience_rules()
     
+    # Let running servers notice the new data
+    create_table_versions()
+    
     print()
     print("✅ All VTM 5e rules populated successfully!")
     print("📊 Database now includes:")
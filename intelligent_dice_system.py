@@ -4,10 +4,63 @@ Allows the AI to suggest rolls and the user to execute them with simple /roll co
 """
 
 import re
+import json
 import random
 from typing import Dict, List, Tuple, Optional
 
 class IntelligentDiceSystem:
+    # Display name -> key in the character's attributes/skills
+    ATTRIBUTE_MAP = {
+        'Strength': 'strength',
+        'Dexterity': 'dexterity',
+        'Stamina': 'stamina',
+        'Charisma': 'charisma',
+        'Manipulation': 'manipulation',
+        'Composure': 'composure',
+        'Intelligence': 'intelligence',
+        'Wits': 'wits',
+        'Resolve': 'resolve'
+    }
+    
+    SKILL_MAP = {
+        'Athletics': 'athletics',
+        'Brawl': 'brawl',
+        'Craft': 'craft',
+        'Drive': 'drive',
+        'Firearms': 'firearms',
+        'Melee': 'melee',
+        'Larceny': 'larceny',
+        'Stealth': 'stealth',
+        'Survival': 'survival',
+        'AnimalKen': 'animal_ken',
+        'Etiquette': 'etiquette',
+        'Insight': 'insight',
+        'Intimidation': 'intimidation',
+        'Leadership': 'leadership',
+        'Performance': 'performance',
+        'Persuasion': 'persuasion',
+        'Streetwise': 'streetwise',
+        'Subterfuge': 'subterfuge',
+        'Academics': 'academics',
+        'Awareness': 'awareness',
+        'Finance': 'finance',
+        'Investigation': 'investigation',
+        'Medicine': 'medicine',
+        'Occult': 'occult',
+        'Politics': 'politics',
+        'Science': 'science',
+        'Technology': 'technology',
+        'Auspex': 'auspex',
+        'Obfuscate': 'obfuscate',
+        'Presence': 'presence',
+        'Dominate': 'dominate',
+        'Fortitude': 'fortitude',
+        'Potence': 'potence',
+        'Celerity': 'celerity',
+        'Protean': 'protean',
+        'Animalism': 'animalism'
+    }
+    
     def __init__(self):
         # Store last suggested roll per session
         self.last_suggested_rolls = {}
@@ -47,6 +100,28 @@ class IntelligentDiceSystem:
         
         return None
     
+    def roll_from_suggestion(self, suggestion: Dict) -> Optional[Dict]:
+        """
+        Roll data from a structured suggest_roll call
+        ({'attribute', 'skill'} or {'discipline'}), in the same shape
+        extract_roll_from_ai_message returns.
+        """
+        if suggestion.get('discipline'):
+            return {
+                'discipline': suggestion['discipline'].strip().capitalize(),
+                'type': 'discipline'
+            }
+        
+        if suggestion.get('attribute') and suggestion.get('skill'):
+            return {
+                'attribute': suggestion['attribute'].strip().capitalize(),
+                # 'Animal Ken' -> 'AnimalKen', as in SKILL_MAP
+                'skill': ''.join(word.capitalize() for word in suggestion['skill'].split()),
+                'type': 'attribute_skill'
+            }
+        
+        return None
+    
     def store_suggested_roll(self, session_id: str, roll_data: Dict):
         """Store the last suggested roll for a session"""
         self.last_suggested_rolls[session_id] = roll_data
@@ -101,24 +176,11 @@ class IntelligentDiceSystem:
     
     def get_attribute_value(self, character_data: Dict, attribute: str) -> int:
         """Get attribute value from character data"""
-        attribute_map = {
-            'Strength': 'strength',
-            'Dexterity': 'dexterity',
-            'Stamina': 'stamina',
-            'Charisma': 'charisma',
-            'Manipulation': 'manipulation',
-            'Composure': 'composure',
-            'Intelligence': 'intelligence',
-            'Wits': 'wits',
-            'Resolve': 'resolve'
-        }
-        
-        attr_key = attribute_map.get(attribute, attribute.lower())
+        attr_key = self.ATTRIBUTE_MAP.get(attribute, attribute.lower())
         
         # First try to get from JSON attributes field (PDF upload system)
         if 'attributes' in character_data and character_data['attributes']:
             try:
-                import json
                 attributes = json.loads(character_data['attributes']) if isinstance(character_data['attributes'], str) else character_data['attributes']
                 if attr_key in attributes:
                     return attributes[attr_key]
@@ -130,51 +192,11 @@ class IntelligentDiceSystem:
     
     def get_skill_value(self, character_data: Dict, skill: str) -> int:
         """Get skill value from character data"""
-        skill_map = {
-            'Athletics': 'athletics',
-            'Brawl': 'brawl',
-            'Craft': 'craft',
-            'Drive': 'drive',
-            'Firearms': 'firearms',
-            'Melee': 'melee',
-            'Larceny': 'larceny',
-            'Stealth': 'stealth',
-            'Survival': 'survival',
-            'AnimalKen': 'animal_ken',
-            'Etiquette': 'etiquette',
-            'Insight': 'insight',
-            'Intimidation': 'intimidation',
-            'Leadership': 'leadership',
-            'Performance': 'performance',
-            'Persuasion': 'persuasion',
-            'Streetwise': 'streetwise',
-            'Subterfuge': 'subterfuge',
-            'Academics': 'academics',
-            'Awareness': 'awareness',
-            'Finance': 'finance',
-            'Investigation': 'investigation',
-            'Medicine': 'medicine',
-            'Occult': 'occult',
-            'Politics': 'politics',
-            'Science': 'science',
-            'Technology': 'technology',
-            'Auspex': 'auspex',
-            'Obfuscate': 'obfuscate',
-            'Presence': 'presence',
-            'Dominate': 'dominate',
-            'Fortitude': 'fortitude',
-            'Potence': 'potence',
-            'Celerity': 'celerity',
-            'Protean': 'protean',
-            'Animalism': 'animalism'
-        }
-        
-        skill_key = skill_map.get(skill, skill.lower())
+        skill_key = self.SKILL_MAP.get(skill, skill.lower())
         
         # First try to get from JSON skills field (PDF upload system)
         if 'skills' in character_data and character_data['skills']:
             try:
-                import json
                 skills = json.loads(character_data['skills']) if isinstance(character_data['skills'], str) else character_data['skills']
                 if skill_key in skills:
                     return skills[skill_key]
@@ -256,13 +278,11 @@ class IntelligentDiceSystem:
         # Check for Messy Critical (at least one hunger die is a 10 and we have a critical)
         messy_critical = hunger_tens > 0 and critical_pairs > 0
         
-        # Check for Bestial Failure (all hunger dice are 1 and total successes < difficulty)
-        bestial_failure = (hunger_dice > 0 and 
-                          all(d == 1 for d in hunger_rolls) and 
-                          total_successes < difficulty)
-        
-        # Determine success
-        success = total_successes >= difficulty
+        # Determine success (with no difficulty set, any success will do)
+        success = total_successes >= max(difficulty, 1)
+
+        # Check for Bestial Failure (the roll fails and at least one hunger die is a 1)
+        bestial_failure = not success and any(d == 1 for d in hunger_rolls)
         
         return {
             'success': success,
@@ -0,0 +1,177 @@
+"""
+LLM Response Cache for VTM Storyteller
+Answers repeated rules and lore questions without another model call
+
+Rules questions ("how does Blood Surge work?") get the same answer whatever
+the story state, so chat() sends them to the model with only the system
+prompt and caches the reply. The key is the normalized question, the model
+and a hash of the system prompt, so editing the prompt or switching models
+never serves a stale answer.
+"""
+
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+
+# V5 rules and lore vocabulary; a question must mention one of these
+RULES_TERMS = (
+    'rouse check', 'blood surge', 'blood potency', 'humanity', 'stain', 'remorse',
+    'frenzy', 'willpower', 'messy critical', 'bestial failure', 'dice pool', 'difficulty',
+    'superficial', 'aggravated', 'predator type', 'resonance', 'dyscrasia',
+    'touchstone', 'conviction', 'generation', 'diablerie', 'blood bond', 'vinculum',
+    'clan bane', 'bane', 'compulsion', 'masquerade', 'discipline', 'amalgam', 'ritual',
+    'ceremony', 'xp', 'torpor', 'final death', 'slake',
+    'animalism', 'auspex', 'blood sorcery', 'celerity', 'dominate', 'fortitude',
+    'obfuscate', 'oblivion', 'potence', 'presence', 'protean', 'thin-blood', 'alchemy',
+    'gehenna', 'antediluvian', 'methuselah'
+)
+# Clans, court roles, factions, places and everyday words: in a chronicle
+# these name its own Brujah, Prince or Elysium, or what happens in a scene,
+# so they only make a rules question next to a rules word
+SETTING_TERMS = (
+    'caitiff', 'brujah', 'gangrel', 'malkavian', 'nosferatu', 'toreador', 'tremere', 'ventrue',
+    'banu haqim', 'hecata', 'lasombra', 'ministry', 'ravnos', 'salubri', 'tzimisce',
+    'camarilla', 'anarch', 'sabbat', 'second inquisition', 'prince', 'baron', 'primogen',
+    'sheriff', 'scourge', 'harpy', 'keeper', 'seneschal', 'elysium', 'court', 'domain',
+    'damage', 'kiss', 'experience', 'feeding', 'hunger'
+)
+
+
+def _terms_re(terms):
+    return re.compile(r'\b(?:' + '|'.join(re.escape(term) for term in terms) + r')s?\b')
+
+
+_RULES_TERMS_RE = _terms_re(RULES_TERMS)
+_SETTING_TERMS_RE = _terms_re(SETTING_TERMS)
+_RULES_WORD_RE = re.compile(r'\b(?:rules?|mechanics?|dice|rolls?|pool|role|title|work|cost)\b')
+_QUESTION_RE = re.compile(
+    r"^(?:how (?:does|do|is|are|many|much)|what(?:'s| is| are| does| happens)|why (?:do|does|is|are)|"
+    r"explain|describe|define|tell me about|can you explain|who (?:are|is|were|was)|when (?:do|does|can))\b"
+)
+# Questions about a person in the story ("who is the Brujah at the bar?",
+# "what does the Ventrue want?") or about "my" character, "him" or "this
+# city" depend on story state
+_PERSON_RE = re.compile(r"^(?:who (?:is|was)|what (?:does|do|did) .+ want)\b")
+_STORY_RE = re.compile(
+    r"\b(?:i|i'm|me|my|mine|we|us|our|he|him|his|she|her|hers|they|them|their|here|"
+    r"(?:this|our) (?:city|town|place|scene|club|haven|domain|court))\b")
+_FILLER_RE = re.compile(r'^(?:(?:hey|hi|ok|okay|so|please|storyteller|quick question)\b[\s,]*)+')
+_PUNCTUATION_RE = re.compile(r"[^\w\s'-]")
+
+
+def normalize_question(message):
+    """Lowercased question without filler, punctuation or extra whitespace"""
+    text = _PUNCTUATION_RE.sub(' ', message.lower())
+    text = ' '.join(text.split())
+    return _FILLER_RE.sub('', text).strip()
+
+
+def question_body(message):
+    """
+    What a question asks about: the normalized text after its question
+    phrase ('how does blood surge work?' -> 'blood surge work'), or None
+    if the message isn't phrased as a question.
+    """
+    text = normalize_question(message)
+    question = _QUESTION_RE.match(text)
+    if not question or len(text) > 200:
+        return None
+    return text[question.end():].strip()
+
+
+def classify_message(message):
+    """
+    'rules' for a general rules/lore question, otherwise 'story'.
+
+    Deliberately conservative: a story message sent down the rules path
+    would get a cached, context-free answer. Questions pointing at the
+    story ("who is...", "what does X want", "my", "him", "this city") are
+    story turns, and clans, court roles, factions, places and everyday
+    words like hunger or the kiss count only with a rules word ("what is
+    the role of a Prince?" is rules, "what happens when the Sheriff sees
+    the kiss?" is story).
+    """
+    body = question_body(message)
+    if body is None or _PERSON_RE.match(normalize_question(message)) or _STORY_RE.search(body):
+        return 'story'
+    if _RULES_TERMS_RE.search(body):
+        return 'rules'
+    if _SETTING_TERMS_RE.search(body) and _RULES_WORD_RE.search(normalize_question(message)):
+        return 'rules'
+    return 'story'
+
+
+def prompt_hash(system_prompt):
+    return hashlib.sha256(system_prompt.encode('utf-8')).hexdigest()[:16]
+
+
+class ResponseCache:
+    """
+    LRU of model replies with a TTL.
+
+    Each entry remembers how long the original call took and how many
+    tokens it used, so stats() can report the latency and spend saved.
+    """
+
+    def __init__(self, max_entries=1000, ttl=24 * 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # key -> (response, expires_at, latency_seconds, tokens)
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.saved_seconds = 0.0
+        self.saved_tokens = 0
+
+    @staticmethod
+    def key(question, model, system_prompt_hash):
+        normalized = normalize_question(question)
+        return hashlib.sha256(f"{model}\0{system_prompt_hash}\0{normalized}".encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Cached reply for a key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] < time.monotonic():
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.saved_seconds += entry[2]
+            self.saved_tokens += entry[3]
+            return entry[0]
+
+    def put(self, key, response, latency=0.0, tokens=0):
+        with self._lock:
+            self._entries[key] = (response, time.monotonic() + self.ttl, latency, tokens)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'expired': self.expired,
+            'hit_rate': round(self.hits / total, 3) if total else None,
+            'saved_seconds': round(self.saved_seconds, 2),
+            'saved_tokens': self.saved_tokens
+        }
+
+
+rules_cache = ResponseCache()
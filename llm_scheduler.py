@@ -0,0 +1,249 @@
+"""
+LLM Scheduler for VTM Storyteller
+Priority admission of every outbound OpenAI call, with per-model concurrency caps
+
+A call holds one of its model's slots while it runs. When the model is
+full, callers queue and are admitted interactive first (live chat, rules
+answers, Discord runs), then background (story summaries), oldest first
+within a class. Background work may only ever hold part of a model's
+slots, and gets no new slot while interactive calls are queued or have
+recently waited longer than INTERACTIVE_WAIT_TARGET; a background call
+already running finishes, so no tokens are wasted. Queue times are
+tracked per model and class for /health.
+
+Slots live in the process, so the caps apply to each web worker and bot
+process separately.
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import Counter, deque
+from contextlib import asynccontextmanager, contextmanager
+
+
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: 'interactive', BACKGROUND: 'background'}
+
+
+def _model_limits(value):
+    """{model: slots} from LLM_CONCURRENCY, e.g. "gpt-4=8,gpt-4o-mini=16\""""
+    limits = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        model, limit = item.rsplit('=', 1)
+        limits[model.strip()] = int(limit)
+    return limits
+
+
+# Calls in flight per model; models not listed get DEFAULT_CONCURRENCY
+MODEL_CONCURRENCY = _model_limits(os.getenv('LLM_CONCURRENCY', ''))
+DEFAULT_CONCURRENCY = int(os.getenv('LLM_DEFAULT_CONCURRENCY', '8'))
+# Share of a model's slots background calls may hold at once (at least one)
+BACKGROUND_SHARE = float(os.getenv('LLM_BACKGROUND_SHARE', '0.5'))
+# An interactive call queued longer than this holds background work back
+# for PREEMPT_HOLD seconds
+INTERACTIVE_WAIT_TARGET = float(os.getenv('LLM_INTERACTIVE_WAIT_TARGET', '0.5'))
+PREEMPT_HOLD = 5.0
+# Queue times kept per model and class for the percentiles
+WAIT_SAMPLES = 500
+
+
+class _Waiter:
+    __slots__ = ('priority', 'enqueued_at', 'wake', 'admitted', 'cancelled', 'deferred')
+
+    def __init__(self, priority, wake):
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+        self.wake = wake
+        self.admitted = False
+        self.cancelled = False
+        self.deferred = False
+
+
+class _ModelQueue:
+    def __init__(self, limit, background_share):
+        self.limit = limit
+        self.background_limit = max(1, int(limit * background_share))
+        self.running = Counter()
+        self.waiters = []
+        self.queued = Counter()
+        self.pressure_until = 0.0
+        self.admitted = Counter()
+        self.deferred = 0
+        self.waits = {priority: deque(maxlen=WAIT_SAMPLES) for priority in PRIORITY_NAMES}
+
+
+class LLMScheduler:
+    """
+    Slots for outbound LLM calls, per model.
+
+    Use slot() around a blocking call and async_slot() around an awaited
+    one, e.g.::
+
+        with llm_scheduler.slot("gpt-4", BACKGROUND):
+            client.chat.completions.create(model="gpt-4", ...)
+    """
+
+    def __init__(self, limits=MODEL_CONCURRENCY, default_limit=DEFAULT_CONCURRENCY,
+                 background_share=BACKGROUND_SHARE, wait_target=INTERACTIVE_WAIT_TARGET,
+                 hold=PREEMPT_HOLD):
+        self.limits = dict(limits)
+        self.default_limit = default_limit
+        self.background_share = background_share
+        self.wait_target = wait_target
+        self.hold = hold
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._models = {}
+
+    def set_limit(self, model, limit):
+        """Change a model's slot count; queued calls are admitted if it grew"""
+        with self._lock:
+            self.limits[model] = limit
+            queue = self._models.get(model)
+            if queue is not None:
+                queue.limit = limit
+                queue.background_limit = max(1, int(limit * self.background_share))
+                self._dispatch(queue)
+
+    def _queue(self, model):
+        queue = self._models.get(model)
+        if queue is None:
+            queue = self._models[model] = _ModelQueue(
+                self.limits.get(model, self.default_limit), self.background_share)
+        return queue
+
+    def _can_admit(self, queue, waiter, now):
+        if sum(queue.running.values()) >= queue.limit:
+            return False
+        if waiter.priority == INTERACTIVE:
+            return True
+        # Interactive waiters sort first, so the head being background
+        # means none are queued; recent interactive pressure still holds it
+        if queue.running[BACKGROUND] >= queue.background_limit:
+            return False
+        if now < queue.pressure_until:
+            if not waiter.deferred:
+                waiter.deferred = True
+                queue.deferred += 1
+            return False
+        return True
+
+    def _dispatch(self, queue):
+        """Admit queued callers in priority order while slots allow (lock held)"""
+        now = time.monotonic()
+        while queue.waiters:
+            waiter = queue.waiters[0][2]
+            if waiter.cancelled:
+                heapq.heappop(queue.waiters)
+                continue
+            if not self._can_admit(queue, waiter, now):
+                break
+            heapq.heappop(queue.waiters)
+            queue.queued[waiter.priority] -= 1
+            queue.running[waiter.priority] += 1
+            queue.admitted[waiter.priority] += 1
+            waited = now - waiter.enqueued_at
+            queue.waits[waiter.priority].append(waited)
+            if waiter.priority == INTERACTIVE and waited > self.wait_target:
+                queue.pressure_until = now + self.hold
+            waiter.admitted = True
+            waiter.wake()
+
+    def _enqueue(self, model, priority, wake):
+        waiter = _Waiter(priority, wake)
+        with self._lock:
+            queue = self._queue(model)
+            heapq.heappush(queue.waiters, (priority, next(self._seq), waiter))
+            queue.queued[priority] += 1
+            self._dispatch(queue)
+        return queue, waiter
+
+    def _retry(self, queue):
+        # Background held back by pressure that has since expired, with no
+        # release to admit it
+        with self._lock:
+            self._dispatch(queue)
+
+    def _release(self, queue, priority):
+        with self._lock:
+            queue.running[priority] -= 1
+            self._dispatch(queue)
+
+    def _cancel(self, queue, waiter):
+        with self._lock:
+            if waiter.admitted:
+                return True
+            waiter.cancelled = True
+            queue.queued[waiter.priority] -= 1
+            return False
+
+    @contextmanager
+    def slot(self, model, priority=INTERACTIVE):
+        """Hold one of model's slots, blocking the thread until one is free"""
+        admitted = threading.Event()
+        queue, waiter = self._enqueue(model, priority, admitted.set)
+        while not admitted.wait(self.hold):
+            self._retry(queue)
+        try:
+            yield
+        finally:
+            self._release(queue, priority)
+
+    @asynccontextmanager
+    async def async_slot(self, model, priority=INTERACTIVE):
+        """Hold one of model's slots, awaiting until one is free"""
+        loop = asyncio.get_running_loop()
+        admitted = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: admitted.done() or admitted.set_result(None))
+
+        queue, waiter = self._enqueue(model, priority, wake)
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(asyncio.shield(admitted), self.hold)
+                    break
+                except asyncio.TimeoutError:
+                    self._retry(queue)
+        except BaseException:
+            # Cancelled while queued; give back a slot granted meanwhile
+            if self._cancel(queue, waiter):
+                self._release(queue, priority)
+            raise
+        try:
+            yield
+        finally:
+            self._release(queue, priority)
+
+    def stats(self):
+        def wait_ms(samples):
+            if not samples:
+                return None
+            ordered = sorted(samples)
+            return {
+                'avg': round(sum(ordered) / len(ordered) * 1000, 1),
+                'p95': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 1)
+            }
+
+        with self._lock:
+            return {
+                model: {
+                    'limit': queue.limit,
+                    'background_limit': queue.background_limit,
+                    'running': {name: queue.running[p] for p, name in PRIORITY_NAMES.items()},
+                    'queued': {name: queue.queued[p] for p, name in PRIORITY_NAMES.items()},
+                    'admitted': {name: queue.admitted[p] for p, name in PRIORITY_NAMES.items()},
+                    'queue_wait_ms': {name: wait_ms(queue.waits[p]) for p, name in PRIORITY_NAMES.items()},
+                    'background_deferred': queue.deferred
+                }
+                for model, queue in self._models.items()
+            }
+
+
+llm_scheduler = LLMScheduler()
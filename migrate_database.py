@@ -1,11 +1,17 @@
 """
 Database Migration Script for VTM Storyteller
-Ensures all required columns exist in the characters table
+Creates every table and ensures all required columns exist.
+
+Run once per deploy, before the web workers start:
+    python migrate_database.py
 """
 
 import sqlite3
 import os
 
+from character_model import create_table_sql, ensure_character_columns
+from rules_catalog import CATALOG_TABLES
+
 def migrate_database(db_path='vtm_storyteller.db'):
     """Migrate database to support PDF character uploads"""
     
@@ -20,100 +26,21 @@ def migrate_database(db_path='vtm_storyteller.db'):
     
     if not table_exists:
         print("⚠️  Characters table does not exist. Creating it now...")
-        c.execute('''
-            CREATE TABLE characters (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT,
-                chronicle_id INTEGER,
-                clan TEXT,
-                concept TEXT,
-                attributes TEXT,
-                skills TEXT,
-                disciplines TEXT,
-                backgrounds TEXT,
-                health_max INTEGER DEFAULT 3,
-                willpower_max INTEGER DEFAULT 3,
-                humanity INTEGER DEFAULT 7,
-                hunger INTEGER DEFAULT 1,
-                resonance TEXT,
-                blood_potency INTEGER DEFAULT 0,
-                generation INTEGER DEFAULT 13,
-                blood_surge TEXT,
-                power_bonus TEXT,
-                mend_amount TEXT,
-                rouse_reroll TEXT,
-                bane_severity TEXT,
-                clan_bane TEXT,
-                clan_compulsion TEXT,
-                ambition TEXT,
-                desire TEXT,
-                sect TEXT,
-                rank_title TEXT,
-                pdf_path TEXT,
-                pdf_upload_date TIMESTAMP,
-                pdf_hash TEXT
-            )
-        ''')
+        c.execute(create_table_sql(if_not_exists=False))
         conn.commit()
         print("✅ Characters table created successfully")
         conn.close()
         return
     
-    # Get existing columns
-    c.execute("PRAGMA table_info(characters)")
-    existing_columns = {row[1] for row in c.fetchall()}
-    print(f"✓ Existing columns: {existing_columns}")
-    
-    # Define all required columns with their types
-    required_columns = {
-        'name': 'TEXT',
-        'chronicle_id': 'INTEGER',
-        'clan': 'TEXT',
-        'concept': 'TEXT',
-        'attributes': 'TEXT',  # JSON
-        'skills': 'TEXT',  # JSON
-        'disciplines': 'TEXT',  # JSON
-        'backgrounds': 'TEXT',  # JSON
-        'health_max': 'INTEGER DEFAULT 3',
-        'willpower_max': 'INTEGER DEFAULT 3',
-        'humanity': 'INTEGER DEFAULT 7',
-        'hunger': 'INTEGER DEFAULT 1',
-        'resonance': 'TEXT',
-        'blood_potency': 'INTEGER DEFAULT 0',
-        'generation': 'INTEGER DEFAULT 13',
-        'blood_surge': 'TEXT',
-        'power_bonus': 'TEXT',
-        'mend_amount': 'TEXT',
-        'rouse_reroll': 'TEXT',
-        'bane_severity': 'TEXT',
-        'clan_bane': 'TEXT',
-        'clan_compulsion': 'TEXT',
-        'ambition': 'TEXT',
-        'desire': 'TEXT',
-        'sect': 'TEXT',
-        'rank_title': 'TEXT',
-        'pdf_path': 'TEXT',
-        'pdf_upload_date': 'TIMESTAMP',
-        'pdf_hash': 'TEXT'
-    }
-    
-    # Add missing columns
-    added_count = 0
-    for column_name, column_type in required_columns.items():
-        if column_name not in existing_columns:
-            try:
-                sql = f"ALTER TABLE characters ADD COLUMN {column_name} {column_type}"
-                c.execute(sql)
-                conn.commit()
-                print(f"✓ Added column: {column_name} ({column_type})")
-                added_count += 1
-            except sqlite3.OperationalError as e:
-                print(f"✗ Failed to add column {column_name}: {e}")
-    
-    if added_count == 0:
+    # Add any column from the character model that is missing
+    added = ensure_character_columns(conn)
+    for column_name in added:
+        print(f"✓ Added column: {column_name}")
+    
+    if not added:
         print("✓ All required columns already exist")
     else:
-        print(f"✓ Added {added_count} new columns")
+        print(f"✓ Added {len(added)} new columns")
     
     # Verify final schema
     c.execute("PRAGMA table_info(characters)")
@@ -123,6 +50,376 @@ def migrate_database(db_path='vtm_storyteller.db'):
     conn.close()
     print("✅ Database migration completed successfully")
 
+def init_db(db_path='vtm_storyteller.db'):
+    """Create the app's tables (characters, chronicles, campaigns, ...) if missing"""
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    
+    # Characters table (see character_model.CHARACTER_COLUMNS)
+    c.execute(create_table_sql())
+    
+    # Chronicles table
+    c.execute('''CREATE TABLE IF NOT EXISTS chronicles
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  name TEXT NOT NULL,
+                  description TEXT,
+                  storyteller TEXT,
+                  setting TEXT,
+                  current_session INTEGER DEFAULT 1,
+                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    
+    # Roll history table (enhanced with narrative checkpoints)
+    c.execute('''CREATE TABLE IF NOT EXISTS roll_history
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  character_id INTEGER,
+                  chronicle_id INTEGER,
+                  session_number INTEGER,
+                  roll_type TEXT,
+                  pool_size INTEGER,
+                  hunger_dice INTEGER,
+                  difficulty INTEGER,
+                  results TEXT,
+                  successes INTEGER,
+                  outcome TEXT,
+                  narrative_context TEXT,
+                  is_checkpoint BOOLEAN DEFAULT 0,
+                  checkpoint_name TEXT,
+                  timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                  FOREIGN KEY (character_id) REFERENCES characters (id),
+                  FOREIGN KEY (chronicle_id) REFERENCES chronicles (id))''')
+    
+    # XP log table
+    c.execute('''CREATE TABLE IF NOT EXISTS xp_log
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  character_id INTEGER,
+                  amount INTEGER,
+                  reason TEXT,
+                  spent_on TEXT,
+                  timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                  FOREIGN KEY (character_id) REFERENCES characters (id))''')
+    
+    # Disciplines database
+    c.execute('''CREATE TABLE IF NOT EXISTS disciplines
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  name TEXT NOT NULL,
+                  level INTEGER,
+                  power_name TEXT,
+                  description TEXT,
+                  system TEXT,
+                  cost TEXT,
+                  dice_pools TEXT,
+                  duration TEXT,
+                  amalgam TEXT,
+                  prerequisite TEXT)''')
+    
+    # Health logs table
+    c.execute('''CREATE TABLE IF NOT EXISTS health_logs
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                  component TEXT,
+                  status TEXT,
+                  message TEXT)''')
+    
+    # Campaign Database tables
+    c.execute('''CREATE TABLE IF NOT EXISTS campaigns
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  name TEXT NOT NULL UNIQUE,
+                  description TEXT,
+                  city TEXT,
+                  faction TEXT,
+                  status TEXT DEFAULT 'active',
+                  current_session INTEGER DEFAULT 0,
+                  total_sessions INTEGER DEFAULT 0,
+                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    
+    c.execute('''CREATE TABLE IF NOT EXISTS campaign_npcs
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  campaign_id INTEGER,
+                  name TEXT NOT NULL,
+                  real_name TEXT,
+                  clan TEXT,
+                  faction TEXT,
+                  position TEXT,
+                  attributes TEXT,
+                  skills TEXT,
+                  disciplines TEXT,
+                  personality TEXT,
+                  appearance TEXT,
+                  quirks TEXT,
+                  backstory TEXT,
+                  status TEXT DEFAULT 'alive',
+                  tags TEXT,
+                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                  FOREIGN KEY (campaign_id) REFERENCES campaigns (id))''')
+    
+    c.execute('''CREATE TABLE IF NOT EXISTS campaign_locations
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  campaign_id INTEGER,
+                  name TEXT NOT NULL,
+                  type TEXT,
+                  city TEXT,
+                  description TEXT,
+                  rooms TEXT,
+                  atmosphere TEXT,
+                  security TEXT,
+                  hidden_elements TEXT,
+                  status TEXT DEFAULT 'active',
+                  tags TEXT,
+                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                  FOREIGN KEY (campaign_id) REFERENCES campaigns (id))''')
+    
+    c.execute('''CREATE TABLE IF NOT EXISTS campaign_items
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  campaign_id INTEGER,
+                  name TEXT NOT NULL,
+                  type TEXT,
+                  stats TEXT,
+                  features TEXT,
+                  backstory TEXT,
+                  owner TEXT,
+                  status TEXT DEFAULT 'intact',
+                  tags TEXT,
+                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                  FOREIGN KEY (campaign_id) REFERENCES campaigns (id))''')
+    
+    c.execute('''CREATE TABLE IF NOT EXISTS campaign_events
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  campaign_id INTEGER,
+                  session_number INTEGER,
+                  event_type TEXT,
+                  description TEXT,
+                  participants TEXT,
+                  outcome TEXT,
+                  timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                  FOREIGN KEY (campaign_id) REFERENCES campaigns (id))''')
+    
+    c.execute('''CREATE TABLE IF NOT EXISTS npc_relationships
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  npc1_id INTEGER,
+                  npc2_id INTEGER,
+                  relationship_type TEXT,
+                  description TEXT,
+                  strength INTEGER DEFAULT 0,
+                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                  FOREIGN KEY (npc1_id) REFERENCES campaign_npcs (id),
+                  FOREIGN KEY (npc2_id) REFERENCES campaign_npcs (id))''')
+    
+    conn.commit()
+    conn.close()
+
+
+def create_table_versions(db_path='vtm_storyteller.db'):
+    """
+    Version counters bumped by triggers on every write, so readers can tell
+    a table is unchanged (for ETags and caches) with one indexed lookup.
+    Triggers also catch writers that bypass the web app (bot, scripts).
+    """
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    
+    c.execute('''CREATE TABLE IF NOT EXISTS table_versions
+                 (table_name TEXT PRIMARY KEY,
+                  version INTEGER NOT NULL DEFAULT 0)''')
+    
+    # Rules tables are created by the populate scripts, so only the ones
+    # that exist yet get triggers; those scripts call this again when done
+    existing = {row[0] for row in c.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    versioned = ['characters'] + [table for table in CATALOG_TABLES if table in existing]
+    
+    for table in versioned:
+        c.execute("INSERT OR IGNORE INTO table_versions (table_name, version) VALUES (?, 0)", (table,))
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            c.execute(f'''CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()}
+                         AFTER {event} ON {table}
+                         BEGIN
+                             UPDATE table_versions SET version = version + 1
+                             WHERE table_name = '{table}';
+                         END''')
+    
+    # Listing filters walk these in id order (cursor pagination)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_characters_user ON characters (user_id, id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_characters_chronicle ON characters (chronicle_id, id)")
+    
+    conn.commit()
+    conn.close()
+    print("✓ Table version counters and character indexes ready")
+
+
+def create_campaign_indexes(db_path='vtm_storyteller.db'):
+    """
+    Composite (campaign_id, created_at) indexes so session summaries read
+    each table as one range scan. campaign_events predates created_at here,
+    so the column is added and backfilled from timestamp.
+    """
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    
+    event_columns = {row[1] for row in c.execute('PRAGMA table_info(campaign_events)')}
+    if event_columns and 'created_at' not in event_columns:
+        c.execute("ALTER TABLE campaign_events ADD COLUMN created_at TIMESTAMP")
+        c.execute("UPDATE campaign_events SET created_at = timestamp WHERE created_at IS NULL")
+    
+    for table in ('campaign_events', 'campaign_npcs', 'campaign_locations', 'campaign_items'):
+        c.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_campaign_created ON {table} (campaign_id, created_at)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_campaign_sessions_campaign ON campaign_sessions (campaign_id, session_number)")
+    
+    conn.commit()
+    conn.close()
+    print("✓ Campaign indexes ready")
+
+
+def create_character_state_events(db_path='vtm_storyteller.db'):
+    """
+    Append-only log of character state changes (damage, hunger, stains...)
+    written by apply_state_changes(); each batch can be undone as a unit.
+    """
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    
+    c.execute('''CREATE TABLE IF NOT EXISTS character_state_events
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  batch_id TEXT NOT NULL,
+                  character_id INTEGER NOT NULL,
+                  field TEXT NOT NULL,
+                  delta INTEGER NOT NULL,
+                  old_value INTEGER,
+                  new_value INTEGER,
+                  reason TEXT,
+                  undone INTEGER NOT NULL DEFAULT 0,
+                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_state_events_batch ON character_state_events (batch_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_state_events_character ON character_state_events (character_id, id)")
+    
+    conn.commit()
+    conn.close()
+    print("✓ Character state event log ready")
+
+
+def create_session_transcripts(db_path='vtm_storyteller.db'):
+    """
+    Append-only chat transcript written by session_transcript.TranscriptWriter.
+    role is 'user', 'assistant' or 'summary' (story-so-far snapshots);
+    source is the front end that wrote the row ('web' or 'discord').
+    """
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    
+    c.execute('''CREATE TABLE IF NOT EXISTS session_transcripts
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  session_id INTEGER,
+                  user_id TEXT NOT NULL,
+                  role TEXT NOT NULL,
+                  content TEXT NOT NULL,
+                  source TEXT DEFAULT 'web',
+                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    
+    columns = {row[1] for row in c.execute('PRAGMA table_info(session_transcripts)')}
+    if 'source' not in columns:
+        c.execute("ALTER TABLE session_transcripts ADD COLUMN source TEXT DEFAULT 'web'")
+    
+    c.execute("CREATE INDEX IF NOT EXISTS idx_session_transcripts_session ON session_transcripts (session_id, id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_session_transcripts_user ON session_transcripts (user_id, id)")
+    
+    conn.commit()
+    conn.close()
+    print("✓ Session transcript table ready")
+
+
+def create_player_threads(db_path='vtm_storyteller.db'):
+    """
+    Player -> OpenAI Assistants thread used by the Discord bot (see
+    player_threads.py). synced_id is the newest transcript row the thread
+    has seen; last_used_at drives expiry of abandoned threads.
+    """
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    
+    c.execute('''CREATE TABLE IF NOT EXISTS player_threads
+                 (player_id TEXT PRIMARY KEY,
+                  thread_id TEXT NOT NULL,
+                  synced_id INTEGER NOT NULL DEFAULT 0,
+                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                  last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_player_threads_last_used ON player_threads (last_used_at)")
+    
+    conn.commit()
+    conn.close()
+    print("✓ Player thread table ready")
+
+
+def create_bot_shards(db_path='vtm_storyteller.db'):
+    """
+    Latest metrics report of each Discord bot shard (see shard_metrics.py),
+    written by the bot processes and read by /health.
+    """
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    
+    c.execute('''CREATE TABLE IF NOT EXISTS bot_shards
+                 (shard_id INTEGER PRIMARY KEY,
+                  shard_count INTEGER,
+                  pid INTEGER,
+                  latency_ms REAL,
+                  guilds INTEGER,
+                  events_per_minute REAL,
+                  gateway_events_per_minute REAL,
+                  disconnects INTEGER,
+                  resumes INTEGER,
+                  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    
+    conn.commit()
+    conn.close()
+    print("✓ Bot shard metrics table ready")
+
+
+def add_discipline_power_names(db_path='vtm_storyteller.db'):
+    """
+    Add disciplines.power_name. populate_disciplines.py used to insert the
+    power name into description, shifting every later field one column to
+    the right; rows written that way are moved back into place.
+    """
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    
+    columns = {row[1] for row in c.execute('PRAGMA table_info(disciplines)')}
+    if 'power_name' not in columns:
+        c.execute("ALTER TABLE disciplines ADD COLUMN power_name TEXT")
+        c.execute('''UPDATE disciplines
+                     SET power_name = description, description = system, system = cost,
+                         cost = dice_pools, dice_pools = duration, duration = amalgam,
+                         amalgam = prerequisite, prerequisite = NULL''')
+        print(f"✓ Realigned {c.rowcount} discipline powers")
+    
+    conn.commit()
+    conn.close()
+
+
+def run_migrations(db_path='vtm_storyteller.db'):
+    """
+    Run every schema step the app used to run on import, in the same order.
+    Web workers no longer touch the schema when they boot.
+    """
+    from campaign_session_api import create_campaign_sessions_table
+    from pdf_upload_handler import PDFUploadHandler
+
+    create_campaign_sessions_table()
+    migrate_database(db_path)
+    PDFUploadHandler(db_path, ensure_schema=True)
+    init_db(db_path)
+    add_discipline_power_names(db_path)
+    create_table_versions(db_path)
+    create_character_state_events(db_path)
+    create_campaign_indexes(db_path)
+    create_session_transcripts(db_path)
+    create_player_threads(db_path)
+    create_bot_shards(db_path)
+
 if __name__ == '__main__':
-    migrate_database()
+    run_migrations()
 
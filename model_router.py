@@ -0,0 +1,195 @@
+"""
+Model Routing for VTM Storyteller
+Picks the model for each completion by what the request is, with fallback and per-route metrics
+
+Every chat completion names a route: 'narration' for story turns that
+need the full Storyteller, 'short' for greetings and out-of-character
+asides, 'command' for questions about the player's own sheet ("check my
+hunger", "roll dex + stealth") written as chat, 'rules' for rules and lore
+questions and 'summary' for story summaries. Each route has a primary
+model, a fallback model, a reply budget and a timeout in ROUTING_POLICY,
+which LLM_ROUTES can override per route as JSON, e.g.
+LLM_ROUTES='{"narration": {"model": "gpt-4o"}}'.
+
+A prompt too large for the primary model's context goes straight to the
+fallback. A call that errors or times out is retried once on the
+fallback. Latency, tokens and estimated cost are tracked per route for
+/health, so the mix can be tuned.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter, deque
+
+from llm_scheduler import INTERACTIVE, llm_scheduler
+
+
+ROUTING_POLICY = {
+    'narration': {'model': 'gpt-4', 'fallback': 'gpt-4o-mini', 'max_tokens': 1000, 'timeout': 60},
+    'short': {'model': 'gpt-4o-mini', 'fallback': 'gpt-4', 'max_tokens': 300, 'timeout': 20},
+    'command': {'model': 'gpt-4o-mini', 'fallback': 'gpt-4', 'max_tokens': 400, 'timeout': 20},
+    'rules': {'model': 'gpt-4o-mini', 'fallback': 'gpt-4', 'max_tokens': 1000, 'timeout': 30},
+    'summary': {'model': 'gpt-4o-mini', 'fallback': 'gpt-4', 'max_tokens': 400, 'timeout': 60}
+}
+for _route, _overrides in json.loads(os.getenv('LLM_ROUTES') or '{}').items():
+    ROUTING_POLICY.setdefault(_route, dict(ROUTING_POLICY['narration'])).update(_overrides)
+
+# Context window in tokens, for the prompt size check
+MODEL_CONTEXT = {
+    'gpt-4': 8192,
+    'gpt-4o': 128000,
+    'gpt-4o-mini': 128000,
+    'gpt-3.5-turbo': 16385
+}
+# USD per million (prompt, completion) tokens, for the cost estimate
+MODEL_PRICES = {
+    'gpt-4': (30.0, 60.0),
+    'gpt-4o': (2.5, 10.0),
+    'gpt-4o-mini': (0.15, 0.6),
+    'gpt-3.5-turbo': (0.5, 1.5)
+}
+# Latencies kept per route for the percentiles
+LATENCY_SAMPLES = 500
+
+# Character-sheet values a player can ask about instead of using a /command
+_SHEET_TERMS = (r"(?:hunger|willpower|health|humanity|xp|experience|blood potency|"
+                r"(?:character )?sheet|stats|inventory|attributes|skills|disciplines|dice pool)")
+# Mechanical asks about the player's own sheet ("what's my hunger?",
+# "roll dex + stealth"); other checks and lists are in-character actions
+_COMMAND_RE = re.compile(
+    r"^(?:roll\s+[a-z]+(?: [a-z]+)?\s*\+\s*[a-z]+"
+    r"|(?:check|show|list|what(?:'s| is| are)|how (?:much|many))\b.*\bmy " + _SHEET_TERMS + r"\b"
+    r"|how (?:much|many) " + _SHEET_TERMS + r"\b.*\b(?:do|have) i\b)")
+# Out-of-character asides and greetings; a bare "yes" or "no" answers the
+# Storyteller and gets full narration
+_SHORT_RE = re.compile(
+    r"^(?:\(\(|ooc\b|brb\b|(?:hi|hello|hey|good (?:evening|morning|night))"
+    r"(?: (?:all|everyone|storyteller))?[\s!.,]*$)")
+
+
+def classify_turn(message):
+    """Route for a story-path chat message: 'command', 'short' or 'narration'"""
+    text = ' '.join(message.lower().split())
+    if _COMMAND_RE.match(text):
+        return 'command'
+    if _SHORT_RE.match(text):
+        return 'short'
+    return 'narration'
+
+
+def estimate_tokens(messages):
+    """Rough prompt size: about four characters a token plus per-message overhead"""
+    return sum(len(message.get('content') or '') // 4 + 4 for message in messages)
+
+
+class _RouteStats:
+    def __init__(self):
+        self.calls = 0
+        self.fallbacks = 0
+        self.errors = 0
+        self.models = Counter()
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+
+class ModelRouter:
+    """
+    Routes chat completions to models and records how each route performs.
+
+    Args:
+        get_client: returns the (sync) OpenAI client
+        policy: route -> {'model', 'fallback', 'max_tokens', 'timeout'}
+    """
+
+    def __init__(self, get_client, policy=ROUTING_POLICY):
+        self.get_client = get_client
+        self.policy = policy
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def model_for(self, route):
+        """Primary model of a route"""
+        return self.policy[route]['model']
+
+    def _models(self, route, messages, max_tokens):
+        policy = self.policy[route]
+        model, fallback = policy['model'], policy.get('fallback')
+        needed = estimate_tokens(messages) + max_tokens
+        if fallback and needed > MODEL_CONTEXT.get(model, needed) and needed <= MODEL_CONTEXT.get(fallback, needed):
+            return [fallback]
+        return [model, fallback] if fallback and fallback != model else [model]
+
+    def complete(self, route, messages, priority=INTERACTIVE, max_tokens=None, **kwargs):
+        """
+        Chat completion for a route, through the scheduler's slots for the
+        model used. kwargs go to chat.completions.create.
+
+        Returns:
+            The completion response
+
+        Raises:
+            The last model's error if the primary and fallback both fail
+        """
+        policy = self.policy[route]
+        max_tokens = max_tokens or policy['max_tokens']
+        models = self._models(route, messages, max_tokens)
+
+        for attempt, model in enumerate(models):
+            start = time.perf_counter()
+            try:
+                with llm_scheduler.slot(model, priority):
+                    # The fallback is the retry policy; SDK retries would
+                    # repeat a timed-out call before it got its turn
+                    response = self.get_client().with_options(max_retries=0).chat.completions.create(
+                        model=model, messages=messages, max_tokens=max_tokens,
+                        timeout=policy.get('timeout'), **kwargs)
+            except Exception as e:
+                self._record(route, model, time.perf_counter() - start, None, failed=True)
+                if attempt == len(models) - 1:
+                    raise
+                print(f"⚠️ {route} call to {model} failed ({e}); falling back to {models[attempt + 1]}")
+                continue
+            self._record(route, model, time.perf_counter() - start, getattr(response, 'usage', None),
+                         fallback=attempt > 0)
+            return response
+
+    def _record(self, route, model, seconds, usage, failed=False, fallback=False):
+        with self._lock:
+            stats = self._stats.setdefault(route, _RouteStats())
+            if failed:
+                stats.errors += 1
+                return
+            stats.calls += 1
+            stats.fallbacks += fallback
+            stats.models[model] += 1
+            stats.latencies.append(seconds)
+            if usage is not None:
+                stats.prompt_tokens += usage.prompt_tokens
+                stats.completion_tokens += usage.completion_tokens
+                prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+                stats.cost += (usage.prompt_tokens * prompt_price + usage.completion_tokens * completion_price) / 1e6
+
+    def stats(self):
+        with self._lock:
+            routes = {}
+            for route, stats in self._stats.items():
+                latencies = sorted(stats.latencies)
+                routes[route] = {
+                    'calls': stats.calls,
+                    'fallbacks': stats.fallbacks,
+                    'errors': stats.errors,
+                    'models': dict(stats.models),
+                    'latency_ms': {
+                        'avg': round(sum(latencies) / len(latencies) * 1000, 1),
+                        'p95': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1)
+                    } if latencies else None,
+                    'prompt_tokens': stats.prompt_tokens,
+                    'completion_tokens': stats.completion_tokens,
+                    'cost_usd': round(stats.cost, 4)
+                }
+            return routes
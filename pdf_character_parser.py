@@ -4,7 +4,6 @@ Improved field name mappings for official VTM 5e character sheet
 """
 
 import PyPDF2
-import pdfplumber
 import re
 import json
 from datetime import datetime
@@ -57,10 +56,27 @@ class VTMCharacterParser:
         'technology': 'Tech'
     }
     
-    def __init__(self, pdf_path):
-        """Initialize parser with PDF path"""
+    # Tracker checkbox prefixes and the data key each one fills
+    TRACKER_FIELDS = {
+        'BloodPotency': 'blood_potency',
+        'Humanity': 'humanity',
+        'Willpower': 'willpower_max',
+        'Health': 'health_max'
+    }
+    
+    # Values PyPDF2 reports for a ticked checkbox
+    CHECKED_VALUES = frozenset(['/Yes', '/On', 'Yes', 'On', True, '1', 1])
+    
+    # Dot suffix -> bitmask bit; trackers go up to 10 dots
+    _DOT_BITS = {str(i): 1 << (i - 1) for i in range(1, 11)}
+    
+    def __init__(self, pdf_path, pdf_hash=None):
+        """Initialize parser with PDF path and optional precomputed SHA-256"""
         self.pdf_path = pdf_path
+        self.pdf_hash = pdf_hash
         self.data = self._initialize_data_structure()
+        self._text_values = {}
+        self._dot_masks = {}
         
     def _initialize_data_structure(self):
         """Initialize empty character data structure"""
@@ -157,8 +173,8 @@ class VTMCharacterParser:
         """Main parsing method"""
         print(f"✓ Parsing PDF: {self.pdf_path}")
         
-        # Calculate PDF hash
-        self.data['pdf_hash'] = self._calculate_pdf_hash()
+        # Calculate PDF hash unless the upload already computed it
+        self.data['pdf_hash'] = self.pdf_hash or self._calculate_pdf_hash()
         
         # Extract form fields
         try:
@@ -196,107 +212,112 @@ class VTMCharacterParser:
             
             print(f"✓ Found {len(fields)} form fields in PDF")
             
-            # Helper function to safely get field value
-            def get_field_value(field_name):
-                try:
-                    field = fields.get(field_name, {})
-                    if isinstance(field, dict):
-                        value = field.get('/V', '')
-                        # Handle indirect objects
-                        if hasattr(value, 'get_object'):
-                            value = value.get_object()
-                        return str(value) if value else ''
-                    return ''
-                except Exception as e:
-                    return ''
-            
-            # Extract basic info
-            self.data['name'] = get_field_value('Name') or get_field_value('Character Name')
-            self.data['player'] = get_field_value('Player')
-            self.data['chronicle'] = get_field_value('Chronicle')
-            self.data['clan'] = get_field_value('Clan')
-            self.data['predator_type'] = get_field_value('Predator type')
-            self.data['ambition'] = get_field_value('Ambition')
-            self.data['desire'] = get_field_value('Desire')
-            self.data['sect'] = get_field_value('Sect')
-            self.data['concept'] = get_field_value('Concept')
-            self.data['sire'] = get_field_value('Sire')
-            
-            print(f"✓ Basic info extracted: {self.data['name']} ({self.data['clan']})")
-            
-            # Extract attributes using correct field names
-            attrs_found = 0
-            for attr_name, field_prefix in self.ATTRIBUTE_FIELDS.items():
-                dots = self._count_filled_checkboxes(fields, field_prefix)
-                if dots > 0:
-                    self.data['attributes'][attr_name] = dots
-                    attrs_found += 1
-            
-            print(f"✓ Attributes extracted: {attrs_found}/9")
-            
-            # Extract skills using correct field names
-            skills_found = 0
-            for skill_name, field_prefix in self.SKILL_FIELDS.items():
-                dots = self._count_filled_checkboxes(fields, field_prefix)
-                if dots > 0:
-                    self.data['skills'][skill_name] = dots
-                    skills_found += 1
-            
-            print(f"✓ Skills extracted: {skills_found}/27")
-            
-            # Extract disciplines
-            for i in range(1, 10):
-                disc_name = get_field_value(f'Disc{i}')
-                if disc_name:
-                    dots = self._count_filled_checkboxes(fields, f'Disc{i}')
-                    self.data['disciplines'][disc_name] = dots
-            
-            # Extract backgrounds
-            for i in range(1, 10):
-                bg_name = get_field_value(f'Background{i}')
-                if bg_name:
-                    dots = self._count_filled_checkboxes(fields, f'Background{i}')
-                    self.data['backgrounds'][bg_name] = dots
-            
-            # Extract blood potency
-            bp_dots = self._count_filled_checkboxes(fields, 'BloodPotency')
-            if bp_dots > 0:
-                self.data['blood_potency'] = bp_dots
-            
-            # Extract humanity
-            humanity_dots = self._count_filled_checkboxes(fields, 'Humanity')
-            if humanity_dots > 0:
-                self.data['humanity'] = humanity_dots
-            
-            # Extract willpower
-            wp_dots = self._count_filled_checkboxes(fields, 'Willpower')
-            if wp_dots > 0:
-                self.data['willpower_max'] = wp_dots
+            self._extract_from_fields(fields)
+    
+    def _extract_from_fields(self, fields):
+        """Derive every trait from an already-read form field dictionary"""
+        self._index_fields(fields)
+        get_field_value = self._get_field_value
+        
+        # Extract basic info
+        self.data['name'] = get_field_value('Name') or get_field_value('Character Name')
+        self.data['player'] = get_field_value('Player')
+        self.data['chronicle'] = get_field_value('Chronicle')
+        self.data['clan'] = get_field_value('Clan')
+        self.data['predator_type'] = get_field_value('Predator type')
+        self.data['ambition'] = get_field_value('Ambition')
+        self.data['desire'] = get_field_value('Desire')
+        self.data['sect'] = get_field_value('Sect')
+        self.data['concept'] = get_field_value('Concept')
+        self.data['sire'] = get_field_value('Sire')
+        
+        print(f"✓ Basic info extracted: {self.data['name']} ({self.data['clan']})")
+        
+        # Extract attributes using correct field names
+        attrs_found = 0
+        for attr_name, field_prefix in self.ATTRIBUTE_FIELDS.items():
+            dots = self._count_filled_checkboxes(field_prefix)
+            if dots > 0:
+                self.data['attributes'][attr_name] = dots
+                attrs_found += 1
+        
+        print(f"✓ Attributes extracted: {attrs_found}/9")
+        
+        # Extract skills using correct field names
+        skills_found = 0
+        for skill_name, field_prefix in self.SKILL_FIELDS.items():
+            dots = self._count_filled_checkboxes(field_prefix)
+            if dots > 0:
+                self.data['skills'][skill_name] = dots
+                skills_found += 1
+        
+        print(f"✓ Skills extracted: {skills_found}/27")
+        
+        # Extract disciplines
+        for i in range(1, 10):
+            disc_name = get_field_value(f'Disc{i}')
+            if disc_name:
+                self.data['disciplines'][disc_name] = self._count_filled_checkboxes(f'Disc{i}')
+        
+        # Extract backgrounds
+        for i in range(1, 10):
+            bg_name = get_field_value(f'Background{i}')
+            if bg_name:
+                self.data['backgrounds'][bg_name] = self._count_filled_checkboxes(f'Background{i}')
+        
+        # Extract trackers
+        for field_prefix, key in self.TRACKER_FIELDS.items():
+            dots = self._count_filled_checkboxes(field_prefix)
+            if dots > 0:
+                self.data[key] = dots
+    
+    def _index_fields(self, fields):
+        """
+        Resolve every form field exactly once.
+        
+        Builds two flat lookups used by all trait extraction:
+        - self._text_values: text field name -> string value
+        - self._dot_masks: checkbox prefix -> bitmask of filled dots
+          (bit 0 is "<prefix>-1", bit 9 is "<prefix>-10")
+        """
+        text_values = {}
+        dot_masks = {}
+        checked_values = self.CHECKED_VALUES
+        dot_bits = self._DOT_BITS
+        
+        for field_name, field in fields.items():
+            if not isinstance(field, dict):
+                continue
+            value = field.get('/V')
+            if not value:
+                continue
+            # Handle indirect objects
+            if hasattr(value, 'get_object'):
+                value = value.get_object()
             
-            # Extract health
-            health_dots = self._count_filled_checkboxes(fields, 'Health')
-            if health_dots > 0:
-                self.data['health_max'] = health_dots
+            # Checkbox dots are named "<prefix>-<n>" with n in 1..10
+            prefix, sep, index = field_name.rpartition('-')
+            bit = dot_bits.get(index) if sep else None
+            if bit is not None:
+                try:
+                    checked = value in checked_values
+                except TypeError:
+                    checked = False
+                if checked:
+                    dot_masks[prefix] = dot_masks.get(prefix, 0) | bit
+            elif value:
+                text_values[field_name] = str(value)
+        
+        self._text_values = text_values
+        self._dot_masks = dot_masks
     
-    def _count_filled_checkboxes(self, fields, field_prefix):
+    def _get_field_value(self, field_name):
+        """Get the string value of a form field from the field index"""
+        return self._text_values.get(field_name, '')
+    
+    def _count_filled_checkboxes(self, field_prefix):
         """Count how many checkboxes are filled for a given field prefix"""
-        count = 0
-        for i in range(1, 11):  # Check up to 10 dots (some fields go higher)
-            field_name = f"{field_prefix}-{i}"
-            if field_name in fields:
-                try:
-                    field = fields[field_name]
-                    if isinstance(field, dict):
-                        value = field.get('/V', '')
-                        # Handle indirect objects
-                        if hasattr(value, 'get_object'):
-                            value = value.get_object()
-                        # Check if checkbox is marked
-                        if value in ['/Yes', '/On', 'Yes', 'On', True, '1', 1]:
-                            count += 1
-                except:
-                    continue
-        return count
+        return bin(self._dot_masks.get(field_prefix, 0)).count('1')
     
     def _validate_data(self):
         """Validate extracted data and apply defaults"""
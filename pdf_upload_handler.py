@@ -7,8 +7,8 @@ import os
 import sqlite3
 import json
 from datetime import datetime
-from werkzeug.utils import secure_filename
-from pdf_character_parser import VTMCharacterParser
+from character_model import ensure_character_columns
+from upload_storage import PDF_KINDS, UploadTooLargeError, store_upload
 
 
 class PDFUploadHandler:
@@ -18,11 +18,17 @@ class PDFUploadHandler:
     ALLOWED_EXTENSIONS = {'pdf'}
     MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
     
-    def __init__(self, db_path='vtm_storyteller.db'):
-        """Initialize handler with database path"""
+    def __init__(self, db_path='vtm_storyteller.db', ensure_schema=True):
+        """
+        Initialize handler with database path.
+        
+        The web app passes ensure_schema=False; its columns are added by
+        migrate_database.py before the workers start.
+        """
         self.db_path = db_path
         self._ensure_upload_directory()
-        self._ensure_database_schema()
+        if ensure_schema:
+            self._ensure_database_schema()
     
     def _ensure_upload_directory(self):
         """Ensure upload directory exists"""
@@ -31,42 +37,9 @@ class PDFUploadHandler:
     def _ensure_database_schema(self):
         """Ensure database has all required columns for PDF characters"""
         conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
         
-        # Add columns if they don't exist
-        columns_to_add = [
-            ('pdf_path', 'TEXT'),
-            ('pdf_upload_date', 'TIMESTAMP'),
-            ('pdf_hash', 'TEXT'),
-            ('blood_potency', 'INTEGER DEFAULT 0'),
-            ('generation', 'INTEGER DEFAULT 13'),
-            ('humanity', 'INTEGER DEFAULT 7'),
-            ('hunger', 'INTEGER DEFAULT 1'),
-            ('willpower_max', 'INTEGER DEFAULT 3'),
-            ('health_max', 'INTEGER DEFAULT 3'),
-            ('resonance', 'TEXT'),
-            ('blood_surge', 'TEXT'),
-            ('power_bonus', 'TEXT'),
-            ('mend_amount', 'TEXT'),
-            ('rouse_reroll', 'TEXT'),
-            ('bane_severity', 'TEXT'),
-            ('clan_bane', 'TEXT'),
-            ('clan_compulsion', 'TEXT'),
-            ('ambition', 'TEXT'),
-            ('desire', 'TEXT'),
-            ('sect', 'TEXT'),
-            ('rank_title', 'TEXT'),
-            ('chronicle_id', 'INTEGER')
-        ]
-        
-        for column_name, column_type in columns_to_add:
-            try:
-                c.execute(f"ALTER TABLE characters ADD COLUMN {column_name} {column_type}")
-                conn.commit()
-                print(f"✓ Added column: {column_name}")
-            except sqlite3.OperationalError:
-                # Column already exists
-                pass
+        for column_name in ensure_character_columns(conn):
+            print(f"✓ Added column: {column_name}")
         
         conn.close()
     
@@ -75,46 +48,42 @@ class PDFUploadHandler:
         return '.' in filename and \
                filename.rsplit('.', 1)[1].lower() in self.ALLOWED_EXTENSIONS
     
-    def save_uploaded_file(self, file, character_name=None):
+    def save_uploaded_file(self, file):
         """
-        Save uploaded PDF file to disk.
+        Stream uploaded PDF file into the content-addressed upload folder.
+        
+        The file is hashed and its magic bytes checked while it is written,
+        so the PDF never has to be read a second time to fingerprint it.
+        Re-uploading an identical sheet reuses the stored file.
         
         Args:
             file: FileStorage object from Flask request
-            character_name: Optional character name for filename
             
         Returns:
-            str: Path to saved file
+            tuple: (path to saved file, SHA-256 hex digest)
         """
         if not file or not self.allowed_file(file.filename):
             raise ValueError("Invalid file type. Only PDF files are allowed.")
         
-        # Generate secure filename
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        if character_name:
-            base_name = secure_filename(character_name)
-            filename = f"{base_name}_{timestamp}.pdf"
-        else:
-            filename = f"character_{timestamp}.pdf"
-        
-        filepath = os.path.join(self.UPLOAD_FOLDER, filename)
+        filepath, pdf_hash, _ = store_upload(file, self.UPLOAD_FOLDER, PDF_KINDS, self.MAX_FILE_SIZE)
         
-        # Save file
-        file.save(filepath)
-        
-        return filepath
+        return filepath, pdf_hash
     
-    def parse_pdf(self, pdf_path):
+    def parse_pdf(self, pdf_path, pdf_hash=None):
         """
         Parse PDF and extract character data.
         
         Args:
             pdf_path: Path to PDF file
+            pdf_hash: Optional SHA-256 already computed while saving
             
         Returns:
             dict: Parsed character data
         """
-        parser = VTMCharacterParser(pdf_path)
+        # PyPDF2 is only needed once a sheet is actually uploaded
+        from pdf_character_parser import VTMCharacterParser
+        
+        parser = VTMCharacterParser(pdf_path, pdf_hash=pdf_hash)
         data = parser.parse()
         
         # Get warnings
@@ -330,11 +299,11 @@ class PDFUploadHandler:
         """
         try:
             # Save file
-            pdf_path = self.save_uploaded_file(file)
+            pdf_path, pdf_hash = self.save_uploaded_file(file)
             print(f"✓ PDF saved: {pdf_path}")
             
             # Parse PDF
-            character_data, errors = self.parse_pdf(pdf_path)
+            character_data, errors = self.parse_pdf(pdf_path, pdf_hash)
             print(f"✓ PDF parsed")
             
             if errors:
@@ -360,6 +329,20 @@ class PDFUploadHandler:
                 'pdf_path': pdf_path
             }
             
+        except UploadTooLargeError as e:
+            print(f"✗ Upload rejected: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'status_code': 413
+            }
+        except ValueError as e:
+            print(f"✗ Upload rejected: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'status_code': 400
+            }
         except Exception as e:
             print(f"✗ Error handling upload: {e}")
             return {
@@ -0,0 +1,172 @@
+"""
+Player Threads for VTM Storyteller
+Persistent player -> OpenAI Assistants thread mapping for the Discord bot
+
+The mapping lives in the player_threads table, so a bot restart keeps
+every player's story and several bot processes share one thread per
+player. An LRU in front of the table answers active players without a
+query. Threads nobody has used for THREAD_TTL are expired: expire()
+removes their rows and returns them so the bot can delete the threads
+at OpenAI. A player coming back later starts a fresh thread seeded from
+the shared transcript.
+"""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+
+THREAD_TTL = 14 * 24 * 3600
+
+PlayerThread = namedtuple('PlayerThread', 'thread_id synced_id')
+
+
+class PlayerThreadStore:
+    """
+    player_threads table with an LRU in front.
+
+    A cached entry is trusted for half the TTL after it was last written,
+    and last_used_at is written at most every touch_every seconds per
+    player. Another process can therefore never expire a thread that is
+    still served from this cache.
+    """
+
+    def __init__(self, db_path='vtm_storyteller.db', max_entries=1000, ttl=THREAD_TTL, touch_every=300):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.touch_every = touch_every
+        self._lock = threading.Lock()
+        # player_id -> [PlayerThread, monotonic time last_used_at was written]
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _remember(self, player_id, thread):
+        with self._lock:
+            self._entries[player_id] = [thread, time.monotonic()]
+            self._entries.move_to_end(player_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, player_id):
+        """The player's PlayerThread, or None if they have none"""
+        with self._lock:
+            entry = self._entries.get(player_id)
+            if entry and time.monotonic() - entry[1] < self.ttl / 2:
+                self._entries.move_to_end(player_id)
+                self.hits += 1
+                return entry[0]
+
+        self.misses += 1
+        conn = self._connect()
+        try:
+            row = conn.execute('''UPDATE player_threads SET last_used_at = CURRENT_TIMESTAMP
+                                  WHERE player_id = ?
+                                  RETURNING thread_id, synced_id''', (player_id,)).fetchone()
+            conn.commit()
+        finally:
+            conn.close()
+
+        if row is None:
+            with self._lock:
+                self._entries.pop(player_id, None)
+            return None
+        thread = PlayerThread(*row)
+        self._remember(player_id, thread)
+        return thread
+
+    def add(self, player_id, thread_id, synced_id=0):
+        """
+        Store a new thread for a player. If another process stored one
+        first, that one wins and is returned; compare its thread_id to
+        see whether yours should be discarded.
+        """
+        conn = self._connect()
+        try:
+            conn.execute('''INSERT INTO player_threads (player_id, thread_id, synced_id)
+                            VALUES (?, ?, ?) ON CONFLICT (player_id) DO NOTHING''',
+                         (player_id, thread_id, synced_id))
+            row = conn.execute('SELECT thread_id, synced_id FROM player_threads WHERE player_id = ?',
+                               (player_id,)).fetchone()
+            conn.commit()
+        finally:
+            conn.close()
+        thread = PlayerThread(*row)
+        self._remember(player_id, thread)
+        return thread
+
+    def touch(self, player_id, synced_id=None):
+        """Record that the thread was used and, optionally, how far it has synced"""
+        with self._lock:
+            entry = self._entries.get(player_id)
+            if entry is None:
+                return
+            thread = entry[0]
+            if synced_id is not None and synced_id > thread.synced_id:
+                thread = entry[0] = thread._replace(synced_id=synced_id)
+            elif time.monotonic() - entry[1] < self.touch_every:
+                return
+            entry[1] = time.monotonic()
+
+        conn = self._connect()
+        try:
+            conn.execute('''UPDATE player_threads SET last_used_at = CURRENT_TIMESTAMP,
+                                   synced_id = MAX(synced_id, ?)
+                            WHERE player_id = ? AND thread_id = ?''',
+                         (thread.synced_id, player_id, thread.thread_id))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def forget(self, player_id, thread_id):
+        """Drop a thread that no longer exists at OpenAI"""
+        with self._lock:
+            entry = self._entries.get(player_id)
+            if entry and entry[0].thread_id == thread_id:
+                del self._entries[player_id]
+        conn = self._connect()
+        try:
+            conn.execute('DELETE FROM player_threads WHERE player_id = ? AND thread_id = ?',
+                         (player_id, thread_id))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def expire(self):
+        """
+        Remove threads unused for the TTL.
+
+        Returns:
+            List of (player_id, thread_id) removed
+        """
+        conn = self._connect()
+        try:
+            rows = conn.execute('''DELETE FROM player_threads WHERE last_used_at < datetime('now', ?)
+                                   RETURNING player_id, thread_id''', (f'-{int(self.ttl)} seconds',)).fetchall()
+            conn.commit()
+        finally:
+            conn.close()
+
+        with self._lock:
+            for player_id, thread_id in rows:
+                entry = self._entries.get(player_id)
+                if entry and entry[0].thread_id == thread_id:
+                    del self._entries[player_id]
+        self.expired += len(rows)
+        return rows
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else None,
+            'expired': self.expired
+        }
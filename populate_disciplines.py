@@ -6,6 +6,8 @@ Complete implementation of all Vampire: The Masquerade 5th Edition Disciplines
 
 import sqlite3
 
+from migrate_database import create_table_versions
+
 def populate_disciplines():
     conn = sqlite3.connect('vtm_storyteller.db')
     c = conn.cursor()
@@ -373,9 +375,9 @@ def populate_disciplines():
     
     # Insert all disciplines
     c.executemany('''INSERT INTO disciplines 
-                     (name, level, description, system, cost, dice_pools, duration, amalgam, prerequisite)
-                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''', 
-                  [(d[0], d[1], d[2], d[3], d[4], d[5], d[6], d[7], d[8]) for d in disciplines_data])
+                     (name, level, power_name, description, system, cost, dice_pools, duration, amalgam, prerequisite)
+                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''', 
+                  disciplines_data)
     
     conn.commit()
     conn.close()
@@ -383,4 +385,7 @@ def populate_disciplines():
 
 if __name__ == '__main__':
     populate_disciplines()
+    
+    # Let running servers notice the new data
+    create_table_versions()
 
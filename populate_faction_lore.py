@@ -7,6 +7,8 @@ Adds Camarilla and Anarch faction knowledge to the database
 import sqlite3
 import json
 
+from migrate_database import create_table_versions
+
 def init_faction_tables():
     """Create tables for faction lore and content"""
     conn = sqlite3.connect('vtm_storyteller.db')
@@ -301,6 +303,9 @@ if __name__ == '__main__':
     populate_important_cities()
     add_lore_sheet_categories()
     
+    # Let running servers notice the new data
+    create_table_versions()
+    
     print("=" * 60)
     print("✅ All faction data populated successfully!")
     print("\nThe AI Storyteller now has access to:")
@@ -0,0 +1,129 @@
+"""
+Portrait Variants for VTM Storyteller
+Resizes uploaded portraits once into WebP/JPEG variants for cached serving
+"""
+
+import mimetypes
+import os
+import re
+
+
+# Variant name -> longest edge in pixels
+VARIANT_SIZES = {
+    'thumb': 128,
+    'small': 256,
+    'medium': 512
+}
+
+# Variant format -> (file extension, Pillow format, save options)
+VARIANT_FORMATS = {
+    'webp': ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('jpg', 'JPEG', {'quality': 82, 'optimize': True, 'progressive': True})
+}
+
+VARIANT_FOLDER = 'variants'
+
+# Extensions an original may be stored under (see upload_storage.KIND_EXTENSIONS)
+ORIGINAL_EXTENSIONS = ('jpg', 'png', 'webp', 'gif')
+
+DIGEST_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+
+def portrait_digest(original_path):
+    """Content hash of a stored portrait (its content-addressed file name)"""
+    return os.path.splitext(os.path.basename(original_path))[0]
+
+
+def variant_path(original_path, size, fmt):
+    """Path of one variant of a stored portrait"""
+    extension = VARIANT_FORMATS[fmt][0]
+    return os.path.join(os.path.dirname(original_path), VARIANT_FOLDER,
+                        f"{portrait_digest(original_path)}_{size}.{extension}")
+
+
+def generate_variants(original_path):
+    """
+    Write every size/format variant of a portrait next to the original.
+    Variants that already exist are left alone.
+
+    Returns:
+        dict: {(size, fmt): path}
+    """
+    paths = {}
+    pending = []
+    for size in VARIANT_SIZES:
+        for fmt in VARIANT_FORMATS:
+            path = variant_path(original_path, size, fmt)
+            paths[(size, fmt)] = path
+            if not os.path.exists(path):
+                pending.append((size, fmt, path))
+
+    if not pending:
+        return paths
+
+    os.makedirs(os.path.join(os.path.dirname(original_path), VARIANT_FOLDER), exist_ok=True)
+
+    # Pillow is only loaded by the request that actually resizes
+    from PIL import Image, ImageOps
+
+    try:
+        with Image.open(original_path) as source:
+            image = ImageOps.exif_transpose(source)
+            image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ValueError(f"Could not read portrait image: {e}")
+
+    for size, fmt, path in pending:
+        resized = image.copy()
+        resized.thumbnail((VARIANT_SIZES[size], VARIANT_SIZES[size]), Image.LANCZOS)
+
+        _, pil_format, options = VARIANT_FORMATS[fmt]
+        if pil_format == 'JPEG' and resized.mode == 'RGBA':
+            background = Image.new('RGB', resized.size, (0, 0, 0))
+            background.paste(resized, mask=resized.split()[3])
+            resized = background
+
+        # Write then rename so a concurrent reader never sees half a file
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        resized.save(tmp_path, pil_format, **options)
+        os.replace(tmp_path, path)
+
+    return paths
+
+
+def find_original(store_dir, digest):
+    """Path of the stored original for a content hash, or None"""
+    if not DIGEST_PATTERN.match(digest):
+        return None
+    for extension in ORIGINAL_EXTENSIONS:
+        path = os.path.join(store_dir, f"{digest}.{extension}")
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def portrait_urls(original_path):
+    """
+    Immutable, content-addressed URLs for every variant of a portrait, or None
+    for portraits stored before uploads were content-addressed.
+    """
+    digest = portrait_digest(original_path)
+    if not DIGEST_PATTERN.match(digest):
+        return None
+    urls = {'original': f"/portraits/{digest}/original{os.path.splitext(original_path)[1]}"}
+    for size in VARIANT_SIZES:
+        urls[size] = {fmt: f"/portraits/{digest}/{size}.{VARIANT_FORMATS[fmt][0]}"
+                      for fmt in VARIANT_FORMATS}
+    return urls
+
+
+def get_variant(original_path, size, fmt):
+    """Path of a variant, generating variants on first use for older uploads"""
+    path = variant_path(original_path, size, fmt)
+    if not os.path.exists(path):
+        generate_variants(original_path)
+    return path
+
+
+def mimetype_for(path):
+    return mimetypes.guess_type(path)[0] or 'application/octet-stream'
@@ -0,0 +1,224 @@
+"""
+Rate Limiting for VTM Storyteller
+Token buckets per user, guild and campaign plus coalescing of duplicate LLM requests
+
+Every turn that may reach the model takes one token from each bucket it
+belongs to (its player, its Discord guild, its campaign). An empty bucket
+means the caller is told when to retry instead of the request being
+queued behind everyone else's. Identical messages from the same player
+inside the coalescing window (a double click, a client retry) share one
+upstream call and get the same reply.
+
+Buckets and in-flight requests live in the process, so each web worker
+and bot process enforces the limits on its own share of the traffic.
+"""
+
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+def _limit(name, burst, per_minute):
+    """(burst, per_minute) for a scope, overridable as LLM_<NAME>_LIMIT=burst/per_minute"""
+    value = os.getenv(f'LLM_{name.upper()}_LIMIT')
+    if value:
+        burst, per_minute = value.split('/')
+    return int(burst), float(per_minute)
+
+
+# Requests a scope may make at once, and how fast its bucket refills
+RATE_LIMITS = {
+    'user': _limit('user', 5, 6),
+    'guild': _limit('guild', 20, 60),
+    'campaign': _limit('campaign', 20, 60)
+}
+
+# Identical requests this close together share one upstream call
+COALESCE_WINDOW = 10.0
+
+
+class RateLimited(Exception):
+    """A bucket is empty; retry_after is the wait in seconds"""
+
+    def __init__(self, scope, retry_after):
+        super().__init__(f"Too many requests for this {scope}; retry in {math.ceil(retry_after)}s")
+        self.scope = scope
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self):
+        """Whole seconds for a Retry-After header"""
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class TokenBucketLimiter:
+    """
+    Token buckets for one scope, keyed by id (user id, guild id...).
+
+    Each bucket holds up to burst tokens and refills at per_minute. Full,
+    idle buckets are dropped beyond max_keys, since a missing bucket is
+    the same as a full one.
+    """
+
+    def __init__(self, burst, per_minute, max_keys=10000):
+        self.burst = burst
+        self.rate = per_minute / 60
+        self.max_keys = max_keys
+        # key -> [tokens, updated_at]
+        self._buckets = OrderedDict()
+
+    def _refill(self, key, now):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(self.burst), now]
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def wait_time(self, key, now):
+        """Seconds until key has a token (0 if it has one now)"""
+        bucket = self._refill(key, now)
+        if bucket[0] >= 1:
+            return 0.0
+        return (1 - bucket[0]) / self.rate
+
+    def take(self, key, now):
+        self._refill(key, now)[0] -= 1
+
+
+class RequestLimiter:
+    """
+    One TokenBucketLimiter per scope. acquire() takes a token from every
+    scope given, or from none of them if any is empty.
+    """
+
+    def __init__(self, limits=RATE_LIMITS):
+        self._lock = threading.Lock()
+        self._scopes = {scope: TokenBucketLimiter(burst, per_minute)
+                        for scope, (burst, per_minute) in limits.items()}
+        self.allowed = 0
+        self.limited = {scope: 0 for scope in limits}
+
+    def acquire(self, **keys):
+        """
+        Take one request's tokens, e.g. acquire(user='42', guild=7).
+        Scopes whose key is None are skipped.
+
+        Raises:
+            RateLimited: the scope with the longest wait and that wait
+        """
+        now = time.monotonic()
+        keys = {scope: key for scope, key in keys.items() if key is not None}
+        with self._lock:
+            waits = [(self._scopes[scope].wait_time(key, now), scope) for scope, key in keys.items()]
+            retry_after, scope = max(waits, default=(0.0, None))
+            if retry_after > 0:
+                self.limited[scope] += 1
+                raise RateLimited(scope, retry_after)
+            for scope, key in keys.items():
+                self._scopes[scope].take(key, now)
+            self.allowed += 1
+
+    def stats(self):
+        return {'allowed': self.allowed, 'limited': dict(self.limited)}
+
+
+class RequestCoalescer:
+    """
+    Shares one call between identical requests (thread version).
+
+    run(key, func) calls func unless a call for key is in flight or
+    succeeded within the window, in which case it returns (or raises)
+    that call's result instead. Failed calls aren't reused once done.
+    """
+
+    def __init__(self, window=COALESCE_WINDOW, max_entries=1000):
+        self.window = window
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # key -> [Future, finished_at or None]
+        self._calls = OrderedDict()
+        self.calls = 0
+        self.coalesced = 0
+
+    def _join(self, key, now):
+        entry = self._calls.get(key)
+        if entry and (entry[1] is None or now - entry[1] < self.window):
+            self.coalesced += 1
+            return entry[0]
+        return None
+
+    def _start(self, key, future):
+        self._calls[key] = [future, None]
+        self._calls.move_to_end(key)
+        while len(self._calls) > self.max_entries:
+            oldest_key, oldest = next(iter(self._calls.items()))
+            if oldest[1] is None:
+                break
+            del self._calls[oldest_key]
+        self.calls += 1
+
+    def _finished(self, key, future, succeeded):
+        entry = self._calls.get(key)
+        if entry and entry[0] is future:
+            if succeeded:
+                entry[1] = time.monotonic()
+            else:
+                del self._calls[key]
+
+    def run(self, key, func):
+        with self._lock:
+            future = self._join(key, time.monotonic())
+            leader = future is None
+            if leader:
+                future = Future()
+                self._start(key, future)
+
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(func())
+        except BaseException as e:
+            future.set_exception(e)
+        with self._lock:
+            self._finished(key, future, future.exception() is None)
+        return future.result()
+
+    def stats(self):
+        return {'calls': self.calls, 'coalesced': self.coalesced, 'tracked': len(self._calls)}
+
+
+class AsyncRequestCoalescer(RequestCoalescer):
+    """RequestCoalescer for coroutines on one event loop"""
+
+    def in_flight(self, key):
+        entry = self._calls.get(key)
+        return entry is not None and entry[1] is None
+
+    async def run(self, key, func):
+        """func is a no-argument coroutine function"""
+        future = self._join(key, time.monotonic())
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._start(key, future)
+        try:
+            future.set_result(await func())
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            self._finished(key, future, future.done() and not future.cancelled() and future.exception() is None)
+        return future.result()
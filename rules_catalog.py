@@ -0,0 +1,435 @@
+"""
+Rules Catalog for VTM Storyteller
+Rules, discipline and faction data held in memory for chat and the rules API
+
+The tables filled by fix_character_system.py, populate_disciplines.py and
+populate_faction_lore.py only change when one of those scripts runs, so
+they are read once into a RulesCatalog:
+- RuleEntry records with a name index (exact lookups such as "what is
+  Feral Whispers?") and a keyword index (the few rows worth putting in a
+  prompt)
+- the /rules/<type> and /disciplines/list payloads, pre-serialized with
+  ETags, plus name/level/category indexes for filtered requests
+
+CatalogStore swaps in a fresh catalog when the tables' version counters
+(see migrate_database.create_table_versions) change.
+"""
+
+import hashlib
+import json
+import math
+import re
+import sqlite3
+import threading
+import time
+from collections import defaultdict, namedtuple
+
+from llm_cache import normalize_question, question_body
+
+
+# kind: 'power', 'discipline', 'combat', ...; names: lowercased phrases that
+# identify the entry exactly; text: the entry as prompt-ready prose
+RuleEntry = namedtuple('RuleEntry', 'kind title names text')
+
+_WORD_RE = re.compile(r"[a-z0-9][a-z0-9'-]*")
+_STOPWORDS = frozenset('''
+    a an and are as at be by can do does for from how i in is it its of on or the
+    to what when where which who why with work works mean means explain describe
+    tell about rule rules you your this that'''.split())
+_TRAILING_VERB_RE = re.compile(r'\s+(?:work|works|do|does|mean|means|cost|costs)$')
+_LEADING_ARTICLE_RE = re.compile(r'^(?:a|an|the)\s+')
+
+DOTS = '●●●●●'
+
+# Tables read into the catalog, with the order rows are kept in
+CATALOG_TABLES = {
+    'disciplines': 'name, level',
+    'combat_rules': 'rule_type, rule_name',
+    'damage_healing_rules': 'rule_type',
+    'hunger_rules': 'hunger_level',
+    'humanity_rules': 'humanity_level DESC',
+    'experience_rules': 'trait_type, current_rating',
+    'attributes_rules': 'category, attribute_name',
+    'skills_rules': 'category, skill_name',
+    'character_creation_rules': 'category, id',
+    'factions': 'name',
+    'faction_roles': 'role_name',
+    'clans': 'name',
+}
+
+# API views: name -> (table, response fields, name/level/category filter
+# columns, key the rows are nested under in the response or None for a bare list)
+RuleView = namedtuple('RuleView', 'table fields name level category wrap')
+RULE_VIEWS = {
+    'character-creation': RuleView('character_creation_rules',
+                                   ('id', 'category', 'rule_name', 'description',
+                                    'points_available', 'minimum_value', 'maximum_value'),
+                                   'rule_name', None, 'category', 'rules'),
+    'attributes': RuleView('attributes_rules',
+                           ('id', 'attribute_name', 'category', 'description', 'specializations'),
+                           'attribute_name', None, 'category', 'rules'),
+    'skills': RuleView('skills_rules',
+                       ('id', 'skill_name', 'category', 'description', 'specializations'),
+                       'skill_name', None, 'category', 'rules'),
+    'combat': RuleView('combat_rules',
+                       ('id', 'rule_type', 'rule_name', 'description', 'mechanics', 'examples'),
+                       'rule_name', None, 'rule_type', 'rules'),
+    'hunger': RuleView('hunger_rules',
+                       ('id', 'hunger_level', 'description', 'effects', 'feeding_requirements'),
+                       'description', 'hunger_level', None, 'rules'),
+    'humanity': RuleView('humanity_rules',
+                         ('id', 'humanity_level', 'description', 'stains_to_lose', 'bane_severity', 'effects'),
+                         'description', 'humanity_level', None, 'rules'),
+    'experience': RuleView('experience_rules',
+                           ('id', 'trait_type', 'current_rating', 'xp_cost', 'description'),
+                           None, 'current_rating', 'trait_type', 'rules'),
+    'disciplines': RuleView('disciplines',
+                            ('id', 'name', 'level', 'power_name', 'description', 'system', 'cost',
+                             'dice_pools', 'duration', 'amalgam', 'prerequisite'),
+                            'name', 'level', None, None),
+}
+
+# A payload: serialized body plus its strong ETag
+Payload = namedtuple('Payload', 'body etag')
+
+
+def _tokens(text):
+    return [word for word in _WORD_RE.findall(text.lower()) if word not in _STOPWORDS]
+
+
+def _load_tables(conn):
+    """Every CATALOG_TABLES table as a tuple of row dicts; () if missing"""
+    tables = {}
+    for table, order_by in CATALOG_TABLES.items():
+        try:
+            cursor = conn.execute(f'SELECT * FROM {table} ORDER BY {order_by}')
+        except sqlite3.OperationalError:
+            tables[table] = ()
+            continue
+        columns = [column[0] for column in cursor.description]
+        tables[table] = tuple(dict(zip(columns, row)) for row in cursor.fetchall())
+    return tables
+
+
+def _join(*parts):
+    return ' '.join(part.strip() for part in parts if part and part.strip())
+
+
+def _discipline_entries(tables):
+    powers = tables['disciplines']
+    entries = []
+    by_discipline = defaultdict(list)
+    for row in powers:
+        power_name = row.get('power_name') or ''
+        level = row['level'] or 0
+        by_discipline[row['name']].append((level, power_name))
+        if not power_name:
+            continue
+        entries.append(RuleEntry(
+            'power', f"{power_name} ({row['name']} {DOTS[:level]})", (power_name.lower(),),
+            _join(f"{row['name']} {level} - {power_name}:", row['description'],
+                  f"System: {row['system']}" if row['system'] else '',
+                  f"Cost: {row['cost']}." if row['cost'] else '',
+                  f"Dice pool: {row['dice_pools']}." if row['dice_pools'] and row['dice_pools'] != 'None' else '',
+                  f"Duration: {row['duration']}." if row['duration'] else '',
+                  f"Amalgam: {row['amalgam']}." if row['amalgam'] else '')))
+
+    for name, levels in by_discipline.items():
+        listing = '; '.join(f"{level}: {power}" for level, power in levels if power)
+        entries.append(RuleEntry('discipline', name, (name.lower(),), f"{name} powers by level - {listing}."))
+    return entries
+
+
+def _rules_entries(tables):
+    entries = []
+    combat = tables['combat_rules']
+    # A rule type with a single rule ('Initiative') also names that rule
+    type_counts = defaultdict(int)
+    for row in combat:
+        type_counts[row['rule_type']] += 1
+    for row in combat:
+        names = (row['rule_name'].lower(),)
+        if type_counts[row['rule_type']] == 1:
+            names += (row['rule_type'].lower(),)
+        entries.append(RuleEntry(
+            'combat', row['rule_name'], names,
+            _join(f"{row['rule_type']} - {row['rule_name']}:", row['description'],
+                  row['mechanics'], f"Example: {row['examples']}" if row['examples'] else '')))
+
+    for row in tables['damage_healing_rules']:
+        title = _join(row['rule_type'], f"({row['damage_type']})" if row['damage_type'] else '')
+        entries.append(RuleEntry('damage', title, (row['rule_type'].lower(),),
+                                 _join(f"{title}:", row['description'], row['mechanics'])))
+
+    for row in tables['hunger_rules']:
+        level = row['hunger_level']
+        entries.append(RuleEntry(
+            'hunger', f"Hunger {level} ({row['description']})", (f"hunger {level}",),
+            _join(f"Hunger {level} - {row['description']}:", row['effects'],
+                  f"Feeding: {row['feeding_requirements']}" if row['feeding_requirements'] else '')))
+
+    for row in tables['humanity_rules']:
+        level = row['humanity_level']
+        entries.append(RuleEntry(
+            'humanity', f"Humanity {level} ({row['description']})", (f"humanity {level}",),
+            _join(f"Humanity {level} - {row['description']}:", row['effects'],
+                  f"Stains to lose a dot: {row['stains_to_lose']}. Bane severity: {row['bane_severity']}.")))
+
+    experience = defaultdict(list)
+    for row in tables['experience_rules']:
+        experience[row['trait_type']].append(f"{row['description']}: {row['xp_cost']} XP")
+    for trait, costs in experience.items():
+        entries.append(RuleEntry('experience', f"{trait} XP costs", (f"{trait.lower()} xp", f"{trait.lower()} experience"),
+                                 f"Experience costs for {trait} - " + '; '.join(costs) + '.'))
+
+    for table, name_column, kind in (('attributes_rules', 'attribute_name', 'attribute'),
+                                     ('skills_rules', 'skill_name', 'skill')):
+        for row in tables[table]:
+            name = row[name_column]
+            entries.append(RuleEntry(kind, name, (name.lower(),),
+                                     _join(f"{name} ({row['category']} {kind}): {row['description']}.",
+                                           f"Specialties: {row['specializations']}." if row['specializations'] else '')))
+
+    for row in tables['character_creation_rules']:
+        entries.append(RuleEntry('character-creation', row['rule_name'], (),
+                                 f"Character creation, {row['category']} - {row['rule_name']}: {row['description']}."))
+    return entries
+
+
+def _lore_entries(tables):
+    entries = []
+    factions = {row['id']: row['name'] for row in tables['factions']}
+    for row in tables['factions']:
+        entries.append(RuleEntry('faction', row['name'], (row['name'].lower(),),
+                                 _join(f"{row['name']}:", row['description'],
+                                       f"Philosophy: {row['philosophy']}" if row['philosophy'] else '',
+                                       f"Structure: {row['structure']}" if row['structure'] else '')))
+
+    for row in tables['faction_roles']:
+        faction = factions.get(row['faction_id'], '')
+        entries.append(RuleEntry('faction-role', _join(faction, row['role_name']), (row['role_name'].lower(),),
+                                 _join(f"{row['role_name']} ({faction}):", row['role_description'],
+                                       f"Responsibilities: {row['responsibilities']}" if row['responsibilities'] else '',
+                                       f"Typical clans: {row['typical_clans']}" if row['typical_clans'] else '')))
+
+    for row in tables['clans']:
+        entries.append(RuleEntry('clan', row['name'], (row['name'].lower(),),
+                                 _join(f"{row['name']}:", row['description'],
+                                       f"Bane: {row['bane']}" if row['bane'] else '',
+                                       f"Compulsion: {row['compulsion']}" if row['compulsion'] else '',
+                                       f"Disciplines: {row['disciplines']}" if row['disciplines'] else '')))
+    return entries
+
+
+def _payload(data):
+    body = json.dumps(data, separators=(',', ':')).encode('utf-8')
+    return Payload(body, hashlib.sha1(body).hexdigest()[:20])
+
+
+class _View:
+    """One API view: its rows, the full payload and filter indexes"""
+
+    def __init__(self, spec, rows):
+        self.spec = spec
+        self.rows = tuple({field: row.get(field) for field in spec.fields} for row in rows)
+        self.payload = self.build_payload(self.rows)
+        # filter -> value -> row positions, in row order
+        self.indexes = {}
+        for filter_name in ('name', 'level', 'category'):
+            column = getattr(spec, filter_name)
+            if column is None:
+                continue
+            index = defaultdict(list)
+            for position, row in enumerate(rows):
+                value = row.get(column)
+                if value is not None:
+                    index[str(value).lower()].append(position)
+            self.indexes[filter_name] = {value: tuple(positions) for value, positions in index.items()}
+
+    def build_payload(self, rows):
+        return _payload({self.spec.wrap: rows} if self.spec.wrap else rows)
+
+
+class RulesCatalog:
+    """
+    Read-only rules data: RuleEntry records with a name index and a
+    keyword index, and the API views. Build one with RulesCatalog.load().
+    """
+
+    def __init__(self, tables, version=None):
+        self.version = version
+        self.entries = tuple(_discipline_entries(tables) + _rules_entries(tables) + _lore_entries(tables))
+        self._views = {name: _View(spec, tables[spec.table]) for name, spec in RULE_VIEWS.items()}
+
+        self._by_name = {}
+        for index, entry in enumerate(self.entries):
+            for name in entry.names:
+                self._by_name.setdefault(name, index)
+        self._longest_name = max((len(name.split()) for name in self._by_name), default=0)
+
+        # keyword -> {entry index: weight}; words from names count triple
+        postings = defaultdict(dict)
+        for index, entry in enumerate(self.entries):
+            for word in _tokens(entry.text):
+                postings[word][index] = 1
+            for word in _tokens(' '.join(entry.names) + ' ' + entry.title):
+                postings[word][index] = 3
+        count = len(self.entries) or 1
+        self._postings = {word: (math.log(1 + count / len(hits)), hits) for word, hits in postings.items()}
+
+    @classmethod
+    def load(cls, db_path='vtm_storyteller.db'):
+        conn = sqlite3.connect(db_path)
+        try:
+            version = catalog_version(conn)
+            return cls(_load_tables(conn), version)
+        finally:
+            conn.close()
+
+    def view_payload(self, view_name, **filters):
+        """
+        Serialized rows of an API view, or None for an unknown view. The
+        unfiltered payload is built once, when the catalog loads.
+
+        Args:
+            view_name: key of RULE_VIEWS
+            filters: name/level/category values (case-insensitive exact
+                match); filters the view doesn't support are ignored
+        """
+        view = self._views.get(view_name)
+        if view is None:
+            return None
+
+        positions = None
+        for filter_name, value in filters.items():
+            index = view.indexes.get(filter_name)
+            if value is None or index is None:
+                continue
+            matches = index.get(str(value).lower(), ())
+            if positions is None:
+                positions = matches
+            else:
+                matches = set(matches)
+                positions = tuple(position for position in positions if position in matches)
+
+        if positions is None:
+            return view.payload
+        return view.build_payload([view.rows[position] for position in positions])
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, message, kinds=None):
+        """
+        The entry a question asks about by name ('what is Feral Whispers?',
+        'explain Hunger 3'), or None; optionally only of the given kinds.
+        """
+        subject = question_body(message)
+        if not subject:
+            return None
+        subject = _LEADING_ARTICLE_RE.sub('', _TRAILING_VERB_RE.sub('', subject))
+        index = self._by_name.get(subject)
+        if index is None and subject.endswith('s'):
+            index = self._by_name.get(subject[:-1])
+        if index is None or (kinds and self.entries[index].kind not in kinds):
+            return None
+        return self.entries[index]
+
+    def mentioned(self, message, limit=3, kinds=None):
+        """
+        Entries whose name appears as a phrase in a message, longest names
+        first, optionally only of the given kinds.
+        """
+        words = normalize_question(message).split()
+        found = []
+        for size in range(min(self._longest_name, len(words)), 0, -1):
+            for start in range(len(words) - size + 1):
+                index = self._by_name.get(' '.join(words[start:start + size]))
+                if index is None or (kinds and self.entries[index].kind not in kinds):
+                    continue
+                if self.entries[index] not in found:
+                    found.append(self.entries[index])
+                    if len(found) == limit:
+                        return found
+        return found
+
+    def search(self, message, limit=4):
+        """Best-matching entries for a message by weighted keyword overlap"""
+        scores = defaultdict(float)
+        for word in set(_tokens(message)):
+            posting = self._postings.get(word)
+            if posting is None:
+                continue
+            idf, hits = posting
+            for index, weight in hits.items():
+                scores[index] += idf * weight
+        best = sorted(scores, key=scores.get, reverse=True)[:limit]
+        return [self.entries[index] for index in best]
+
+
+def catalog_version(conn):
+    """Version counters of the catalog tables, or None where a table has none"""
+    try:
+        versions = dict(conn.execute('SELECT table_name, version FROM table_versions'))
+    except sqlite3.OperationalError:
+        versions = {}
+    return tuple(versions.get(table) for table in CATALOG_TABLES)
+
+
+class CatalogStore:
+    """
+    The current RulesCatalog for a database. get() checks the version
+    counters at most every revalidate_after seconds and loads a new
+    catalog when they moved; readers keep whichever catalog they got.
+    """
+
+    def __init__(self, db_path='vtm_storyteller.db', revalidate_after=5.0):
+        self.db_path = db_path
+        self.revalidate_after = revalidate_after
+        self._lock = threading.Lock()
+        self._catalog = None
+        self._checked_at = 0.0
+        self.loads = 0
+
+    def get(self):
+        catalog = self._catalog
+        if catalog is not None and time.monotonic() - self._checked_at < self.revalidate_after:
+            return catalog
+
+        with self._lock:
+            if self._catalog is not None and time.monotonic() - self._checked_at < self.revalidate_after:
+                return self._catalog
+            if self._catalog is not None:
+                conn = sqlite3.connect(self.db_path)
+                try:
+                    version = catalog_version(conn)
+                finally:
+                    conn.close()
+                if version == self._catalog.version:
+                    self._checked_at = time.monotonic()
+                    return self._catalog
+            self._catalog = RulesCatalog.load(self.db_path)
+            self._checked_at = time.monotonic()
+            self.loads += 1
+            return self._catalog
+
+    def stats(self):
+        catalog = self._catalog
+        return {
+            'loaded': catalog is not None,
+            'entries': len(catalog) if catalog else 0,
+            'loads': self.loads
+        }
+
+
+rules_store = CatalogStore()
+
+
+def format_entries(entries):
+    """Entries as a reference block for a prompt"""
+    return '\n'.join(f"- {entry.text}" for entry in entries)
+
+
+def format_answer(entry):
+    """An entry as a direct chat answer"""
+    return f"📖 **{entry.title}**\n\n{entry.text}"
@@ -0,0 +1,263 @@
+"""
+Session Transcript for VTM Storyteller
+Append-only log of every chat turn plus a rolling "story so far" summary
+
+chat() hands turns to TranscriptWriter, which inserts them from a
+background thread in batches, so a request never waits on the transcript.
+Messages trimmed out of the in-memory history go to StorySummarizer, which
+folds them into a short summary with the LLM every SUMMARIZE_EVERY
+messages, also in the background. The summary is sent in place of the
+dropped history, keeping the prompt a constant size.
+
+The transcript is also the history both front ends share: each row
+records whether it came from the web app or the Discord bot, and
+get_player_turns() lets either one pick up the turns a player made on
+the other.
+"""
+
+import atexit
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Dropped messages collected before the summary is refreshed
+SUMMARIZE_EVERY = 10
+
+# Messages kept verbatim in a prompt; older ones are summarized
+HISTORY_WINDOW = 20
+
+SUMMARY_INSTRUCTIONS = """You maintain the running summary of a Vampire: The Masquerade chronicle.
+Rewrite the summary so it includes the new exchanges. Keep names, places, open threads,
+promises, debts, injuries and Hunger/Humanity changes. Drop banter and rules chatter.
+Write at most 250 words of plain prose in past tense."""
+
+
+class TranscriptWriter:
+    """
+    Queue of transcript rows drained by one daemon thread.
+
+    Rows waiting when the process exits are flushed by an atexit hook.
+    Every row is tagged with the writer's source ('web' or 'discord').
+    """
+
+    def __init__(self, db_path='vtm_storyteller.db', batch_size=100, source='web'):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.source = source
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.written = 0
+        self.failed = 0
+
+    def append(self, session_id, user_id, role, content):
+        """Queue one transcript row; returns immediately"""
+        if self._thread is None:
+            self._start()
+        self._queue.put((session_id, user_id, role, content, self.source))
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='transcript-writer', daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _take_batch(self, block=True):
+        rows = []
+        try:
+            rows.append(self._queue.get(block=block))
+            while len(rows) < self.batch_size:
+                rows.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return rows
+
+    def _write(self, rows):
+        if not rows:
+            return
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            try:
+                conn.executemany('''INSERT INTO session_transcripts (session_id, user_id, role, content, source)
+                                    VALUES (?, ?, ?, ?, ?)''', rows)
+                conn.commit()
+            finally:
+                conn.close()
+            self.written += len(rows)
+        except sqlite3.Error as e:
+            self.failed += len(rows)
+            print(f"⚠️ Could not write {len(rows)} transcript rows: {e}")
+
+    def _run(self):
+        while True:
+            self._write(self._take_batch())
+
+    def flush(self):
+        """Write everything queued so far from the calling thread"""
+        while not self._queue.empty():
+            self._write(self._take_batch(block=False))
+
+    def stats(self):
+        return {'queued': self._queue.qsize(), 'written': self.written, 'failed': self.failed}
+
+
+def get_transcript(session_id, db_path='vtm_storyteller.db', roles=('user', 'assistant')):
+    """Transcript rows of a campaign session in order, as dicts"""
+    placeholders = ', '.join('?' for _ in roles)
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        rows = conn.execute(f'''SELECT user_id, role, content, created_at FROM session_transcripts
+                                WHERE session_id = ? AND role IN ({placeholders})
+                                ORDER BY id''', (session_id, *roles)).fetchall()
+    finally:
+        conn.close()
+    return [dict(row) for row in rows]
+
+
+def get_latest_summary(session_id, db_path='vtm_storyteller.db'):
+    """Most recent story-so-far summary recorded for a session, or None"""
+    conn = sqlite3.connect(db_path)
+    try:
+        row = conn.execute('''SELECT content FROM session_transcripts
+                              WHERE session_id = ? AND role = 'summary'
+                              ORDER BY id DESC LIMIT 1''', (session_id,)).fetchone()
+    finally:
+        conn.close()
+    return row[0] if row else None
+
+
+def get_player_turns(user_id, after_id=0, limit=HISTORY_WINDOW, exclude_source=None,
+                     db_path='vtm_storyteller.db'):
+    """
+    A player's most recent chat turns across every session, oldest first.
+    
+    Args:
+        user_id: player id shared by the web app and the Discord bot
+        after_id: only rows newer than this transcript id
+        limit: at most this many of the newest rows
+        exclude_source: skip rows written by this front end
+    
+    Returns:
+        List of dicts with id, role, content and source
+    """
+    sql = '''SELECT id, role, content, source FROM session_transcripts
+             WHERE user_id = ? AND id > ? AND role IN ('user', 'assistant')'''
+    params = [user_id, after_id]
+    if exclude_source:
+        sql += " AND source IS NOT ?"
+        params.append(exclude_source)
+    sql += " ORDER BY id DESC LIMIT ?"
+    params.append(limit)
+    
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        rows = conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+    return [dict(row) for row in reversed(rows)]
+
+
+def get_player_summary(user_id, db_path='vtm_storyteller.db'):
+    """Most recent story-so-far summary for a player, or None"""
+    conn = sqlite3.connect(db_path)
+    try:
+        row = conn.execute('''SELECT content FROM session_transcripts
+                              WHERE user_id = ? AND role = 'summary'
+                              ORDER BY id DESC LIMIT 1''', (user_id,)).fetchone()
+    finally:
+        conn.close()
+    return row[0] if row else None
+
+
+class StorySummarizer:
+    """
+    Rolling per-user summary of the history that no longer fits the prompt.
+
+    Args:
+        complete: function(messages) -> str that calls the LLM
+        writer: TranscriptWriter that records each new summary
+        summarize_every: dropped messages collected before summarizing
+    """
+
+    def __init__(self, complete, writer=None, summarize_every=SUMMARIZE_EVERY):
+        self.complete = complete
+        self.writer = writer
+        self.summarize_every = summarize_every
+        self._lock = threading.Lock()
+        self._summaries = {}
+        self._pending = {}
+        self._running = set()
+        self._executor = None
+        self.runs = 0
+        self.failures = 0
+
+    def story_so_far(self, user_id):
+        return self._summaries.get(user_id)
+
+    def restore(self, user_id, summary):
+        """Pick up a summary written earlier (e.g. by another process)"""
+        with self._lock:
+            self._summaries.setdefault(user_id, summary)
+
+    def add_dropped(self, user_id, messages, session_id=None):
+        """
+        Record messages trimmed from a user's history. Once enough have
+        collected, the summary is refreshed on a background thread; a user
+        never has more than one refresh running.
+        """
+        if not messages:
+            return
+        with self._lock:
+            pending = self._pending.setdefault(user_id, [])
+            pending.extend(messages)
+            if len(pending) < self.summarize_every or user_id in self._running:
+                return
+            batch = self._pending.pop(user_id)
+            self._running.add(user_id)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='story-summary')
+        self._executor.submit(self._summarize, user_id, batch, session_id)
+
+    def _summarize(self, user_id, batch, session_id):
+        try:
+            previous = self._summaries.get(user_id) or '(nothing yet)'
+            exchanges = '\n\n'.join(f"{message['role'].upper()}: {message['content']}" for message in batch)
+            summary = self.complete([
+                {"role": "system", "content": SUMMARY_INSTRUCTIONS},
+                {"role": "user", "content": f"CURRENT SUMMARY:\n{previous}\n\nNEW EXCHANGES:\n{exchanges}"}
+            ])
+            with self._lock:
+                self._summaries[user_id] = summary
+            self.runs += 1
+            if self.writer is not None:
+                self.writer.append(session_id, user_id, 'summary', summary)
+        except Exception as e:
+            # Keep the messages so the next refresh covers them
+            self.failures += 1
+            with self._lock:
+                self._pending[user_id] = batch + self._pending.get(user_id, [])
+            print(f"⚠️ Could not summarize story for {user_id}: {e}")
+        finally:
+            with self._lock:
+                self._running.discard(user_id)
+
+    def reset(self, user_id):
+        with self._lock:
+            self._summaries.pop(user_id, None)
+            self._pending.pop(user_id, None)
+
+    def stats(self):
+        return {
+            'summaries': len(self._summaries),
+            'pending_messages': sum(len(messages) for messages in self._pending.values()),
+            'runs': self.runs,
+            'failures': self.failures
+        }
+
+
+transcript_writer = TranscriptWriter()
@@ -0,0 +1,113 @@
+"""
+Discord Shard Metrics for VTM Storyteller
+Per-shard gateway latency and event rates for the sharded Discord bot
+
+Each bot process counts the gateway events it receives and, per shard,
+the interactions and messages from that shard's guilds plus disconnects
+and resumes. Every report the counters are turned into per-minute rates
+and written to the bot_shards table, one row per shard, where the web
+app's /health endpoint reads them alongside its own metrics.
+"""
+
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+
+class ShardMetrics:
+    """Counters for the shards one bot process runs"""
+
+    def __init__(self, db_path='vtm_storyteller.db'):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._gateway_events = Counter()
+        self._shard_events = Counter()
+        self._disconnects = Counter()
+        self._resumes = Counter()
+        self._since = time.monotonic()
+
+    def gateway_event(self, event_type):
+        with self._lock:
+            self._gateway_events[event_type] += 1
+
+    def shard_event(self, shard_id):
+        """An interaction or message from one of the shard's guilds"""
+        with self._lock:
+            self._shard_events[shard_id] += 1
+
+    def disconnected(self, shard_id):
+        with self._lock:
+            self._disconnects[shard_id] += 1
+
+    def resumed(self, shard_id):
+        with self._lock:
+            self._resumes[shard_id] += 1
+
+    def report(self, shard_count, latencies, guild_counts):
+        """
+        Rates since the last report, one dict per shard; counters restart.
+
+        Args:
+            shard_count: total shards across all processes
+            latencies: (shard_id, seconds) pairs from bot.latencies
+            guild_counts: shard_id -> guilds on that shard
+        """
+        with self._lock:
+            minutes = max(time.monotonic() - self._since, 1e-6) / 60
+            gateway_total = sum(self._gateway_events.values())
+            rows = []
+            for shard_id, latency in latencies:
+                rows.append({
+                    'shard_id': shard_id,
+                    'shard_count': shard_count,
+                    'pid': os.getpid(),
+                    # Infinity until the first heartbeat is acknowledged
+                    'latency_ms': round(latency * 1000, 1) if math.isfinite(latency) else None,
+                    'guilds': guild_counts.get(shard_id, 0),
+                    'events_per_minute': round(self._shard_events[shard_id] / minutes, 1),
+                    'gateway_events_per_minute': round(gateway_total / minutes, 1),
+                    'disconnects': self._disconnects[shard_id],
+                    'resumes': self._resumes[shard_id]
+                })
+            top_events = self._gateway_events.most_common(5)
+            self._gateway_events.clear()
+            self._shard_events.clear()
+            self._disconnects.clear()
+            self._resumes.clear()
+            self._since = time.monotonic()
+        return rows, [(event_type, round(count / minutes, 1)) for event_type, count in top_events]
+
+    def write(self, rows):
+        """Store a report in bot_shards, replacing each shard's previous row"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.executemany('''INSERT OR REPLACE INTO bot_shards
+                                (shard_id, shard_count, pid, latency_ms, guilds, events_per_minute,
+                                 gateway_events_per_minute, disconnects, resumes, updated_at)
+                                VALUES (:shard_id, :shard_count, :pid, :latency_ms, :guilds, :events_per_minute,
+                                        :gateway_events_per_minute, :disconnects, :resumes, CURRENT_TIMESTAMP)''',
+                             rows)
+            conn.commit()
+        finally:
+            conn.close()
+
+
+def read_shard_metrics(db_path='vtm_storyteller.db', stale_after=300):
+    """
+    Latest report of every shard, as dicts. Shards that haven't reported
+    for stale_after seconds are marked stale.
+    """
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        rows = conn.execute('''SELECT *, updated_at < datetime('now', ?) AS stale
+                               FROM bot_shards ORDER BY shard_id''', (f'-{int(stale_after)} seconds',)).fetchall()
+    except sqlite3.OperationalError:
+        # Bot never started against this database
+        return []
+    finally:
+        conn.close()
+    return [dict(row, stale=bool(row['stale'])) for row in rows]
@@ -0,0 +1,170 @@
+"""
+Speech for VTM Storyteller
+ElevenLabs voices, synthesis and an on-disk audio cache shared by the web app and the Discord bot
+
+Synthesized clips are stored under TTS_CACHE_DIR, named by a hash of the
+voice, model, voice settings and text, so the same line spoken twice (a
+repeated rules answer, a narrated sentence replayed on the web) is never
+synthesized again. Files are written atomically, so the web workers and
+the bot processes can share one directory. The oldest clips are pruned
+once the directory passes its size limit.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+
+# ElevenLabs configuration
+ELEVENLABS_API_KEY = os.getenv('ELEVENLABS_API_KEY', '')
+ELEVENLABS_API_URL = "https://api.elevenlabs.io/v1/text-to-speech"
+ELEVENLABS_MODEL = "eleven_multilingual_v2"
+
+# Voice IDs for different languages
+VOICES = {
+    'en': {
+        'voice_id': 'EXAVITQu4vr4xnSDxMaL',  # Serafina - Sensual female voice
+        'name': 'Serafina',
+        'description': 'Deep, sensual female voice perfect for VTM storytelling'
+    },
+    'es': {
+        'voice_id': '21m00Tcm4TlvDq8ikWAM',  # Rachel - Can speak Spanish
+        'name': 'Rachel',
+        'description': 'Warm, expressive female voice for Spanish narration'
+    }
+}
+
+DEFAULT_VOICE_SETTINGS = {
+    "stability": 0.5,
+    "similarity_boost": 0.75,
+    "style": 0.5,
+    "use_speaker_boost": True
+}
+
+TTS_CACHE_DIR = os.getenv('TTS_CACHE_DIR', '/tmp/vtm_tts_cache')
+TTS_CACHE_MAX_BYTES = int(os.getenv('TTS_CACHE_MAX_MB', '500')) * 1024 * 1024
+
+
+def generate_speech(text, language='en', voice_settings=None):
+    """MP3 bytes for text from ElevenLabs (no caching)"""
+    if not ELEVENLABS_API_KEY:
+        raise ValueError("ELEVENLABS_API_KEY not configured")
+
+    voice = VOICES.get(language, VOICES['en'])
+    voice_id = voice['voice_id']
+
+    url = f"{ELEVENLABS_API_URL}/{voice_id}"
+
+    headers = {
+        "Accept": "audio/mpeg",
+        "Content-Type": "application/json",
+        "xi-api-key": ELEVENLABS_API_KEY
+    }
+
+    data = {
+        "text": text,
+        "model_id": ELEVENLABS_MODEL,
+        "voice_settings": voice_settings or DEFAULT_VOICE_SETTINGS
+    }
+
+    import requests
+
+    response = requests.post(url, json=data, headers=headers, timeout=60)
+
+    if response.status_code != 200:
+        raise Exception(f"ElevenLabs API error: {response.status_code}")
+
+    return response.content
+
+
+class SpeechCache:
+    """
+    Directory of synthesized MP3 clips keyed by voice, settings and text.
+
+    get_path() returns the clip's file, synthesizing it on a miss; a hit
+    refreshes the file's mtime so pruning removes the least recently used
+    clips first.
+    """
+
+    def __init__(self, directory=TTS_CACHE_DIR, max_bytes=TTS_CACHE_MAX_BYTES,
+                 synthesize=generate_speech, prune_every=50):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.synthesize = synthesize
+        self.prune_every = prune_every
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, text, language='en', voice_settings=None):
+        voice = VOICES.get(language, VOICES['en'])
+        identity = json.dumps([voice['voice_id'], ELEVENLABS_MODEL, voice_settings or DEFAULT_VOICE_SETTINGS,
+                               ' '.join(text.split())], sort_keys=True)
+        return hashlib.sha256(identity.encode('utf-8')).hexdigest()
+
+    def get_path(self, text, language='en', voice_settings=None):
+        """Path of the MP3 for text, synthesizing it if it isn't cached"""
+        key = self.key(text, language, voice_settings)
+        path = os.path.join(self.directory, key[:2], f"{key}.mp3")
+        try:
+            os.utime(path)
+            self.hits += 1
+            return path
+        except FileNotFoundError:
+            pass
+
+        self.misses += 1
+        audio = self.synthesize(text, language, voice_settings)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.part')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(audio)
+        os.replace(temp_path, path)
+
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.prune_every == 0
+        if prune:
+            self.prune()
+        return path
+
+    def get(self, text, language='en', voice_settings=None):
+        """MP3 bytes for text, from the cache when possible"""
+        with open(self.get_path(text, language, voice_settings), 'rb') as f:
+            return f.read()
+
+    def prune(self):
+        """Delete the least recently used clips until the cache fits max_bytes"""
+        clips = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith('.mp3'):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    clips.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in clips)
+        for _, size, path in sorted(clips):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else None
+        }
+
+
+speech_cache = SpeechCache()
@@ -0,0 +1,763 @@
+// Global state
+let currentCharacter = null;
+let userId = 'user_' + Math.random().toString(36).substr(2, 9);
+let voiceEnabled = false;
+let currentAudio = null;
+
+// Voice narration functions
+function toggleVoice() {
+    voiceEnabled = !voiceEnabled;
+    const btn = document.getElementById('voice-toggle-btn');
+
+    if (voiceEnabled) {
+        btn.classList.add('active');
+        btn.classList.remove('muted');
+        btn.textContent = '🔊';
+        btn.title = 'Voice narration ON - Click to disable';
+    } else {
+        btn.classList.remove('active');
+        btn.classList.add('muted');
+        btn.textContent = '🔇';
+        btn.title = 'Voice narration OFF - Click to enable';
+
+        // Stop any currently playing audio
+        if (currentAudio) {
+            currentAudio.pause();
+            currentAudio = null;
+        }
+    }
+}
+
+async function playVoiceNarration(text, language = 'en') {
+    if (!voiceEnabled) return;
+
+    try {
+        // Stop any currently playing audio
+        if (currentAudio) {
+            currentAudio.pause();
+        }
+
+        // Request TTS from server
+        const response = await fetch('/tts', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ text, language })
+        });
+
+        if (!response.ok) {
+            console.error('TTS error:', response.statusText);
+            return;
+        }
+
+        // Get audio blob
+        const audioBlob = await response.blob();
+        const audioUrl = URL.createObjectURL(audioBlob);
+
+        // Play audio
+        currentAudio = new Audio(audioUrl);
+        currentAudio.play();
+
+        // Clean up URL when audio finishes
+        currentAudio.onended = () => {
+            URL.revokeObjectURL(audioUrl);
+            currentAudio = null;
+        };
+
+    } catch (error) {
+        console.error('Voice narration error:', error);
+    }
+}
+
+// VTM 5e Data
+const clans = [
+    { name: 'Brujah', disciplines: ['Celerity', 'Potence', 'Presence'] },
+    { name: 'Gangrel', disciplines: ['Animalism', 'Fortitude', 'Protean'] },
+    { name: 'Malkavian', disciplines: ['Auspex', 'Dominate', 'Obfuscate'] },
+    { name: 'Nosferatu', disciplines: ['Animalism', 'Obfuscate', 'Potence'] },
+    { name: 'Toreador', disciplines: ['Auspex', 'Celerity', 'Presence'] },
+    { name: 'Tremere', disciplines: ['Auspex', 'Blood Sorcery', 'Dominate'] },
+    { name: 'Ventrue', disciplines: ['Dominate', 'Fortitude', 'Presence'] },
+    { name: 'Caitiff', disciplines: ['Choose any 3'] },
+    { name: 'Thin-Blood', disciplines: ['Thin-Blood Alchemy'] }
+];
+
+const attributes = {
+    physical: ['Strength', 'Dexterity', 'Stamina'],
+    social: ['Charisma', 'Manipulation', 'Composure'],
+    mental: ['Intelligence', 'Wits', 'Resolve']
+};
+
+const skills = {
+    physical: ['Athletics', 'Brawl', 'Craft', 'Drive', 'Firearms', 'Larceny', 'Melee', 'Stealth', 'Survival'],
+    social: ['Animal Ken', 'Etiquette', 'Insight', 'Intimidation', 'Leadership', 'Performance', 'Persuasion', 'Streetwise', 'Subterfuge'],
+    mental: ['Academics', 'Awareness', 'Finance', 'Investigation', 'Medicine', 'Occult', 'Politics', 'Science', 'Technology']
+};
+
+// Character creation state
+let characterData = {
+    attributes: {},
+    skills: {},
+    disciplines: {}
+};
+
+// Tab switching
+function switchTab(tabName) {
+    document.querySelectorAll('.tab').forEach(tab => tab.classList.remove('active'));
+    document.querySelectorAll('.tab-content').forEach(content => content.classList.remove('active'));
+
+    event.target.classList.add('active');
+    document.getElementById(tabName + '-tab').classList.add('active');
+}
+
+// Chat functionality
+async function sendMessage() {
+    const input = document.getElementById('message-input');
+    const message = input.value.trim();
+
+    if (!message) return;
+
+    // Add user message to chat
+    addMessage('user', message);
+    input.value = '';
+
+    // Disable send button and show typing indicator
+    const sendBtn = document.getElementById('send-btn');
+    sendBtn.disabled = true;
+    document.getElementById('typing').classList.add('show');
+
+    try {
+        const response = await fetch('/chat', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ message, user_id: userId })
+        });
+
+        const data = await response.json();
+
+        if (data.error) {
+            addMessage('assistant', 'Error: ' + data.error);
+        } else {
+            addMessage('assistant', data.response);
+            // Play voice narration if enabled
+            playVoiceNarration(data.response, 'en');
+        }
+    } catch (error) {
+        addMessage('assistant', 'Error: Connection lost. Please try again.');
+    } finally {
+        sendBtn.disabled = false;
+        document.getElementById('typing').classList.remove('show');
+    }
+}
+
+function addMessage(role, content) {
+    const messagesDiv = document.getElementById('messages');
+    const messageDiv = document.createElement('div');
+    messageDiv.className = `message ${role}`;
+    messageDiv.innerHTML = `
+        <div class="message-label">${role === 'user' ? 'You' : 'Storyteller'}</div>
+        <div>${content}</div>
+    `;
+    messagesDiv.appendChild(messageDiv);
+    messagesDiv.scrollTop = messagesDiv.scrollHeight;
+}
+
+function handleKeyPress(event) {
+    if (event.key === 'Enter') {
+        sendMessage();
+    }
+}
+
+// Demiplane linking
+function showDemiplaneLink() {
+    document.getElementById('demiplane-link-section').style.display = 'block';
+}
+
+async function linkDemiplaneCharacter() {
+    const url = document.getElementById('demiplane-url').value;
+    const name = document.getElementById('demiplane-name').value;
+    const clan = document.getElementById('demiplane-clan').value;
+    const predator = document.getElementById('demiplane-predator').value;
+
+    if (!url || !name || !clan) {
+        alert('Please fill in all required fields');
+        return;
+    }
+
+    try {
+        const response = await fetch('/character/link', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                user_id: userId,
+                demiplane_url: url,
+                name,
+                clan,
+                predator_type: predator
+            })
+        });
+
+        const data = await response.json();
+
+        if (data.success) {
+            document.getElementById('linked-name').textContent = name;
+            document.getElementById('linked-clan').textContent = clan;
+            document.getElementById('linked-predator').textContent = predator;
+            document.getElementById('view-sheet-link').href = url;
+            document.getElementById('linked-character').style.display = 'block';
+            alert('Character linked successfully!');
+        } else {
+            alert('Error: ' + data.error);
+        }
+    } catch (error) {
+        alert('Error linking character: ' + error.message);
+    }
+}
+
+// PDF Upload
+function showPDFUpload() {
+    document.getElementById('pdf-upload-section').style.display = 'block';
+}
+
+async function uploadPDF() {
+    const fileInput = document.getElementById('pdf-file-input');
+    const file = fileInput.files[0];
+
+    if (!file) {
+        alert('Please select a PDF file');
+        return;
+    }
+
+    if (!file.name.endsWith('.pdf')) {
+        alert('Please select a valid PDF file');
+        return;
+    }
+
+    // Show progress
+    document.getElementById('pdf-upload-progress').style.display = 'block';
+    document.getElementById('pdf-progress-bar').style.width = '30%';
+    document.getElementById('pdf-progress-text').textContent = 'Uploading PDF...';
+
+    try {
+        const formData = new FormData();
+        formData.append('file', file);
+
+        const response = await fetch('/character/upload-pdf', {
+            method: 'POST',
+            body: formData
+        });
+
+        document.getElementById('pdf-progress-bar').style.width = '70%';
+        document.getElementById('pdf-progress-text').textContent = 'Parsing character data...';
+
+        const data = await response.json();
+
+        document.getElementById('pdf-progress-bar').style.width = '100%';
+        document.getElementById('pdf-progress-text').textContent = 'Complete!';
+
+        if (data.success) {
+            // Show result
+            document.getElementById('pdf-char-name').textContent = data.character_name;
+            document.getElementById('pdf-char-chronicle').textContent = data.chronicle;
+            document.getElementById('pdf-char-clan').textContent = data.clan;
+
+            // Show warnings if any
+            if (data.warnings && data.warnings.length > 0) {
+                const warningList = document.getElementById('pdf-warning-list');
+                warningList.innerHTML = data.warnings.map(w => `<li>${w}</li>`).join('');
+                document.getElementById('pdf-warnings').style.display = 'block';
+            }
+
+            document.getElementById('pdf-upload-result').style.display = 'block';
+
+            // Hide progress after 1 second
+            setTimeout(() => {
+                document.getElementById('pdf-upload-progress').style.display = 'none';
+                document.getElementById('pdf-progress-bar').style.width = '0%';
+            }, 1000);
+
+            alert(`Character "${data.character_name}" ${data.message}`);
+
+            // Reload character sheet
+            if (data.character_id) {
+                currentCharacter = data.character_id;
+                loadCharacterSheet(data.character_id);
+            }
+        } else {
+            document.getElementById('pdf-upload-progress').style.display = 'none';
+            alert('Error: ' + data.error);
+        }
+    } catch (error) {
+        document.getElementById('pdf-upload-progress').style.display = 'none';
+        alert('Error uploading PDF: ' + error.message);
+    }
+}
+
+async function reuploadPDF(characterId) {
+    const fileInput = document.createElement('input');
+    fileInput.type = 'file';
+    fileInput.accept = '.pdf';
+
+    fileInput.onchange = async (e) => {
+        const file = e.target.files[0];
+        if (!file) return;
+
+        try {
+            const formData = new FormData();
+            formData.append('file', file);
+
+            const response = await fetch(`/character/${characterId}/reupload-pdf`, {
+                method: 'POST',
+                body: formData
+            });
+
+            const data = await response.json();
+
+            if (data.success) {
+                alert(`Character "${data.character_name}" updated successfully!`);
+                loadCharacterSheet(characterId);
+            } else {
+                alert('Error: ' + data.error);
+            }
+        } catch (error) {
+            alert('Error re-uploading PDF: ' + error.message);
+        }
+    };
+
+    fileInput.click();
+}
+
+// Character creation
+function startCharacterCreation() {
+    document.getElementById('creation-wizard').style.display = 'block';
+    initializeClans();
+    initializeAttributes();
+    initializeSkills();
+}
+
+function cancelCreation() {
+    if (confirm('Are you sure you want to cancel character creation?')) {
+        document.getElementById('creation-wizard').style.display = 'none';
+        resetWizard();
+    }
+}
+
+function nextStep(stepNum) {
+    document.querySelectorAll('.wizard-step').forEach(step => step.classList.remove('active'));
+    document.getElementById(`step-${stepNum}`).classList.add('active');
+}
+
+function prevStep(stepNum) {
+    document.querySelectorAll('.wizard-step').forEach(step => step.classList.remove('active'));
+    document.getElementById(`step-${stepNum}`).classList.add('active');
+}
+
+function initializeClans() {
+    const grid = document.getElementById('clan-grid');
+    grid.innerHTML = '';
+
+    clans.forEach(clan => {
+        const div = document.createElement('div');
+        div.className = 'clan-option';
+        div.innerHTML = `
+            <h4>${clan.name}</h4>
+            <p style="font-size: 0.9em; margin-top: 10px;">${clan.disciplines.join(', ')}</p>
+        `;
+        div.onclick = () => selectClan(clan.name, div);
+        grid.appendChild(div);
+    });
+}
+
+function selectClan(clanName, element) {
+    document.querySelectorAll('.clan-option').forEach(opt => opt.classList.remove('selected'));
+    element.classList.add('selected');
+    characterData.clan = clanName;
+
+    // Update disciplines for step 5
+    const selectedClan = clans.find(c => c.name === clanName);
+    updateDisciplines(selectedClan.disciplines);
+}
+
+function initializeAttributes() {
+    const grid = document.getElementById('attributes-grid');
+    grid.innerHTML = '';
+
+    Object.entries(attributes).forEach(([category, attrs]) => {
+        const div = document.createElement('div');
+        div.className = 'attribute-category';
+        div.innerHTML = `<h4>${category.toUpperCase()}</h4>`;
+
+        attrs.forEach(attr => {
+            characterData.attributes[attr] = 1; // Start at 1
+            const itemDiv = document.createElement('div');
+            itemDiv.className = 'attribute-item';
+            itemDiv.innerHTML = `
+                <span>${attr}</span>
+                <div class="dots" id="attr-${attr}">
+                    ${[1,2,3,4,5].map(i => `<div class="dot ${i === 1 ? 'filled' : ''}" onclick="setAttributeDot('${attr}', ${i})"></div>`).join('')}
+                </div>
+            `;
+            div.appendChild(itemDiv);
+        });
+
+        grid.appendChild(div);
+    });
+}
+
+function setAttributeDot(attr, value) {
+    characterData.attributes[attr] = value;
+    const dotsContainer = document.getElementById(`attr-${attr}`);
+    const dots = dotsContainer.querySelectorAll('.dot');
+    dots.forEach((dot, index) => {
+        if (index < value) {
+            dot.classList.add('filled');
+        } else {
+            dot.classList.remove('filled');
+        }
+    });
+}
+
+function initializeSkills() {
+    const grid = document.getElementById('skills-grid');
+    grid.innerHTML = '';
+
+    Object.entries(skills).forEach(([category, skillList]) => {
+        const div = document.createElement('div');
+        div.className = 'skill-category';
+        div.innerHTML = `<h4>${category.toUpperCase()}</h4>`;
+
+        skillList.forEach(skill => {
+            characterData.skills[skill] = 0;
+            const itemDiv = document.createElement('div');
+            itemDiv.className = 'skill-item';
+            itemDiv.innerHTML = `
+                <span>${skill}</span>
+                <div class="dots" id="skill-${skill}">
+                    ${[1,2,3,4,5].map(i => `<div class="dot" onclick="setSkillDot('${skill}', ${i})"></div>`).join('')}
+                </div>
+            `;
+            div.appendChild(itemDiv);
+        });
+
+        grid.appendChild(div);
+    });
+}
+
+function setSkillDot(skill, value) {
+    characterData.skills[skill] = value;
+    const dotsContainer = document.getElementById(`skill-${skill}`);
+    const dots = dotsContainer.querySelectorAll('.dot');
+    dots.forEach((dot, index) => {
+        if (index < value) {
+            dot.classList.add('filled');
+        } else {
+            dot.classList.remove('filled');
+        }
+    });
+}
+
+function updateDisciplines(disciplineList) {
+    const grid = document.getElementById('disciplines-grid');
+    grid.innerHTML = '';
+
+    disciplineList.forEach(disc => {
+        characterData.disciplines[disc] = 0;
+        const div = document.createElement('div');
+        div.className = 'attribute-item';
+        div.innerHTML = `
+            <span>${disc}</span>
+            <div class="dots" id="disc-${disc}">
+                ${[1,2].map(i => `<div class="dot" onclick="setDisciplineDot('${disc}', ${i})"></div>`).join('')}
+            </div>
+        `;
+        grid.appendChild(div);
+    });
+}
+
+function setDisciplineDot(disc, value) {
+    characterData.disciplines[disc] = value;
+    const dotsContainer = document.getElementById(`disc-${disc}`);
+    const dots = dotsContainer.querySelectorAll('.dot');
+    dots.forEach((dot, index) => {
+        if (index < value) {
+            dot.classList.add('filled');
+        } else {
+            dot.classList.remove('filled');
+        }
+    });
+}
+
+async function finishCreation() {
+    const name = document.getElementById('char-name').value;
+    const concept = document.getElementById('char-concept').value;
+
+    if (!name || !characterData.clan) {
+        alert('Please complete all required fields');
+        return;
+    }
+
+    try {
+        const response = await fetch('/character/create', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                user_id: userId,
+                name,
+                clan: characterData.clan,
+                concept,
+                attributes: characterData.attributes,
+                skills: characterData.skills,
+                disciplines: characterData.disciplines
+            })
+        });
+
+        const data = await response.json();
+
+        if (data.success) {
+            alert('Character created successfully!');
+            currentCharacter = data.character_id;
+            loadCharacterSheet(data.character_id);
+            document.getElementById('creation-wizard').style.display = 'none';
+            switchTab('sheet');
+        } else {
+            alert('Error: ' + data.error);
+        }
+    } catch (error) {
+        alert('Error creating character: ' + error.message);
+    }
+}
+
+async function loadCharacterSheet(characterId) {
+    try {
+        const response = await fetch(`/character/${characterId}`);
+        const char = await response.json();
+
+        if (char.error) {
+            alert('Error loading character');
+            return;
+        }
+
+        // Display character sheet
+        const sheetDiv = document.getElementById('character-sheet');
+        sheetDiv.innerHTML = `
+            <div class="sheet-header">
+                ${char.portrait_urls ? `
+                <picture class="sheet-portrait">
+                    <source srcset="${char.portrait_urls.thumb.webp}" type="image/webp">
+                    <img src="${char.portrait_urls.thumb.jpeg}" alt="${char.name}" width="128" height="128" loading="lazy">
+                </picture>` : ''}
+                <div class="sheet-header-item">
+                    <label>Name</label>
+                    <div class="value">${char.name}</div>
+                </div>
+                <div class="sheet-header-item">
+                    <label>Clan</label>
+                    <div class="value">${char.clan}</div>
+                </div>
+                <div class="sheet-header-item">
+                    <label>Predator Type</label>
+                    <div class="value">${char.predator_type || 'None'}</div>
+                </div>
+            </div>
+
+            <div class="trackers">
+                <div class="tracker">
+                    <h4>Health</h4>
+                    <div class="tracker-boxes">
+                        ${Array(char.health + 3).fill(0).map((_, i) => `<div class="tracker-box"></div>`).join('')}
+                    </div>
+                </div>
+                <div class="tracker">
+                    <h4>Willpower</h4>
+                    <div class="tracker-boxes">
+                        ${Array(char.willpower + 3).fill(0).map((_, i) => `<div class="tracker-box"></div>`).join('')}
+                    </div>
+                </div>
+                <div class="tracker">
+                    <h4>Humanity</h4>
+                    <div class="tracker-boxes">
+                        ${Array(10).fill(0).map((_, i) => `<div class="tracker-box ${i < char.humanity ? 'filled' : ''}"></div>`).join('')}
+                    </div>
+                </div>
+                <div class="tracker">
+                    <h4>Hunger</h4>
+                    <div class="tracker-boxes">
+                        ${Array(5).fill(0).map((_, i) => `<div class="tracker-box ${i < char.hunger ? 'filled' : ''}"></div>`).join('')}
+                    </div>
+                </div>
+            </div>
+
+            <h3 style="color: #ff0000; margin: 30px 0 20px;">Attributes</h3>
+            <div class="attributes-grid">
+                ${Object.entries(attributes).map(([category, attrs]) => `
+                    <div class="attribute-category">
+                        <h4>${category.toUpperCase()}</h4>
+                        ${attrs.map(attr => `
+                            <div class="attribute-item">
+                                <span>${attr}</span>
+                                <div class="dots">
+                                    ${[1,2,3,4,5].map(i => `<div class="dot ${i <= char.attributes[attr] ? 'filled' : ''}"></div>`).join('')}
+                                </div>
+                            </div>
+                        `).join('')}
+                    </div>
+                `).join('')}
+            </div>
+
+            <h3 style="color: #ff0000; margin: 30px 0 20px;">Skills</h3>
+            <div class="skills-grid">
+                ${Object.entries(skills).map(([category, skillList]) => `
+                    <div class="skill-category">
+                        <h4>${category.toUpperCase()}</h4>
+                        ${skillList.map(skill => `
+                            <div class="skill-item">
+                                <span>${skill}</span>
+                                <div class="dots">
+                                    ${[1,2,3,4,5].map(i => `<div class="dot ${i <= (char.skills[skill] || 0) ? 'filled' : ''}"></div>`).join('')}
+                                </div>
+                            </div>
+                        `).join('')}
+                    </div>
+                `).join('')}
+            </div>
+
+            <h3 style="color: #ff0000; margin: 30px 0 20px;">Disciplines</h3>
+            <div class="attributes-grid">
+                ${Object.entries(char.disciplines).map(([disc, level]) => `
+                    <div class="attribute-item">
+                        <span>${disc}</span>
+                        <div class="dots">
+                            ${[1,2,3,4,5].map(i => `<div class="dot ${i <= level ? 'filled' : ''}"></div>`).join('')}
+                        </div>
+                    </div>
+                `).join('')}
+            </div>
+        `;
+    } catch (error) {
+        alert('Error loading character sheet: ' + error.message);
+    }
+}
+
+// Dice roller
+async function rollDice() {
+    const poolSize = parseInt(document.getElementById('pool-size').value);
+    const hungerDice = parseInt(document.getElementById('hunger-dice').value);
+    const difficulty = parseInt(document.getElementById('difficulty').value);
+
+    if (hungerDice > poolSize) {
+        alert('Hunger dice cannot exceed pool size');
+        return;
+    }
+
+    try {
+        const response = await fetch('/roll', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                pool: poolSize,
+                hunger: hungerDice,
+                user_id: userId,
+                character_id: currentCharacter
+            })
+        });
+
+        const result = await response.json();
+        displayDiceResult(result, difficulty);
+    } catch (error) {
+        alert('Error rolling dice: ' + error.message);
+    }
+}
+
+function displayDiceResult(result, difficulty) {
+    const resultDiv = document.getElementById('dice-result');
+
+    let summaryClass = '';
+    let summaryText = '';
+
+    if (result.bestial_failure) {
+        summaryClass = 'bestial';
+        summaryText = '🐺 BESTIAL FAILURE';
+    } else if (result.messy_critical) {
+        summaryClass = 'messy';
+        summaryText = '💀 MESSY CRITICAL';
+    } else if (result.critical) {
+        summaryClass = 'critical';
+        summaryText = '⭐ CRITICAL WIN';
+    } else if (result.successes >= difficulty) {
+        summaryClass = 'success';
+        summaryText = '✓ SUCCESS';
+    } else {
+        summaryClass = '';
+        summaryText = '✗ FAILURE';
+    }
+
+    resultDiv.innerHTML = `
+        <div class="dice-display">
+            <div class="dice-group">
+                <h4>Normal Dice</h4>
+                <div class="dice-list">
+                    ${result.normal_dice.map(d => `
+                        <div class="die ${d >= 6 ? 'success' : ''} ${d === 10 ? 'ten' : ''}">${d}</div>
+                    `).join('')}
+                </div>
+            </div>
+            ${result.hunger_dice.length > 0 ? `
+                <div class="dice-group">
+                    <h4>Hunger Dice</h4>
+                    <div class="dice-list">
+                        ${result.hunger_dice.map(d => `
+                            <div class="die hunger ${d >= 6 ? 'success' : ''} ${d === 10 ? 'ten' : ''}">${d}</div>
+                        `).join('')}
+                    </div>
+                </div>
+            ` : ''}
+        </div>
+
+        <div class="result-summary ${summaryClass}">
+            <h3>${summaryText}</h3>
+            <p style="font-size: 1.5em; margin: 15px 0;">
+                <strong>${result.successes}</strong> successes
+                ${result.pairs > 0 ? `<br><strong>${result.pairs}</strong> critical pair(s)` : ''}
+            </p>
+            <p style="color: #999;">Difficulty: ${difficulty}</p>
+        </div>
+    `;
+
+    resultDiv.classList.add('show');
+}
+
+function resetWizard() {
+    characterData = {
+        attributes: {},
+        skills: {},
+        disciplines: {}
+    };
+    document.querySelectorAll('.wizard-step').forEach((step, index) => {
+        step.classList.remove('active');
+        if (index === 0) step.classList.add('active');
+    });
+}
+
+// Check system health on load
+async function checkHealth() {
+    try {
+        const response = await fetch('/health');
+        const data = await response.json();
+        const statusDiv = document.getElementById('status');
+
+        if (data.status === 'healthy') {
+            statusDiv.className = 'status online';
+            statusDiv.textContent = 'System Online';
+        } else {
+            statusDiv.className = 'status degraded';
+            statusDiv.textContent = 'System Degraded';
+        }
+    } catch (error) {
+        const statusDiv = document.getElementById('status');
+        statusDiv.className = 'status degraded';
+        statusDiv.textContent = 'System Offline';
+    }
+}
+
+// Initialize
+checkHealth();
+setInterval(checkHealth, 60000); // Check every minute
@@ -0,0 +1,139 @@
+"""
+Static Asset Pipeline for VTM Storyteller
+Fingerprints the page's CSS/JS and pre-compresses everything once per deploy
+
+Sources live in static/ (index.html, app.css, app.js). Building writes to
+static/dist/:
+    app.<sha256[:12]>.css / .js     plus .gz and .br variants
+    index.html                      with asset URLs rewritten, plus .gz and .br
+    manifest.json                   source name -> fingerprinted name
+
+Run once per deploy, before the web workers start:
+    python static_assets.py
+"""
+
+import gzip
+import hashlib
+import json
+import os
+
+try:
+    import brotli
+except ImportError:  # brotli variants are skipped; gzip still works
+    brotli = None
+
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_NAME = 'manifest.json'
+
+# URL prefix the page and the asset route use
+ASSET_URL_PREFIX = '/assets/'
+
+# Fingerprinted assets referenced from index.html
+FINGERPRINTED_ASSETS = ('app.css', 'app.js')
+PAGE_NAME = 'index.html'
+
+# Content-Encoding -> file suffix, in server preference order
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _write(path, data):
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _write_compressed(path, data):
+    """Write a file and its gzip/brotli variants"""
+    _write(path, data)
+    _write(path + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        _write(path + '.br', brotli.compress(data, quality=11))
+
+
+def build_assets(static_dir=STATIC_DIR, dist_dir=DIST_DIR):
+    """
+    Build the fingerprinted, pre-compressed assets and the manifest.
+
+    Returns:
+        dict: manifest {source name: fingerprinted name}
+    """
+    os.makedirs(dist_dir, exist_ok=True)
+
+    manifest = {}
+    for name in FINGERPRINTED_ASSETS:
+        with open(os.path.join(static_dir, name), 'rb') as f:
+            data = f.read()
+        stem, extension = os.path.splitext(name)
+        fingerprinted = f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{extension}"
+        _write_compressed(os.path.join(dist_dir, fingerprinted), data)
+        manifest[name] = fingerprinted
+
+    with open(os.path.join(static_dir, PAGE_NAME), encoding='utf-8') as f:
+        page = f.read()
+    for name, fingerprinted in manifest.items():
+        page = page.replace(f'"{ASSET_URL_PREFIX}{name}"', f'"{ASSET_URL_PREFIX}{fingerprinted}"')
+    _write_compressed(os.path.join(dist_dir, PAGE_NAME), page.encode('utf-8'))
+    manifest[PAGE_NAME] = PAGE_NAME
+
+    _write(os.path.join(dist_dir, MANIFEST_NAME), json.dumps(manifest, indent=2).encode('utf-8'))
+    return manifest
+
+
+def load_manifest(dist_dir=DIST_DIR):
+    """Read the manifest, building the assets first if they were never built"""
+    try:
+        with open(os.path.join(dist_dir, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return build_assets(dist_dir=dist_dir)
+
+
+def _accepted_encodings(accept_encoding):
+    return {part.split(';')[0].strip() for part in (accept_encoding or '').split(',')}
+
+
+def choose_encoding(accept_encoding, path):
+    """
+    Pick the best pre-built variant the client accepts.
+
+    Returns:
+        tuple: (path to serve, Content-Encoding or None)
+    """
+    accepted = _accepted_encodings(accept_encoding)
+    for encoding, suffix in ENCODINGS:
+        if encoding in accepted and os.path.exists(path + suffix):
+            return path + suffix, encoding
+    return path, None
+
+
+class StaticPage:
+    """
+    The built index.html held in memory with its encoded variants, so
+    serving the page is a dict lookup instead of a template render.
+    """
+
+    def __init__(self, dist_dir=DIST_DIR):
+        load_manifest(dist_dir)
+        path = os.path.join(dist_dir, PAGE_NAME)
+        self.variants = {}
+        for encoding, suffix in ((None, ''),) + ENCODINGS:
+            if os.path.exists(path + suffix):
+                with open(path + suffix, 'rb') as f:
+                    self.variants[encoding] = f.read()
+        self.etag = hashlib.sha256(self.variants[None]).hexdigest()[:16]
+
+    def select(self, accept_encoding):
+        """Return (body, Content-Encoding or None) for a request"""
+        accepted = _accepted_encodings(accept_encoding)
+        for encoding, _ in ENCODINGS:
+            if encoding in accepted and encoding in self.variants:
+                return self.variants[encoding], encoding
+        return self.variants[None], None
+
+
+if __name__ == '__main__':
+    for source, built in build_assets().items():
+        print(f"✓ {source} -> static/dist/{built}")
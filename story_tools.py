@@ -0,0 +1,112 @@
+"""
+Story Tools for VTM Storyteller
+Structured side-channel for what a Storyteller reply creates or asks for
+
+Story completions are offered four function tools: suggest_roll,
+create_npc, create_location and create_item. The model narrates in the
+message text as usual and calls the tools alongside it, so the dice
+suggestion and any new NPC, location or item arrive as JSON arguments
+that go straight into the dice and campaign stores (see
+storyteller_service.process_reply). The regex parsers in
+IntelligentDiceSystem and CampaignAutoSave remain for replies produced
+without tools, such as the Discord bot's assistant runs.
+"""
+
+import json
+
+
+_ATTRIBUTES = ['Strength', 'Dexterity', 'Stamina', 'Charisma', 'Manipulation', 'Composure',
+               'Intelligence', 'Wits', 'Resolve']
+_NAMED_TEXT = {'type': 'array', 'items': {'type': 'object', 'properties': {
+    'name': {'type': 'string'}, 'description': {'type': 'string'}}, 'required': ['name']}}
+_DOTS = {'type': 'object', 'additionalProperties': {'type': 'integer', 'minimum': 0, 'maximum': 5}}
+_TAGS = {'type': 'array', 'items': {'type': 'string'}}
+
+
+def _tool(name, description, properties, required):
+    return {'type': 'function', 'function': {
+        'name': name,
+        'description': description,
+        'parameters': {'type': 'object', 'properties': properties, 'required': required}
+    }}
+
+
+STORY_TOOLS = [
+    _tool('suggest_roll',
+          'Record the dice roll you are asking the player to make, alongside your narration. '
+          'Give an attribute and a skill, or a discipline for a power roll.',
+          {'attribute': {'type': 'string', 'enum': _ATTRIBUTES},
+           'skill': {'type': 'string'},
+           'discipline': {'type': 'string'},
+           'reason': {'type': 'string'}},
+          []),
+    _tool('create_npc',
+          'Record a new named NPC you introduced in your narration, for the campaign database.',
+          {'name': {'type': 'string'}, 'real_name': {'type': 'string'}, 'clan': {'type': 'string'},
+           'nature': {'type': 'string'}, 'faction': {'type': 'string'},
+           'primary_location': {'type': 'string', 'description': 'City'},
+           'personality': {'type': 'string'}, 'appearance': {'type': 'string'},
+           'quirks': {'type': 'string'}, 'clothing_style': {'type': 'string'},
+           'information_specialty': {'type': 'string'},
+           'attributes': _DOTS, 'skills': _DOTS, 'disciplines': _DOTS, 'tags': _TAGS},
+          ['name']),
+    _tool('create_location',
+          'Record a new named location you introduced in your narration, for the campaign database.',
+          {'name': {'type': 'string'}, 'type': {'type': 'string', 'description': 'e.g. Elysium, Haven'},
+           'city': {'type': 'string'}, 'controlled_by': {'type': 'string'},
+           'architecture_style': {'type': 'string'}, 'atmosphere': {'type': 'string'},
+           'rooms': _NAMED_TEXT, 'hidden_passages': {'type': 'string'},
+           'security_measures': {'type': 'string'}, 'supernatural_elements': {'type': 'string'},
+           'tags': _TAGS},
+          ['name']),
+    _tool('create_item',
+          'Record a new named item, weapon or vehicle you introduced in your narration, for the campaign database.',
+          {'name': {'type': 'string'}, 'type': {'type': 'string', 'description': 'e.g. Weapon, Vehicle'},
+           'subtype': {'type': 'string'}, 'backstory': {'type': 'string'},
+           'stats': {'type': 'object', 'additionalProperties': {'type': 'number'}},
+           'features': _NAMED_TEXT, 'game_mechanics': {'type': 'string'}, 'tags': _TAGS},
+          ['name'])
+]
+
+# create_* tool -> campaign record kind for CampaignAutoSave.save_generated
+CREATE_TOOLS = {'create_npc': 'npc', 'create_location': 'location', 'create_item': 'item'}
+
+
+def parse_tool_calls(message):
+    """(name, arguments) for each tool call in a completion message; malformed JSON is skipped"""
+    calls = []
+    for call in getattr(message, 'tool_calls', None) or []:
+        try:
+            arguments = json.loads(call.function.arguments or '{}')
+        except json.JSONDecodeError:
+            print(f"⚠️ Ignoring {call.function.name} call with malformed arguments")
+            continue
+        if isinstance(arguments, dict):
+            calls.append((call.function.name, arguments))
+    return calls
+
+
+def story_completion(router, route, messages, **kwargs):
+    """
+    A story reply with its tool calls, through router.complete().
+
+    If the model answers with tool calls only, it is called once more with
+    the calls acknowledged and tools switched off, to get the narration.
+
+    Returns:
+        (reply text, [(name, arguments), ...])
+    """
+    message = router.complete(route, messages, tools=STORY_TOOLS, **kwargs).choices[0].message
+    calls = parse_tool_calls(message)
+    if message.content or not message.tool_calls:
+        return message.content or '', calls
+
+    followup = messages + [{
+        'role': 'assistant',
+        'content': None,
+        'tool_calls': [{'id': call.id, 'type': 'function',
+                        'function': {'name': call.function.name, 'arguments': call.function.arguments}}
+                       for call in message.tool_calls]
+    }] + [{'role': 'tool', 'tool_call_id': call.id, 'content': 'Recorded.'} for call in message.tool_calls]
+    message = router.complete(route, followup, tools=STORY_TOOLS, tool_choice='none', **kwargs).choices[0].message
+    return message.content or '', calls
@@ -0,0 +1,167 @@
+"""
+Storyteller Service for VTM Storyteller
+Turn context, dice and campaign memory shared by the web app and the Discord bot
+
+Both front ends build a Storyteller turn the same way: the player's active
+character (from character_cache), campaign NPCs/locations/items they
+mention, and rules entries for powers they name are added to the
+message. Replies go through the same dice-suggestion and campaign
+auto-save steps, fed by the reply's story tool calls when it has them
+(see story_tools.py) and by the text parsers otherwise, and /roll
+resolves pools from the active character with IntelligentDiceSystem in
+both.
+
+Everything here is synchronous and cheap once the caches are warm; the
+Discord bot calls it through asyncio.to_thread so SQLite never blocks the
+event loop.
+"""
+
+from character_cache import character_cache
+from intelligent_dice_system import intelligent_dice
+from rules_catalog import format_answer, format_entries, rules_store
+from story_tools import CREATE_TOOLS
+
+
+# Catalog entries worth adding to a story turn when the player names them;
+# skills and attributes are left out since their names are everyday words
+STORY_REFERENCE_KINDS = ('power', 'discipline', 'combat', 'damage', 'faction-role')
+
+# Catalog entries a question may be answered from directly. Factions,
+# court roles and clans are left out: "who is the Prince?" asks about the
+# chronicle's Prince, so those stay story turns with a [RULES REFERENCE]
+ANSWER_KINDS = ('power', 'discipline', 'combat', 'damage', 'hunger', 'humanity',
+                'experience', 'attribute', 'skill')
+
+DEFAULT_CAMPAIGN_ID = 1
+
+
+def catalog_answer(message):
+    """Answer from the rules database if the message names one rules entry, else None"""
+    entry = rules_store.get().lookup(message, kinds=ANSWER_KINDS)
+    return format_answer(entry) if entry else None
+
+
+def build_turn(user_id, message, campaign_id=DEFAULT_CAMPAIGN_ID):
+    """
+    Add character, campaign and rules context to a player's message.
+
+    Returns:
+        (enhanced_message, campaign_integration); campaign_integration is
+        None if the campaign database couldn't be read
+    """
+    character_context = None
+    campaign_context = None
+    campaign_integration = None
+    try:
+        from ai_character_integration import get_character_summary_for_chat
+        from campaign_ai_integration import integrate_with_chat_endpoint
+
+        character_context = get_character_summary_for_chat(user_id)
+
+        # Get campaign database context
+        campaign_integration = integrate_with_chat_endpoint(message, campaign_id=campaign_id)
+        campaign_context = campaign_integration['additional_context']
+
+    except Exception as context_error:
+        print(f"Could not load character/campaign context: {context_error}")
+
+    enhanced_message = message
+
+    # Rules entries for powers, rules or roles the player names
+    rules_reference = rules_store.get().mentioned(message, kinds=STORY_REFERENCE_KINDS)
+    if rules_reference:
+        enhanced_message = f"[RULES REFERENCE]\n{format_entries(rules_reference)}\n\n{enhanced_message}"
+    if character_context:
+        enhanced_message = f"{character_context}\n\n{enhanced_message}"
+    if campaign_context:
+        enhanced_message = f"{campaign_context}\n\n{enhanced_message}"
+
+    return enhanced_message, campaign_integration
+
+
+def process_reply(reply, roll_key, campaign_integration=None, tool_calls=None):
+    """
+    Remember the roll a reply asks for (so a bare /roll makes it) and save
+    any NPCs, locations or items it introduced to the campaign database.
+
+    tool_calls are the reply's (name, arguments) story tool calls. None
+    means the model wasn't offered the tools, and the reply text is
+    scanned with the regex parsers instead.
+    """
+    try:
+        if tool_calls is None:
+            roll_suggestion = intelligent_dice.extract_roll_from_ai_message(reply)
+        else:
+            roll_suggestion = None
+            for name, arguments in tool_calls:
+                if name == 'suggest_roll':
+                    roll_suggestion = intelligent_dice.roll_from_suggestion(arguments) or roll_suggestion
+        if roll_suggestion:
+            intelligent_dice.store_suggested_roll(roll_key, roll_suggestion)
+            print(f"🎲 Stored suggested roll: {roll_suggestion}")
+    except Exception as dice_error:
+        print(f"Could not detect/store dice roll: {dice_error}")
+
+    try:
+        if campaign_integration:
+            if tool_calls is None:
+                saved_data = campaign_integration['process_response'](reply)
+            else:
+                saved_data = campaign_integration['save_generated'](
+                    [(CREATE_TOOLS[name], arguments) for name, arguments in tool_calls if name in CREATE_TOOLS])
+            if saved_data['saved_count'] > 0:
+                print(f"📊 Auto-saved {saved_data['saved_count']} items to campaign database")
+                for item_type, item_name, item_id in saved_data['saved_items']:
+                    print(f"   - {item_type}: {item_name} (ID: {item_id})")
+    except Exception as save_error:
+        print(f"Could not auto-save to campaign database: {save_error}")
+
+
+def roll_for_character(character_id, args, roll_key, difficulty=0):
+    """
+    /roll for a character: 'Dexterity + Stealth', a discipline name, or
+    nothing for the Storyteller's last suggestion, each optionally with
+    '+ blood surge'. Hunger dice come from the character.
+
+    Returns:
+        {'success', 'message', 'roll_result'} or {'error'}
+    """
+    roll_params = intelligent_dice.parse_roll_command(f'/roll {args or ""}')
+
+    if not character_id:
+        return {'error': 'No active character. Please create or link a character first.'}
+
+    # Decoded record from the cache; no SQL for an unchanged character
+    character_data = character_cache.get(character_id)
+
+    if not character_data:
+        return {'error': 'Character not found.'}
+
+    # Determine what to roll
+    if roll_params['use_last_suggested']:
+        last_roll = intelligent_dice.get_last_suggested_roll(roll_key)
+        if not last_roll:
+            return {'error': 'No previous roll suggestion found. Please specify what to roll (e.g., /roll Intelligence + Auspex)'}
+
+        # Blood Surge applies to this roll only, not the stored suggestion
+        roll_data = dict(last_roll, blood_surge=True) if roll_params['blood_surge'] else last_roll
+    else:
+        roll_data = roll_params
+
+    pool_size, description = intelligent_dice.calculate_dice_pool(character_data, roll_data)
+
+    if pool_size == 0:
+        return {'error': f'Cannot roll {description}. Dice pool is 0.'}
+
+    hunger = character_data.get('hunger', 0) or 0
+    result = intelligent_dice.roll_dice(pool_size, hunger, difficulty=difficulty)
+
+    response = f"🎲 **Rolling {description}**\n"
+    response += f"Pool: {pool_size} dice | Hunger: {hunger}\n\n"
+    response += result['message']
+
+    return {
+        'success': True,
+        'message': response,
+        'roll_result': result
+    }
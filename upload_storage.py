@@ -0,0 +1,122 @@
+"""
+Content-Addressed Upload Storage for VTM Storyteller
+Streams uploads to disk in one pass while hashing and sniffing file type
+"""
+
+import hashlib
+import os
+import tempfile
+
+
+# Read uploads in large chunks; the hash and size check ride along
+CHUNK_SIZE = 1024 * 1024  # 1MB
+
+# Leading bytes needed to identify every supported kind
+SNIFF_BYTES = 12
+
+# Kind -> stored file extension
+KIND_EXTENSIONS = {
+    'pdf': 'pdf',
+    'png': 'png',
+    'jpeg': 'jpg',
+    'gif': 'gif',
+    'webp': 'webp'
+}
+
+PDF_KINDS = {'pdf'}
+IMAGE_KINDS = {'png', 'jpeg', 'gif', 'webp'}
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the size limit for its route"""
+
+
+def sniff_kind(header):
+    """Identify a file kind from its leading bytes, or None if unknown"""
+    if header.startswith(b'%PDF-'):
+        return 'pdf'
+    if header.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if header.startswith(b'\xff\xd8\xff'):
+        return 'jpeg'
+    if header.startswith((b'GIF87a', b'GIF89a')):
+        return 'gif'
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def _too_large(max_size):
+    return UploadTooLargeError(f"Upload exceeds the {max_size / (1024 * 1024):g}MB limit")
+
+
+def check_content_length(content_length, max_size):
+    """Reject a request up front when its declared body is over the limit"""
+    if content_length is not None and content_length > max_size:
+        raise _too_large(max_size)
+
+
+def store_upload(file, store_dir, allowed_kinds, max_size):
+    """
+    Stream an uploaded file into a content-addressed store.
+
+    The file is copied to a temp file in store_dir in CHUNK_SIZE reads while
+    its SHA-256 is computed and its magic bytes are checked, then atomically
+    renamed to <sha256>.<ext>. Uploading identical content twice reuses the
+    existing file.
+
+    Args:
+        file: FileStorage object from Flask request
+        store_dir: Directory holding the stored files
+        allowed_kinds: Set of kinds accepted (see KIND_EXTENSIONS)
+        max_size: Maximum size in bytes
+
+    Returns:
+        tuple: (path, sha256 hex digest, kind)
+    """
+    os.makedirs(store_dir, exist_ok=True)
+
+    sha256_hash = hashlib.sha256()
+    size = 0
+    header = b''
+    kind = None
+
+    stream = file.stream
+    fd, tmp_path = tempfile.mkstemp(dir=store_dir, prefix='.upload-')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                size += len(chunk)
+                if size > max_size:
+                    raise _too_large(max_size)
+
+                if kind is None:
+                    header += chunk[:SNIFF_BYTES - len(header)]
+                    if len(header) >= SNIFF_BYTES:
+                        kind = sniff_kind(header)
+                        if kind not in allowed_kinds:
+                            raise ValueError("File contents do not match an allowed file type")
+
+                sha256_hash.update(chunk)
+                tmp.write(chunk)
+
+        # Files shorter than the sniff window
+        if kind is None:
+            kind = sniff_kind(header)
+            if kind not in allowed_kinds:
+                raise ValueError("File contents do not match an allowed file type")
+
+        digest = sha256_hash.hexdigest()
+        path = os.path.join(store_dir, f"{digest}.{KIND_EXTENSIONS[kind]}")
+
+        if os.path.exists(path):
+            os.unlink(tmp_path)
+        else:
+            os.replace(tmp_path, path)
+
+        return path, digest, kind
+
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
@@ -0,0 +1,127 @@
+"""
+Voice Narration for the VTM Storyteller Discord bot
+Speaks Storyteller replies in a voice channel while they stream in
+
+SentenceStream cuts the streamed reply into sentences as they complete.
+Each sentence is synthesized through the shared speech cache (see
+speech.py) on a worker thread as soon as it's queued, and a guild's
+Narrator plays the clips in order through ffmpeg. The first sentence
+starts playing while the rest of the reply is still being written and
+synthesized. Playing in voice needs ffmpeg on the PATH and PyNaCl.
+"""
+
+import asyncio
+import re
+
+import discord
+
+from speech import speech_cache
+
+
+# Sentence end: punctuation, optional closing quote/bracket, then whitespace
+_SENTENCE_END_RE = re.compile(r'[.!?…]+["\'”’)\]]*\s+')
+# Markdown the voice would otherwise read out
+_MARKDOWN_RE = re.compile(r'[*_`#>~|]+')
+# Fragments shorter than this are joined to the next sentence
+MIN_SENTENCE_CHARS = 20
+# Clips synthesized at once across every guild
+SYNTHESIS_CONCURRENCY = 4
+
+
+def speakable(text):
+    return ' '.join(_MARKDOWN_RE.sub('', text).split())
+
+
+class SentenceStream:
+    """
+    Feeds the complete sentences of a growing text to emit(sentence).
+
+    update() takes the whole text so far, like StreamingReply.update();
+    finish() emits whatever is left.
+    """
+
+    def __init__(self, emit):
+        self.emit = emit
+        self._consumed = 0
+
+    def update(self, text):
+        start = self._consumed
+        for match in _SENTENCE_END_RE.finditer(text, start):
+            if match.end() - start >= MIN_SENTENCE_CHARS:
+                self._send(text[start:match.end()])
+                start = match.end()
+        self._consumed = start
+
+    def finish(self, text):
+        self.update(text)
+        self._send(text[self._consumed:])
+        self._consumed = len(text)
+
+    def _send(self, sentence):
+        sentence = speakable(sentence)
+        if sentence:
+            self.emit(sentence)
+
+
+class Narrator:
+    """
+    Playback queue for one guild's voice connection.
+
+    say() starts synthesizing a line right away and queues it; one task
+    plays the queue in order, so narration never overlaps and lines play
+    in the order they were said.
+    """
+
+    _synthesis_slots = None
+
+    def __init__(self, voice_client, language='en'):
+        self.voice_client = voice_client
+        self.language = language
+        self._queue = asyncio.Queue()
+        self._task = None
+        self.lines_played = 0
+        if Narrator._synthesis_slots is None:
+            Narrator._synthesis_slots = asyncio.Semaphore(SYNTHESIS_CONCURRENCY)
+
+    async def _synthesize(self, text):
+        async with Narrator._synthesis_slots:
+            return await asyncio.to_thread(speech_cache.get_path, text, self.language)
+
+    def say(self, text):
+        """Queue a line; it's synthesized now and played after the lines before it"""
+        self._queue.put_nowait(asyncio.create_task(self._synthesize(text)))
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._play_queue())
+
+    async def _play_queue(self):
+        while not self._queue.empty():
+            clip = self._queue.get_nowait()
+            try:
+                path = await clip
+            except Exception as e:
+                print(f"⚠️ Could not synthesize narration: {e}")
+                continue
+            if not self.voice_client.is_connected():
+                self.clear()
+                return
+            await self._play(path)
+
+    async def _play(self, path):
+        loop = asyncio.get_running_loop()
+        finished = loop.create_future()
+
+        def after(error):
+            if error:
+                print(f"⚠️ Narration playback failed: {error}")
+            loop.call_soon_threadsafe(lambda: finished.done() or finished.set_result(None))
+
+        self.voice_client.play(discord.FFmpegOpusAudio(path), after=after)
+        await finished
+        self.lines_played += 1
+
+    def clear(self):
+        """Drop queued lines and stop the one playing"""
+        while not self._queue.empty():
+            self._queue.get_nowait().cancel()
+        if self.voice_client.is_playing():
+            self.voice_client.stop()